@@ -17,6 +17,9 @@ import numpy as onp
 import copy
 import mpmath
 import scipy
+import multiprocessing
+import concurrent.futures
+import itertools
 
 try:
     onp.float128(1.)
@@ -33,7 +36,11 @@ def CovMatr(FisherMatrix,
             condNumbMax=1e50, 
             truncate=False, svals_thresh=1e-15,  
             verbose=False,
-            alt_method = 'svd'
+            alt_method = 'svd',
+            fastPath=False, condFastMax=1e10, epsFastMax=1e-6, 
+            return_stats=False,
+            n_workers=1, executor=None,
+            return_eigh=False
             ):
     """
     Invert the Fisher matrix(ces), obtaining the covariance matrix(ces).
@@ -45,15 +52,55 @@ def CovMatr(FisherMatrix,
     :param float svals_thresh: Threshold value to truncate the singular values when using the ``'svd'`` method, or to exclude the singular values from the inversion when using the ``'svd_reg'`` method.
     :param bool, optional verbose: Boolean specifying if the code has to print additional details during execution.
     :param str alt_method: Inversion method to use in case the inverison with ``invMethodIn`` fails. To be chosen among ``'inv'``, ``'cho'``, ``'svd'``, ``'svd_reg'`` and ``'lu'``. It has to be different from ``invMethodIn``.
+    :param bool, optional fastPath: Boolean specifying if the matrices have first to be inverted all at once in double precision, see :py:class:`gwfast.fisherTools._CovMatr_fast`. Only the events failing the conditioning or residual checks of the fast path are then inverted with the `mpmath library <https://mpmath.org>`_ as described above. This is only used with ``invMethodIn`` among ``'inv'``, ``'cho'`` and ``'lu'``, which give the same inverse, and not with the SVD methods, which can regularise the matrices.
+    :param float, optional condFastMax: Maximum condition number of the matrices normalised by their diagonal for the fast path to be used.
+    :param float, optional epsFastMax: Maximum residual of the inversion of the matrices normalised by their diagonal, :math:`\\max|C\\,F - I|`, for the result of the fast path to be accepted.
+    :param bool, optional return_stats: Boolean specifying if the number of events inverted through the fast path, and of the events routed to the `mpmath library <https://mpmath.org>`_ for each reason, have to be returned. In this case the return type is *tuple(array, array, dict)*.
+    :param int, optional n_workers: Number of processes among which the events inverted with the `mpmath library <https://mpmath.org>`_ are split, see :py:class:`gwfast.fisherTools._map_events`. The results do not depend on this value. With more than one process, the details of the inversion of the single events are not printed.
+    :param concurrent.futures.Executor, optional executor: Executor used to invert the chunks of events, e.g. a ``concurrent.futures.ProcessPoolExecutor``, in which case ``n_workers`` is the number of chunks. If ``None`` and ``n_workers`` is larger than 1, a pool of ``n_workers`` processes is created for the call.
+    :param bool, optional return_eigh: Boolean specifying if the eigenvalues and eigenvectors of the Fisher matrix(ces), computed with the `mpmath library <https://mpmath.org>`_ to check the conditioning, have to be returned after the inversion error(s), with the same shapes as in :py:class:`gwfast.fisherTools.CheckFisher`. In this case the eigenvalues of the matrices normalised by their diagonal, which decide the inversion method as without ``return_eigh``, are computed in double precision, and again with the `mpmath library <https://mpmath.org>`_ only if their condition number exceeds :math:`10^8` (or is close to ``condNumbMax`` when truncating), so that the same method is used. The eigenvalues and eigenvectors are ``nan`` for the events for which the decomposition fails. This cannot be used with ``fastPath``, see :py:class:`gwfast.fisherTools.AnalyseFisher` instead.
     :return: Covariance matrix(ces) (3-D array) and inversion error(s) (1-D array). The covariance matrix(ces) have the same shape of ``FisherMatrix``, i.e. :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
     :rtype: tuple(array, array)
     
     """
+    if fastPath and return_eigh:
+        raise ValueError('The fast path cannot be used with return_eigh, use AnalyseFisher instead.')
+    
+    if fastPath and (invMethodIn in ['inv', 'cho', 'lu']):
+        CovM, eps, stats = _CovMatr_fast(FisherMatrix, condFastMax=condFastMax, epsFastMax=epsFastMax)
+        isSlow = ~stats.pop('is_fast')
+        if isSlow.any():
+            # The events failing the checks go through the mpmath inversion
+            CovM[:, :, isSlow], eps[isSlow] = CovMatr(FisherMatrix[:, :, isSlow], invMethodIn=invMethodIn, condNumbMax=condNumbMax, truncate=truncate, svals_thresh=svals_thresh, verbose=verbose, alt_method=alt_method, n_workers=n_workers, executor=executor)
+        if verbose:
+            print('Inverted %s matrices in double precision, %s with mpmath (%s with nan entries, %s with non-positive diagonal or eigenvalues, %s ill-conditioned, %s with large inversion error).' %(stats['fast'], isSlow.sum(), stats['nan'], stats['not_pos_def'], stats['ill_conditioned'], stats['residual']))
+            print(' Inversion error: min=%s, max=%s, mean=%s, std=%s ' %(onp.min(eps), onp.max(eps), onp.mean(eps), onp.std(eps)) )
+        if return_stats:
+            return CovM, eps, stats
+        return CovM, eps
+    
+    if (n_workers>1) or (executor is not None):
+        # The events are independent: invert chunks of them in parallel and join the results in the original order
+        res = _map_events(CovMatr, FisherMatrix, n_workers=n_workers, executor=executor, invMethodIn=invMethodIn, condNumbMax=condNumbMax, truncate=truncate, svals_thresh=svals_thresh, verbose=False, alt_method=alt_method, return_eigh=return_eigh)
+        CovM = onp.concatenate([r[0] for r in res], axis=-1)
+        eps = onp.concatenate([r[1] for r in res], axis=-1)
+        if verbose:
+            print(' Inversion error with method %s: min=%s, max=%s, mean=%s, std=%s ' %(invMethodIn, onp.min(eps), onp.max(eps), onp.mean(eps), onp.std(eps)) )
+        out = (CovM, eps)
+        if return_eigh:
+            out = out + (onp.concatenate([r[2] for r in res], axis=0), onp.concatenate([r[3] for r in res], axis=0))
+        if return_stats:
+            out = out + ({'fast':0, 'mpmath':FisherMatrix.shape[-1], 'nan':0, 'not_pos_def':0, 'ill_conditioned':0, 'residual':0},)
+        return out
+    
     FisherMatrixOr = copy.deepcopy(FisherMatrix)
     
     reweighted=False
     FisherM = FisherMatrix.astype(typeuse)
-    CovMatr = onp.zeros(FisherMatrix.shape).astype(typeuse)
+    CovM = onp.zeros(FisherMatrix.shape).astype(typeuse)
+    if return_eigh:
+        evals = onp.full(FisherMatrix.shape[1:][::-1], onp.nan)
+        evecs = onp.full(FisherMatrix.shape[::-1], onp.nan)
     
     cho_failed = 0
     
@@ -64,7 +111,7 @@ def CovMatr(FisherMatrix,
         if onp.all(onp.isnan(FisherM[:, :, k])):
             if verbose:
                 print('Fisher is nan at position %s. ' %k)
-            CovMatr[:, :, k] = onp.full( FisherM[:, :, k].shape , onp.nan)
+            CovM[:, :, k] = onp.full( FisherM[:, :, k].shape , onp.nan)
         else:
             # go to mpmath
             ff = mpmath.matrix( FisherM[:, :, k].astype(typeuse))
@@ -72,8 +119,11 @@ def CovMatr(FisherMatrix,
                 # Conditioning of the original Fisher
                 
                 # Checks this by computing the eigenvalues of the FIM
-                E, _ = mpmath.eigh(ff)
+                E, ER = mpmath.eigh(ff)
                 E = onp.array(E.tolist(), dtype=typeuse)
+                if return_eigh:
+                    evals[k, :] = E[:, 0]
+                    evecs[k, :, :] = onp.array(ER.tolist(), dtype=typeuse)
                 if onp.any(E<0) and verbose:
                     print('Matrix is not positive definite!')
     
@@ -86,9 +136,16 @@ def CovMatr(FisherMatrix,
                     ws =  mpmath.diag([ 1/mpmath.sqrt(ff[i, i]) for i in range(FisherM.shape[-2]) ])
                     FisherM_ = ws*ff*ws
                     # Conditioning of the new Fisher
-                    EE, _ = mpmath.eigh(FisherM_)
-                    E = onp.array(EE.tolist(), dtype=typeuse)
-                    cond = onp.max(onp.abs(E))/onp.min(onp.abs(E))
+                    if return_eigh:
+                        # The eigenvalues in double precision are enough to decide the method, unless the smallest 
+                        # one is too close to zero, in which case they are computed with mpmath as without return_eigh
+                        E = onp.linalg.eigvalsh(onp.array(FisherM_.tolist(), dtype='float64'))
+                        cond = onp.max(onp.abs(E))/onp.min(onp.abs(E))
+                        isAmbiguous = (cond>1e8) or (truncate and (cond>1e-3*condNumbMax))
+                    if (not return_eigh) or isAmbiguous:
+                        EE, _ = mpmath.eigh(FisherM_)
+                        E = onp.array(EE.tolist(), dtype=typeuse)
+                        cond = onp.max(onp.abs(E))/onp.min(onp.abs(E))
                     if verbose:
                         print('Condition of the new matrix: %s' %cond)
                     reweighted=True
@@ -112,8 +169,8 @@ def CovMatr(FisherMatrix,
                         # likely for very small eigenvalues
                         c = (mpmath.cholesky(FisherM_))**-1
                     except Exception as e:
-                        print(e)
                         invMethod=alt_method
+                        print(e)
                         print('Cholesky decomposition not usable. Eigenvalues seem ok but cholesky decomposition failed. Using method %s' %invMethod)
                         #print('Eigenvalues: %s' %str(E))
                         cho_failed+=1
@@ -182,7 +239,7 @@ def CovMatr(FisherMatrix,
                 else:
                     CovMatr_ = cc
     
-                CovMatr[:, :, k] =  onp.array(CovMatr_.tolist(), dtype=typeuse)
+                CovM[:, :, k] =  onp.array(CovMatr_.tolist(), dtype=typeuse)
                 if verbose:
                     print()
             
@@ -190,18 +247,122 @@ def CovMatr(FisherMatrix,
                 # Eigenvalue decomposition failed
                 print(e)
                 print('Inversion failed!')
-                CovMatr[:, :, k] = onp.full( FisherM[:, :, k].shape , onp.nan)
+                CovM[:, :, k] = onp.full( FisherM[:, :, k].shape , onp.nan)
 
     
-    eps = compute_inversion_error(FisherMatrixOr, CovMatr)
+    eps = compute_inversion_error(FisherMatrixOr, CovM)
 
     if verbose:
             print('Error with %s: %s\n' %(invMethod, eps))
             print(' Inversion error with method %s: min=%s, max=%s, mean=%s, std=%s ' %(invMethodIn, onp.min(eps), onp.max(eps), onp.mean(eps), onp.std(eps)) )
             print('Method %s not possible on %s non-positive definite matrices, %s was used in those cases. ' %(invMethodIn, cho_failed, alt_method))
-    return CovMatr , eps
+    out = (CovM , eps)
+    if return_eigh:
+        out = out + (evals, evecs)
+    if return_stats:
+        out = out + ({'fast':0, 'mpmath':FisherMatrix.shape[-1], 'nan':0, 'not_pos_def':0, 'ill_conditioned':0, 'residual':0},)
+    return out
+
+
+def _CovMatr_fast(FisherMatrix, condFastMax=1e10, epsFastMax=1e-6, nRefine=0):
+    """
+    Invert the Fisher matrix(ces) all at once in double precision, checking which results can be trusted.
+    
+    The matrices are normalised by their diagonal, as in :py:class:`gwfast.fisherTools.CovMatr`, and their condition numbers are computed from the eigenvalues. The well-conditioned ones are inverted through a batched Cholesky decomposition. The residual of the inversion of the normalised matrices, :math:`\\max|C\\,F - I|`, which does not depend on the units of the parameters, is then computed in extended precision (if available), and the results with a residual above ``epsFastMax`` are rejected.
+    
+    Optionally, the inverse can be improved with steps of iterative refinement, :math:`C \\to C + C\\,(I - F\\,C)`, in extended precision, each step being kept only for the events whose residual decreases. Since the result of the Cholesky decomposition is already at the level of the rounding errors of double precision, and the refinement reduces :math:`|I - F\\,C|` at the expense of :math:`|I - C\\,F|` for a symmetric :math:`C`, this rarely helps, and is not performed by default.
+    
+    :param array FisherMatrix: Array containing the Fisher matrix(ces) to invert, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param float condFastMax: Maximum condition number of the normalised matrices for the inversion to be performed.
+    :param float epsFastMax: Maximum residual of the inversion of the normalised matrices for the result to be accepted.
+    :param int nRefine: Number of steps of iterative refinement.
+    
+    :return: Covariance matrix(ces) (3-D array), inversion error(s) (1-D array), as in :py:class:`gwfast.fisherTools.compute_inversion_error`, and a dictionary with a boolean mask of the accepted events (``'is_fast'``), their number (``'fast'``), and the number of events rejected because of ``nan`` entries, non-positive diagonal elements or eigenvalues, large condition number or large residual. The covariance matrices and inversion errors of the rejected events are not meaningful.
+    :rtype: tuple(array, array, dict)
+    
+    """
+    FisherM = onp.asarray(FisherMatrix, dtype='float64').transpose(2,0,1)
+    nParams = FisherM.shape[-1]
+    Id = onp.eye(nParams)
+    
+    isNan = ~onp.isfinite(FisherM).all(axis=(1,2))
+    diag = onp.where(isNan[:,onp.newaxis], 1., onp.diagonal(FisherM, axis1=1, axis2=2))
+    posDiag = (diag>0.).all(axis=1)
+    ws = 1./onp.sqrt(onp.where(posDiag[:,onp.newaxis], diag, 1.))
+    FisherNorm = onp.where((~isNan & posDiag)[:,onp.newaxis,onp.newaxis], FisherM*ws[:,:,onp.newaxis]*ws[:,onp.newaxis,:], Id)
+    
+    # Condition numbers of the normalised matrices
+    E = onp.linalg.eigvalsh(FisherNorm)
+    isPosDef = ~isNan & posDiag & (E[:,0]>0.)
+    with onp.errstate(divide='ignore', invalid='ignore'):
+        cond = onp.abs(E).max(axis=1)/onp.abs(E).min(axis=1)
+    isCond = isPosDef & (cond<condFastMax)
+    FisherNorm[~isCond] = Id
+    
+    try:
+        L = onp.linalg.cholesky(FisherNorm)
+    except onp.linalg.LinAlgError:
+        # Rare, close to the conditioning threshold: find the matrices for which the decomposition fails
+        L = onp.broadcast_to(Id, FisherNorm.shape).copy()
+        for k in onp.where(isCond)[0]:
+            try:
+                L[k] = onp.linalg.cholesky(FisherNorm[k])
+            except onp.linalg.LinAlgError:
+                isCond[k] = False
+    Linv = onp.linalg.inv(L)
+    CovNorm = onp.matmul(Linv.transpose(0,2,1), Linv).astype(typeuse)
+    
+    FisherNorm = FisherNorm.astype(typeuse)
+    residual = onp.abs(onp.matmul(CovNorm, FisherNorm) - Id).max(axis=(1,2))
+    for _ in range(nRefine):
+        CovNew = CovNorm + onp.matmul(CovNorm, Id - onp.matmul(FisherNorm, CovNorm))
+        CovNew = 0.5*(CovNew + CovNew.transpose(0,2,1))
+        residualNew = onp.abs(onp.matmul(CovNew, FisherNorm) - Id).max(axis=(1,2))
+        isBetter = residualNew < residual
+        CovNorm[isBetter], residual[isBetter] = CovNew[isBetter], residualNew[isBetter]
+    
+    Cov = CovNorm*ws[:,:,onp.newaxis]*ws[:,onp.newaxis,:]
+    eps = onp.abs(onp.matmul(Cov, FisherM.astype(typeuse)) - Id).max(axis=(1,2))
+    isFast = isCond & (residual<epsFastMax)
+    
+    stats = {'is_fast':isFast, 'fast':isFast.sum(), 'mpmath':(~isFast).sum(), 
+             'nan':isNan.sum(), 'not_pos_def':(~isNan & ~isPosDef).sum(), 
+             'ill_conditioned':(isPosDef & ~isCond).sum(), 'residual':(isCond & ~isFast).sum()}
+    
+    return Cov.transpose(1,2,0), eps, stats
+
 
+def _map_events(fun, FisherMatrix, n_workers=1, executor=None, **kwargs):
+    """
+    Apply a function to chunks of the events, concurrently, and collect the results in the order of the events.
+    
+    The event axis is split in ``n_workers`` contiguous chunks, of sizes differing at most by one, and ``fun`` is called on each of them with the keyword arguments ``kwargs``. Since the precision of the `mpmath library <https://mpmath.org>`_ is a global setting, changed temporarily by its functions, the chunks have to be processed in separate processes and not in threads. If no executor is provided, a ``concurrent.futures.ProcessPoolExecutor`` with ``n_workers`` processes, started with the ``spawn`` method to avoid forking the threads of JAX, is used for the call. As for any pool of processes, in a script this has to be called from within an ``if __name__ == '__main__'`` block.
+    
+    :param callable fun: Function to apply, defined at the top level of a module, so that it can be sent to the processes. It has to accept the matrices of a chunk of events as first argument.
+    :param array FisherMatrix: Array containing the matrices, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param int n_workers: Number of chunks, and of processes if ``executor`` is ``None``.
+    :param concurrent.futures.Executor, optional executor: Executor used to perform the computations. It cannot be a ``concurrent.futures.ThreadPoolExecutor``.
+    :param kwargs: Keyword arguments passed to ``fun``.
     
+    :return: Results of ``fun`` on the non-empty chunks, in the order of the events.
+    :rtype: list
+    
+    """
+    chunks = [idxs for idxs in onp.array_split(onp.arange(FisherMatrix.shape[-1]), max(n_workers, 1)) if len(idxs)>0]
+    if len(chunks)==0:
+        return [fun(FisherMatrix, **kwargs)]
+    
+    if isinstance(executor, concurrent.futures.ThreadPoolExecutor):
+        raise ValueError('The mpmath library changes its working precision globally, hence it cannot be used from multiple threads. Use a pool of processes.')
+    
+    if executor is None:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(chunks), mp_context=multiprocessing.get_context('spawn')) as pool:
+            return _map_events(fun, FisherMatrix, n_workers=n_workers, executor=pool, **kwargs)
+    
+    futures = [executor.submit(fun, FisherMatrix[..., idxs[0]:idxs[-1]+1], **kwargs) for idxs in chunks]
+    return [f.result() for f in futures]
+
+
 def compute_inversion_error(Fisher, Cov):
     """
     Compute the inversion error given the Fisher and covariance matrices.
@@ -213,13 +374,13 @@ def compute_inversion_error(Fisher, Cov):
     :rtype: 1-D array
     
     """
-    return onp.array([ onp.max( onp.abs(Cov[:, :, i]@Fisher[:, :, i]-onp.eye(Fisher.shape[0]))) for i in range(Fisher.shape[-1]) ])
+    return onp.abs(onp.matmul(onp.moveaxis(Cov, -1, 0), onp.moveaxis(Fisher, -1, 0)) - onp.eye(Fisher.shape[0])).max(axis=(1,2))
     
 
 
 
             
-def CheckFisher(FisherM, condNumbMax=1.0e15, use_mpmath=True, verbose=False):
+def CheckFisher(FisherM, condNumbMax=1.0e15, use_mpmath=True, verbose=False, n_workers=1, executor=None):
     """
     Perform some sanity checks on the Fisher matrix, in particular:
     
@@ -230,6 +391,8 @@ def CheckFisher(FisherM, condNumbMax=1.0e15, use_mpmath=True, verbose=False):
     :param float condNumbMax: Maximum allowed condition number, depending on the machine precision.
     :param bool, optional use_mpmath: Boolean specifying if the checks have to be performed using the `mpmath library <https://mpmath.org>`_.
     :param bool, optional verbose: Boolean specifying if the code has to print additional details during execution.
+    :param int, optional n_workers: Number of processes among which the events are split when using the `mpmath library <https://mpmath.org>`_, see :py:class:`gwfast.fisherTools._map_events`. The results do not depend on this value.
+    :param concurrent.futures.Executor, optional executor: Executor used to process the chunks of events, as in :py:class:`gwfast.fisherTools.CovMatr`.
     
     :return: Eigenvalues, eigenvectors and condition number(s) of the input Fisher matrix(ces).
     :rtype: tuple(array, array, array)
@@ -240,36 +403,34 @@ def CheckFisher(FisherM, condNumbMax=1.0e15, use_mpmath=True, verbose=False):
     # The input has size (Npar,Npar,Nev), so we have to swap
     
     if not use_mpmath:
-        evals, evecs = scipy.linalg.eigh(FisherM.transpose(2,0,1))
+        isNan = onp.all(onp.isnan(FisherM), axis=(0,1))
+        evals = onp.full(FisherM.shape[1:][::-1], onp.nan)
+        evecs = onp.full(FisherM.shape[::-1], onp.nan)
+        evals[~isNan], evecs[~isNan] = onp.linalg.eigh(FisherM[:, :, ~isNan].astype('float64').transpose(2,0,1))
+    elif (n_workers>1) or (executor is not None):
+        res = _map_events(_eigh_mpmath, FisherM, n_workers=n_workers, executor=executor, verbose=False)
+        evals = onp.concatenate([r[0] for r in res], axis=0)
+        evecs = onp.concatenate([r[1] for r in res], axis=0)
     else:
-        evals = onp.zeros(FisherM.shape[1:][::-1])
-        evecs = onp.zeros(FisherM.shape[::-1])
-        for k in range(FisherM.shape[-1]):
-            
-            if onp.all(onp.isnan(FisherM[:, :, k])):
-                if verbose:
-                    print('Fisher is nan at position %s. ' %k)
-                evals[k, :]=onp.full( FisherM.shape[0] , onp.nan)
-                evecs[k, :, :]=onp.full( FisherM[:, :, k].shape , onp.nan)
-            else:
-                try:
-                    aam = mpmath.matrix(FisherM[:,:,k].astype(typeuse))
-                    E, ER = mpmath.eigh(aam)
-                    evals[k, :] = onp.array(E, dtype=typeuse)
-                    evecs[k, :, :] = onp.array(ER.tolist(), dtype=typeuse)
-                except Exception as e:
-                    print(e)
-                    print('Trying with scipy')
-                    try:
-                        evals[k, :], evecs[k, :, :] = scipy.linalg.eigh(FisherM[:,:,k])
-                    except Exception as e:
-                        print(e)
-                        print('Event is number %s' %k)
-                        evals[k, :], evecs[k, :, :] = onp.full(FisherM.shape[0], onp.nan, ), onp.full((FisherM.shape[0], FisherM.shape[0]), onp.nan, )
-                        #condNumber = None
-                        print(FisherM[:,:,k])
-                    
-                
+        evals, evecs = _eigh_mpmath(FisherM, verbose=verbose)
+    
+    condNumber = _condition_numbers(evals, condNumbMax=condNumbMax, verbose=verbose)
+    
+    return evals, evecs, condNumber
+
+
+def _condition_numbers(evals, condNumbMax=1.0e15, verbose=False):
+    """
+    Compute the condition numbers from the eigenvalues of the Fisher matrix(ces), warning about negative eigenvalues and, if ``verbose`` is ``True``, about large condition numbers, as in :py:class:`gwfast.fisherTools.CheckFisher`.
+    
+    :param array evals: Eigenvalues of the Fisher matrix(ces), of shape :math:`(N_{\\rm events}`, :math:`N_{\\rm parameters})`.
+    :param float condNumbMax: Maximum allowed condition number, depending on the machine precision.
+    :param bool, optional verbose: Boolean specifying if the code has to print additional details during execution.
+    
+    :return: Condition number(s).
+    :rtype: 1-D array
+    
+    """
     if onp.any(evals <= 0.):
         print('WARNING: one or more eigenvalues are negative at position(s) %s' %str( onp.unique(onp.where(evals<0)[0]) ))
     
@@ -282,7 +443,113 @@ def CheckFisher(FisherM, condNumbMax=1.0e15, use_mpmath=True, verbose=False):
     elif verbose:
                     print('Condition number= %s . Ok. '%condNumber)
     
-    return evals, evecs, condNumber
+    return condNumber
+
+
+def AnalyseFisher(FisherMatrix, 
+                  invMethodIn='cho', 
+                  condNumbMax=1e50, 
+                  truncate=False, svals_thresh=1e-15,  
+                  verbose=False,
+                  alt_method = 'svd',
+                  condNumbCheck=1.0e15,
+                  fastPath=False, condFastMax=1e10, epsFastMax=1e-6, 
+                  return_stats=False,
+                  n_workers=1, executor=None
+                  ):
+    """
+    Perform the checks of :py:class:`gwfast.fisherTools.CheckFisher` and the inversion of :py:class:`gwfast.fisherTools.CovMatr` on the Fisher matrix(ces) at once, computing a single eigendecomposition with the `mpmath library <https://mpmath.org>`_ per event instead of the three of the two separate calls.
+    
+    The eigenvalues computed with the `mpmath library <https://mpmath.org>`_ to check the conditioning before the inversion are used also for the condition numbers, see the ``return_eigh`` argument of :py:class:`gwfast.fisherTools.CovMatr`. For the events for which this fails, the eigendecomposition is computed as in :py:class:`gwfast.fisherTools.CheckFisher`. With ``fastPath=True``, the eigendecomposition of the events inverted in double precision is computed with ``numpy`` and only the remaining ones go through the `mpmath library <https://mpmath.org>`_.
+    
+    :param array FisherMatrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param str invMethodIn: Inversion method to use, as in :py:class:`gwfast.fisherTools.CovMatr`.
+    :param float condNumbMax: Maximum allowed condition number, above which the inverse matrix is not computed, as in :py:class:`gwfast.fisherTools.CovMatr`.
+    :param bool, optional truncate: As in :py:class:`gwfast.fisherTools.CovMatr`.
+    :param float svals_thresh: As in :py:class:`gwfast.fisherTools.CovMatr`.
+    :param bool, optional verbose: Boolean specifying if the code has to print additional details during execution.
+    :param str alt_method: Inversion method to use in case the inverison with ``invMethodIn`` fails, as in :py:class:`gwfast.fisherTools.CovMatr`.
+    :param float condNumbCheck: Condition number above which a warning is printed if ``verbose`` is ``True``, as the ``condNumbMax`` argument of :py:class:`gwfast.fisherTools.CheckFisher`.
+    :param bool, optional fastPath: As in :py:class:`gwfast.fisherTools.CovMatr`.
+    :param float, optional condFastMax: As in :py:class:`gwfast.fisherTools.CovMatr`.
+    :param float, optional epsFastMax: As in :py:class:`gwfast.fisherTools.CovMatr`.
+    :param bool, optional return_stats: As in :py:class:`gwfast.fisherTools.CovMatr`, in which case the dictionary is returned last.
+    :param int, optional n_workers: As in :py:class:`gwfast.fisherTools.CovMatr`.
+    :param concurrent.futures.Executor, optional executor: As in :py:class:`gwfast.fisherTools.CovMatr`.
+    
+    :return: Eigenvalues, eigenvectors and condition number(s), as in :py:class:`gwfast.fisherTools.CheckFisher`, covariance matrix(ces) and inversion error(s), as in :py:class:`gwfast.fisherTools.CovMatr`.
+    :rtype: tuple(array, array, array, array, array)
+    
+    """
+    nParams, nEvents = FisherMatrix.shape[0], FisherMatrix.shape[-1]
+    
+    if fastPath and (invMethodIn in ['inv', 'cho', 'lu']):
+        CovM, eps, stats = _CovMatr_fast(FisherMatrix, condFastMax=condFastMax, epsFastMax=epsFastMax)
+        isSlow = ~stats.pop('is_fast')
+        evals = onp.full((nEvents, nParams), onp.nan)
+        evecs = onp.full((nEvents, nParams, nParams), onp.nan)
+        if (~isSlow).any():
+            evals[~isSlow], evecs[~isSlow] = onp.linalg.eigh(FisherMatrix[:, :, ~isSlow].astype('float64').transpose(2,0,1))
+    else:
+        isSlow = onp.full(nEvents, True)
+        CovM, eps = onp.zeros(FisherMatrix.shape, dtype=typeuse), onp.zeros(nEvents, dtype=typeuse)
+        evals, evecs = onp.zeros((nEvents, nParams)), onp.zeros((nEvents, nParams, nParams))
+        stats = {'fast':0, 'mpmath':nEvents, 'nan':0, 'not_pos_def':0, 'ill_conditioned':0, 'residual':0}
+    
+    if isSlow.any():
+        CovM[:, :, isSlow], eps[isSlow], evals[isSlow], evecs[isSlow] = CovMatr(FisherMatrix[:, :, isSlow], invMethodIn=invMethodIn, condNumbMax=condNumbMax, truncate=truncate, svals_thresh=svals_thresh, verbose=verbose, alt_method=alt_method, n_workers=n_workers, executor=executor, return_eigh=True)
+    
+    # Events for which the decomposition failed in the inversion, but whose Fisher is not nan
+    isFailed = onp.isnan(evals).any(axis=1) & ~onp.all(onp.isnan(FisherMatrix), axis=(0,1))
+    if isFailed.any():
+        evals[isFailed], evecs[isFailed] = _eigh_mpmath(FisherMatrix[:, :, isFailed], verbose=verbose)
+    
+    condNumber = _condition_numbers(evals, condNumbMax=condNumbCheck, verbose=verbose)
+    
+    if return_stats:
+        return evals, evecs, condNumber, CovM, eps, stats
+    return evals, evecs, condNumber, CovM, eps
+
+
+def _eigh_mpmath(FisherM, verbose=False):
+    """
+    Compute the eigenvalues and eigenvectors of the Fisher matrix(ces) one event at a time using the `mpmath library <https://mpmath.org>`_, resorting to ``scipy`` if this fails, as in :py:class:`gwfast.fisherTools.CheckFisher`.
+    
+    :param array FisherM: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param bool, optional verbose: Boolean specifying if the code has to print additional details during execution.
+    
+    :return: Eigenvalues, of shape :math:`(N_{\\rm events}`, :math:`N_{\\rm parameters})`, and eigenvectors, of shape :math:`(N_{\\rm events}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm parameters})`. They are ``nan`` for the events with a ``nan`` Fisher matrix or for which both decompositions fail.
+    :rtype: tuple(array, array)
+    
+    """
+    evals = onp.zeros(FisherM.shape[1:][::-1])
+    evecs = onp.zeros(FisherM.shape[::-1])
+    for k in range(FisherM.shape[-1]):
+        
+        if onp.all(onp.isnan(FisherM[:, :, k])):
+            if verbose:
+                print('Fisher is nan at position %s. ' %k)
+            evals[k, :]=onp.full( FisherM.shape[0] , onp.nan)
+            evecs[k, :, :]=onp.full( FisherM[:, :, k].shape , onp.nan)
+        else:
+            try:
+                aam = mpmath.matrix(FisherM[:,:,k].astype(typeuse))
+                E, ER = mpmath.eigh(aam)
+                evals[k, :] = onp.array(E.tolist(), dtype=typeuse)[:, 0]
+                evecs[k, :, :] = onp.array(ER.tolist(), dtype=typeuse)
+            except Exception as e:
+                print(e)
+                print('Trying with scipy')
+                try:
+                    evals[k, :], evecs[k, :, :] = scipy.linalg.eigh(FisherM[:,:,k])
+                except Exception as e:
+                    print(e)
+                    print('Event is number %s' %k)
+                    evals[k, :], evecs[k, :, :] = onp.full(FisherM.shape[0], onp.nan, ), onp.full((FisherM.shape[0], FisherM.shape[0]), onp.nan, )
+                    #condNumber = None
+                    print(FisherM[:,:,k])
+    
+    return evals, evecs
 
 
 def perturb_Fisher(totF, eps=1e-10, **kwargs):
@@ -347,7 +614,7 @@ def fixParams(MatrIn, ParNums_inp, ParMarg):
     """
     Fix one or multiple parameters to their fiducial values in the Fisher matrix.
     
-    :param array MatrIn: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param array MatrIn: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
     :param dict(int) ParNums_inp: Dictionary specifying the position of each parameter in the input Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
     :param list(str) ParMarg: List of the names of parameters to fix.
     
@@ -359,15 +626,10 @@ def fixParams(MatrIn, ParNums_inp, ParMarg):
     ParNums = copy.deepcopy(ParNums_inp)
     
     IdxMarg = onp.sort(onp.array([ParNums[par] for par in ParMarg]))
-    newdim = MatrIn.shape[0]-len(IdxMarg)
+    IdxKeep = onp.setdiff1d(onp.arange(MatrIn.shape[0]), IdxMarg)
     
-    NewMatr = onp.full( (newdim, newdim, MatrIn.shape[-1]), onp.NaN )
-    
-    for k in range(MatrIn.shape[-1]):
-    
-        Matr = onp.delete(MatrIn[:, :, k], IdxMarg, 0)
-        Matr = onp.delete(Matr[:, :], IdxMarg, 1)
-        NewMatr[:, :, k] = Matr
+    # Select the rows and columns to keep for all the events at once
+    NewMatr = onp.asarray(MatrIn)[onp.ix_(IdxKeep, IdxKeep)]
         
     # Given that we deleted some rows and columns, 
     # the meaning of the numbers of the remaining ones changes
@@ -394,7 +656,7 @@ def addPrior(Matr, vals, ParNums, ParAdd):
     :rtype: 3-D array
     
     """
-    IdxAdd = onp.sort(onp.array([ParNums[par] for par in ParAdd]))
+    IdxAdd = onp.array([ParNums[par] for par in ParAdd])
     
     pp = onp.zeros((Matr.shape[0], Matr.shape[1]))
     
@@ -409,6 +671,135 @@ def addPrior(Matr, vals, ParNums, ParAdd):
         return pp[:,:,onp.newaxis]+Matr
 
 
+def _normalised_residual(FisherM, Cov):
+    """
+    Compute the residual of the inversion of the Fisher matrix(ces) normalised by their diagonal, :math:`\\max|C\\,F - I|`, which does not depend on the units of the parameters, as in :py:class:`gwfast.fisherTools._CovMatr_fast`.
+    
+    :param array FisherM: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param array Cov: Array containing the covariance matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    
+    :return: Residual(s), ``nan`` for the matrices with ``nan`` entries or non-positive diagonal elements.
+    :rtype: 1-D array
+    
+    """
+    FisherM, Cov = onp.moveaxis(FisherM, -1, 0).astype(typeuse), onp.moveaxis(Cov, -1, 0).astype(typeuse)
+    diag = onp.diagonal(FisherM, axis1=1, axis2=2)
+    with onp.errstate(divide='ignore', invalid='ignore'):
+        ws = onp.where(diag>0., 1./onp.sqrt(onp.abs(diag)), onp.nan)
+        residual = onp.abs(onp.matmul(Cov/(ws[:,:,onp.newaxis]*ws[:,onp.newaxis,:]), FisherM*ws[:,:,onp.newaxis]*ws[:,onp.newaxis,:]) - onp.eye(FisherM.shape[-1])).max(axis=(1,2))
+    return onp.where(onp.isfinite(residual), residual, onp.nan)
+
+
+def _check_update(FisherNew, CovNew, epsMax, return_stats, **kwargs):
+    """
+    Check the residual of covariance matrix(ces) obtained through a low-rank update, inverting again the Fisher matrix(ces) with :py:class:`gwfast.fisherTools.CovMatr` for the events for which it is not below ``epsMax``.
+    
+    :param array FisherNew: Array containing the updated Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param array CovNew: Array containing the updated covariance matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param float epsMax: Maximum residual of the inversion of the normalised matrices, see :py:class:`gwfast.fisherTools._normalised_residual`.
+    :param bool return_stats: Boolean specifying if the number of events updated and inverted again has to be returned.
+    :param kwargs: Keyword arguments passed to :py:class:`gwfast.fisherTools.CovMatr`.
+    
+    :return: Covariance matrix(ces) and inversion error(s), and, if ``return_stats`` is ``True``, a dictionary with the number of events updated (``'updated'``) and inverted again (``'inverted'``).
+    :rtype: tuple(array, array) or tuple(array, array, dict)
+    
+    """
+    CovNew = CovNew.astype(typeuse)
+    residual = _normalised_residual(FisherNew, CovNew)
+    isBad = ~(residual<epsMax)
+    if isBad.any():
+        CovNew[:, :, isBad], _ = CovMatr(FisherNew[:, :, isBad], **kwargs)
+    eps = compute_inversion_error(FisherNew, CovNew)
+    
+    if return_stats:
+        return CovNew, eps, {'updated':(~isBad).sum(), 'inverted':isBad.sum()}
+    return CovNew, eps
+
+
+def CovMatr_addPrior(FisherMatrix, Cov, vals, ParNums, ParAdd, epsMax=1e-6, return_stats=False, **kwargs):
+    """
+    Update the covariance matrix(ces) after adding Gaussian priors to the Fisher matrix(ces) on one or multiple parameters, as in :py:class:`gwfast.fisherTools.addPrior`, without inverting them again.
+    
+    Adding the priors :math:`D = {\\rm diag}(v_1, \\dots, v_k)` on :math:`k` parameters, selected by the :math:`N_{\\rm parameters}\\times k` matrix :math:`U`, is a rank-:math:`k` update of the Fisher matrix, and the covariance is updated through the Woodbury identity
+    
+    .. math:: (\\Gamma + U D U^T)^{-1} = \\Sigma - \\Sigma U (D^{-1} + U^T \\Sigma U)^{-1} U^T \\Sigma,
+    
+    which only requires the inversion of a :math:`k\\times k` matrix, for all the events at once. The residual of the inversion of the updated matrices, normalised by their diagonal, is then checked, and the events for which it is not below ``epsMax`` (e.g. since the original covariance was not accurate enough) are inverted again with :py:class:`gwfast.fisherTools.CovMatr`.
+    
+    :param array FisherMatrix: Array containing the Fisher matrix(ces) without the priors, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param array Cov: Array containing the corresponding covariance matrix(ces), of the same shape.
+    :param list(float) vals: List of values to be added on the diagonal of the Fisher matrix.
+    :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
+    :param list(str) ParAdd: List of the names of parameters on which the prior should be added.
+    :param float, optional epsMax: Maximum residual of the inversion of the updated matrices normalised by their diagonal, :math:`\\max|C\\,F - I|`, for the update to be accepted.
+    :param bool, optional return_stats: Boolean specifying if the number of events updated and inverted again has to be returned as a dictionary, with keys ``'updated'`` and ``'inverted'``.
+    :param kwargs: Keyword arguments passed to :py:class:`gwfast.fisherTools.CovMatr` for the events inverted again.
+    
+    :return: Covariance matrix(ces) with the priors, and inversion error(s) with respect to the Fisher matrix(ces) with the priors, as in :py:class:`gwfast.fisherTools.CovMatr`.
+    :rtype: tuple(array, array)
+    
+    """
+    FisherNew = addPrior(FisherMatrix, vals, ParNums, ParAdd)
+    
+    IdxAdd = onp.array([ParNums[par] for par in ParAdd])
+    vals = onp.broadcast_to(onp.asarray(vals, dtype='float64'), IdxAdd.shape)
+    IdxAdd, vals = IdxAdd[vals!=0.], vals[vals!=0.]
+    
+    C = onp.moveaxis(onp.asarray(Cov, dtype='float64'), -1, 0)
+    if len(IdxAdd)>0:
+        CU = C[:, :, IdxAdd]
+        try:
+            CovNew = C - onp.matmul(CU, onp.linalg.solve(onp.diag(1./vals) + CU[:, IdxAdd, :], CU.transpose(0,2,1)))
+            CovNew = 0.5*(CovNew + CovNew.transpose(0,2,1))
+        except onp.linalg.LinAlgError:
+            # Singular for some event: all the events are inverted again
+            CovNew = onp.full(C.shape, onp.nan)
+    else:
+        CovNew = C
+    
+    return _check_update(FisherNew, onp.moveaxis(CovNew, 0, -1), epsMax, return_stats, **kwargs)
+
+
+def CovMatr_fixParams(FisherMatrix, Cov, ParNums_inp, ParMarg, epsMax=1e-6, return_stats=False, **kwargs):
+    """
+    Compute the covariance matrix(ces) after fixing one or multiple parameters to their fiducial values in the Fisher matrix(ces), as in :py:class:`gwfast.fisherTools.fixParams`, without inverting them again.
+    
+    Removing the rows and columns of the parameters :math:`m` from the Fisher matrix, the covariance of the remaining parameters :math:`r` is the Schur complement
+    
+    .. math:: (\\Gamma_{rr})^{-1} = \\Sigma_{rr} - \\Sigma_{rm} (\\Sigma_{mm})^{-1} \\Sigma_{mr},
+    
+    which only requires the inversion of a :math:`k\\times k` matrix, with :math:`k` the number of parameters fixed, for all the events at once. The residual is then checked as in :py:class:`gwfast.fisherTools.CovMatr_addPrior`, inverting again the events for which the update is not accurate.
+    
+    :param array FisherMatrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+    :param array Cov: Array containing the corresponding covariance matrix(ces), of the same shape.
+    :param dict(int) ParNums_inp: Dictionary specifying the position of each parameter in the input Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
+    :param list(str) ParMarg: List of the names of parameters to fix.
+    :param float, optional epsMax: Maximum residual of the inversion of the updated matrices normalised by their diagonal, :math:`\\max|C\\,F - I|`, for the update to be accepted.
+    :param bool, optional return_stats: Boolean specifying if the number of events updated and inverted again has to be returned as a dictionary, with keys ``'updated'`` and ``'inverted'``.
+    :param kwargs: Keyword arguments passed to :py:class:`gwfast.fisherTools.CovMatr` for the events inverted again.
+    
+    :return: Covariance matrix(ces) with the parameters fixed, of shape :math:`(\\tilde{N}_{\\rm parameters}`, :math:`\\tilde{N}_{\\rm parameters}`, :math:`N_{\\rm events})`, inversion error(s) with respect to the Fisher matrix(ces) with the parameters fixed, and dictionary specifying the position of each parameter in the new matrices, as in :py:class:`gwfast.fisherTools.fixParams`.
+    :rtype: tuple(array, array, dict(int))
+    
+    """
+    FisherNew, ParNums = fixParams(FisherMatrix, ParNums_inp, ParMarg)
+    
+    IdxMarg = onp.sort(onp.array([ParNums_inp[par] for par in ParMarg]))
+    IdxKeep = onp.setdiff1d(onp.arange(FisherMatrix.shape[0]), IdxMarg)
+    
+    C = onp.moveaxis(onp.asarray(Cov, dtype='float64'), -1, 0)
+    Crm = C[:, IdxKeep][:, :, IdxMarg]
+    try:
+        CovNew = C[:, IdxKeep][:, :, IdxKeep] - onp.matmul(Crm, onp.linalg.solve(C[:, IdxMarg][:, :, IdxMarg], Crm.transpose(0,2,1)))
+        CovNew = 0.5*(CovNew + CovNew.transpose(0,2,1))
+    except onp.linalg.LinAlgError:
+        CovNew = onp.full((C.shape[0], len(IdxKeep), len(IdxKeep)), onp.nan)
+    
+    res = _check_update(FisherNew, onp.moveaxis(CovNew, 0, -1), epsMax, return_stats, **kwargs)
+    
+    return res[:2] + (ParNums,) + res[2:]
+
+
 ##############################################################################
 # DERIVATIVES AND JACOBIANS
 ##############################################################################
@@ -417,24 +808,22 @@ def log_dL_to_dL_derivative_cov(or_matrix, ParNums, evParams):
     """
     Change variables in the covariance matrix from :math:`{\\rm log}(d_L)` to :math:`d_L`.
     
-    :param array or_matrix: Array containing the covariance matrix, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
+    :param array or_matrix: Array containing the covariance matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
     :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
     :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
     
-    :return: Covariance matrix in :math:`d_L`, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
-    :rtype: 2-D array
+    :return: Covariance matrix in :math:`d_L`, of the same shape as ``or_matrix``.
+    :rtype: array
     
     """
     matrix = copy.deepcopy(or_matrix)
-    #for i in range(matrix.shape[-1]):
-        # This has to be vectorised
     try:
-            matrix = matrix.at[:, ParNums['dL'], : ].set(matrix[:, ParNums['dL'], :]* evParams['dL'])
-            matrix = matrix.at[ ParNums['dL'], : , : ].set(matrix[ParNums['dL'], :, :]* evParams['dL'])
+            matrix = matrix.at[:, ParNums['dL']].set(matrix[:, ParNums['dL']]* evParams['dL'])
+            matrix = matrix.at[ ParNums['dL']].set(matrix[ParNums['dL']]* evParams['dL'])
     except AttributeError:
             matrix = matrix.astype(typeuse)
-            matrix[:, ParNums['dL'], :] *= evParams['dL'].astype(typeuse)
-            matrix[ ParNums['dL'], :, :] *= evParams['dL'].astype(typeuse)
+            matrix[:, ParNums['dL']] *= onp.asarray(evParams['dL']).astype(typeuse)
+            matrix[ ParNums['dL']] *= onp.asarray(evParams['dL']).astype(typeuse)
     return matrix
 
 
@@ -442,24 +831,22 @@ def log_dL_to_dL_derivative_fish(or_matrix, ParNums, evParams):
     """
     Change variables in the Fisher matrix from :math:`{\\rm log}(d_L)` to :math:`d_L`.
     
-    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
+    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
     :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
     :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
     
-    :return: Fisher matrix in :math:`d_L`, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
-    :rtype: 2-D array
+    :return: Fisher matrix in :math:`d_L`, of the same shape as ``or_matrix``.
+    :rtype: array
     
     """
     matrix = copy.deepcopy(or_matrix)
-    #for i in range(matrix.shape[-1]):
-        # This has to be vectorised
     try:
-            matrix = matrix.at[:, ParNums['dL'], : ].set(matrix[:, ParNums['dL'], :]/ evParams['dL'])
-            matrix = matrix.at[ ParNums['dL'], : , : ].set(matrix[ ParNums['dL'], :, :]/ evParams['dL'])
+            matrix = matrix.at[:, ParNums['dL']].set(matrix[:, ParNums['dL']]/ evParams['dL'])
+            matrix = matrix.at[ ParNums['dL']].set(matrix[ ParNums['dL']]/ evParams['dL'])
     except AttributeError:
             matrix = matrix.astype(typeuse)
-            matrix[:, ParNums['dL'], :] /= evParams['dL'].astype(typeuse)
-            matrix[ ParNums['dL'], :, :] /= evParams['dL'].astype(typeuse)
+            matrix[:, ParNums['dL']] /= onp.asarray(evParams['dL']).astype(typeuse)
+            matrix[ ParNums['dL']] /= onp.asarray(evParams['dL']).astype(typeuse)
     return matrix
     
     
@@ -619,101 +1006,106 @@ def Mceta_from_m1m2(m1, m2):
     :rtype: tuple(array, array) or tuple(float, float)
     
     """
-    Mc = (m1*m2)**3/5/(m1+m2)**1/5
+    Mc = (m1*m2)**(3./5.)/(m1+m2)**(1./5.)
     eta = (m1*m2)/(m1+m2)**2
     return Mc, eta
 
-def m1m2_to_Mceta_fish(or_matrix, ParNums, evParams):
+def _change_variables(or_matrix, idxs, J, isFisher=True):
     """
-    Change variables in the Fisher matrix from :math:`m_1` and :math:`m_2` to :math:`{\cal M}_c` and :math:`\eta`.
+    Change variables in the Fisher or covariance matrix(ces), for all the events at once.
     
-    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
-    :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
-    :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+    The rows and columns of the parameters in ``idxs`` are transformed with the Jacobian ``J``, while the other parameters are left unchanged. For a Fisher matrix, ``J`` contains the derivatives of the old parameters with respect to the new ones, :math:`J_{ij} = \\partial\\theta_i^{\\rm old}/\\partial\\theta_j^{\\rm new}`, and the new matrix is :math:`J^T\\,\\Gamma\\,J`. For a covariance matrix, ``J`` contains the derivatives of the new parameters with respect to the old ones, and the new matrix is :math:`J\\,\\Sigma\\,J^T`.
     
-    :return: Fisher matrix in :math:`{\cal M}_c` and :math:`\eta`, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
-    :rtype: 2-D array
+    :param array or_matrix: Array containing the matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
+    :param list(int) idxs: Positions of the parameters to transform.
+    :param array J: Jacobian matrix(ces), of shape :math:`(N_{\\rm transformed}`, :math:`N_{\\rm transformed}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm transformed}`, :math:`N_{\\rm transformed})`.
+    :param bool, optional isFisher: Boolean specifying if ``or_matrix`` is a Fisher (``True``) or a covariance (``False``) matrix.
     
-    """
-    nparams=len(list(ParNums.keys()))
+    :return: Transformed matrix(ces), of the same shape as ``or_matrix``.
+    :rtype: array
     
-    rotMatrix = onp.identity(nparams)
+    """
+    matrix = onp.asarray(or_matrix)
+    J = onp.asarray(J)
+    is2D = (matrix.ndim==2) and (J.ndim==2)
+    if matrix.ndim==2:
+        matrix = matrix[:, :, onp.newaxis]
+    if J.ndim==2:
+        J = J[:, :, onp.newaxis]
+    nEvents = max(matrix.shape[-1], J.shape[-1])
     
-    rotMatrix[onp.ix_([ParNums['Mc'],ParNums['eta']],[ParNums['Mc'],ParNums['eta']])] = J_m1m2_Mceta(evParams['Mc'], evParams['eta'])
+    rotMatrix = onp.repeat(onp.identity(matrix.shape[0], dtype=onp.result_type(matrix, J))[:, :, onp.newaxis], nEvents, axis=-1)
+    rotMatrix[onp.ix_(idxs, idxs)] = J
     
-    matrix = rotMatrix@or_matrix@rotMatrix
+    # Stacks of matrices along the first axis for matmul
+    rotMatrix, matrix = onp.moveaxis(rotMatrix, -1, 0), onp.moveaxis(matrix, -1, 0)
+    if isFisher:
+        matrix = onp.matmul(onp.matmul(rotMatrix.transpose(0,2,1), matrix), rotMatrix)
+    else:
+        matrix = onp.matmul(onp.matmul(rotMatrix, matrix), rotMatrix.transpose(0,2,1))
     
-    return matrix
+    return matrix[0] if is2D else onp.moveaxis(matrix, 0, -1)
 
 
-def m1m2_to_Mceta_cov(or_matrix, ParNums, evParams):
+def m1m2_to_Mceta_fish(or_matrix, ParNums, evParams):
     """
-    Change variables in the covariance matrix from :math:`m_1` and :math:`m_2` to :math:`{\cal M}_c` and :math:`\eta`.
+    Change variables in the Fisher matrix from :math:`m_1` and :math:`m_2` to :math:`{\cal M}_c` and :math:`\eta`.
     
-    :param array or_matrix: Array containing the covariance matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
+    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
     :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
     :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
     
-    :return: Covariance matrix in :math:`{\cal M}_c` and :math:`\eta`, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
-    :rtype: 2-D array
+    :return: Fisher matrix in :math:`{\cal M}_c` and :math:`\eta`, of the same shape as ``or_matrix``.
+    :rtype: array
     
     """
-    nparams=len(list(ParNums.keys()))
-    
-    rotMatrix = onp.identity(nparams)
+    return _change_variables(or_matrix, [ParNums['Mc'],ParNums['eta']], J_m1m2_Mceta(evParams['Mc'], evParams['eta']), isFisher=True)
+
+
+def m1m2_to_Mceta_cov(or_matrix, ParNums, evParams):
+    """
+    Change variables in the covariance matrix from :math:`m_1` and :math:`m_2` to :math:`{\cal M}_c` and :math:`\eta`.
     
-    rotMatrix[onp.ix_([ParNums['Mc'],ParNums['eta']],[ParNums['Mc'],ParNums['eta']])] = J_Mceta_m1m2(*m1m2_from_Mceta(evParams['Mc'], evParams['eta']))
+    :param array or_matrix: Array containing the covariance matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
+    :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
+    :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
     
-    matrix = rotMatrix@or_matrix@rotMatrix
+    :return: Covariance matrix in :math:`{\cal M}_c` and :math:`\eta`, of the same shape as ``or_matrix``.
+    :rtype: array
     
-    return matrix
+    """
+    return _change_variables(or_matrix, [ParNums['Mc'],ParNums['eta']], J_Mceta_m1m2(*m1m2_from_Mceta(evParams['Mc'], evParams['eta'])), isFisher=False)
 
 
 def Mceta_to_m1m2_fish(or_matrix, ParNums, evParams):
     """
     Change variables in the Fisher matrix from :math:`{\cal M}_c` and :math:`\eta` to :math:`m_1` and :math:`m_2`.
     
-    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
+    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
     :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
     :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
     
-    :return: Fisher matrix in :math:`m_1` and :math:`m_2`, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
-    :rtype: 2-D array
+    :return: Fisher matrix in :math:`m_1` and :math:`m_2`, of the same shape as ``or_matrix``.
+    :rtype: array
     
     """
-    nparams=or_matrix.shape[0] #len(list(ParNums.keys()))
-    
-    rotMatrix = onp.identity(nparams)
-    
     m1, m2 = m1m2_from_Mceta(evParams['Mc'], evParams['eta'])
     
-    rotMatrix[onp.ix_([ParNums['Mc'],ParNums['eta']],[ParNums['Mc'],ParNums['eta']])] = J_Mceta_m1m2(m1, m2)
-    
-    matrix = rotMatrix.T@or_matrix@rotMatrix
-    
-    return matrix
+    return _change_variables(or_matrix, [ParNums['Mc'],ParNums['eta']], J_Mceta_m1m2(m1, m2), isFisher=True)
 
 def Mceta_to_m1m2_cov(or_matrix, ParNums, evParams):
     """
     Change variables in the covariance matrix from :math:`{\cal M}_c` and :math:`\eta` to :math:`m_1` and :math:`m_2`.
     
-    :param array or_matrix: Array containing the covariance matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
+    :param array or_matrix: Array containing the covariance matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
     :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
     :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
     
-    :return: Covariance matrix in :math:`m_1` and :math:`m_2`, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
-    :rtype: 2-D array
+    :return: Covariance matrix in :math:`m_1` and :math:`m_2`, of the same shape as ``or_matrix``.
+    :rtype: array
     
     """
-    nparams=or_matrix.shape[0] #len(list(ParNums.keys()))
-    
-    rotMatrix = onp.identity(nparams)
-    
-    rotMatrix[onp.ix_([ParNums['Mc'],ParNums['eta']],[ParNums['Mc'],ParNums['eta']])] = J_m1m2_Mceta(evParams['Mc'], evParams['eta'])
-    
-    matrix = rotMatrix.T@or_matrix@rotMatrix
-    
-    return matrix
+    return _change_variables(or_matrix, [ParNums['Mc'],ParNums['eta']], J_m1m2_Mceta(evParams['Mc'], evParams['eta']), isFisher=False)
 
 def dchi1_dchieff(m1, m2):
     """
@@ -778,54 +1170,38 @@ def J_chi1chi2_chieffDeltachi(m1, m2):
     :rtype: 2-D array
     
     """
-    return onp.array( [[1., dchi1_dDelchi( m1, m2)],[1., dchi2_dDelchi(m1, m2)]] )
+    return onp.array( [[onp.ones_like(m1*1.), dchi1_dDelchi( m1, m2)],[onp.ones_like(m1*1.), dchi2_dDelchi(m1, m2)]] )
 
 def chi1chi2_to_chieffDeltachi_fish(or_matrix, ParNums, evParams):
     """
     Change variables in the Fisher matrix from :math:`\chi_{1,z}` and :math:`\chi_{2,z}` to :math:`\chi_{\\rm eff}` and :math:`\Delta\chi`.
     
-    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
+    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
     :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
     :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
     
-    :return: Fisher matrix in :math:`\chi_{\\rm eff}` and :math:`\Delta\chi`, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
-    :rtype: 2-D array
+    :return: Fisher matrix in :math:`\chi_{\\rm eff}` and :math:`\Delta\chi`, of the same shape as ``or_matrix``.
+    :rtype: array
     
     """
-    nparams=len(list(ParNums.keys()))
-    
-    rotMatrix = onp.identity(nparams)
-    
-    rotMatrix[onp.ix_([ParNums['chi1z'],ParNums['chi2z']],[ParNums['chi1z'],ParNums['chi2z']])] = J_chi1chi2_chieffDeltachi(*m1m2_from_Mceta(evParams['Mc'], evParams['eta']))
-    
-    matrix = rotMatrix.T@or_matrix@rotMatrix
-    
-    return matrix
+    return _change_variables(or_matrix, [ParNums['chi1z'],ParNums['chi2z']], J_chi1chi2_chieffDeltachi(*m1m2_from_Mceta(evParams['Mc'], evParams['eta'])), isFisher=True)
 
 
 def chiSchiA_to_chi1chi2_fish(or_matrix, ParNums, evParams):
     """
     Change variables in the Fisher matrix from :math:`\chi_s` and :math:`\chi_a` to :math:`\chi_{1,z}` and :math:`\chi_{2,z}`.
     
-    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
+    :param array or_matrix: Array containing the Fisher matrix(ces), of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})` or :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
     :param dict(int) ParNums: Dictionary specifying the position of each parameter in the Fisher matrix, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`.
     :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
     
-    :return: Fisher matrix in :math:`\chi_{1,z}` and :math:`\chi_{2,z}`, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters})`.
-    :rtype: 2-D array
+    :return: Fisher matrix in :math:`\chi_{1,z}` and :math:`\chi_{2,z}`, of the same shape as ``or_matrix``.
+    :rtype: array
     
     """
-    nparams=len(list(ParNums.keys()))
-    
-    rotMatrix = onp.identity(nparams)
-    
     J_chiSchiA_chi1chi2 = onp.array([[.5, .5], [.5, -0.5]])
     
-    rotMatrix[onp.ix_([ParNums['chiS'],ParNums['chiA']],[ParNums['chiS'],ParNums['chiA']])] = J_chiSchiA_chi1chi2
-    
-    matrix = rotMatrix@or_matrix@rotMatrix
-    
-    return matrix
+    return _change_variables(or_matrix, [ParNums['chiS'],ParNums['chiA']], J_chiSchiA_chi1chi2, isFisher=True)
 
 
 ##############################################################################
@@ -866,6 +1242,170 @@ def compute_localization_region(Cov, parNum, thFid, perc_level=90, units='SqDeg'
     
 
 
+##############################################################################
+# SUBNETWORKS
+##############################################################################
+
+def _group_detectors(keys):
+    """
+    Group the keys of the SNRs or FIMs of the individual detectors, as returned by :py:class:`gwfast.network.DetNet.FisherMatr` with ``return_all=True``, by detector: the three arms of a triangular detector ``name``, stored as ``name_0``, ``name_1`` and ``name_2``, are grouped under ``name``, and the network quantity ``'net'`` is excluded.
+    
+    :param list(str) keys: Keys of the SNRs or FIMs of the individual detectors.
+    
+    :return: Dictionary with the names of the detectors as keys, in the order in which they first appear in ``keys``, and the lists of the corresponding keys as values.
+    :rtype: dict(list(str))
+    
+    """
+    keys = [k for k in keys if k!='net']
+    groups = {}
+    for k in keys:
+        base, _, arm = k.rpartition('_')
+        if (arm in ['0', '1', '2']) and all((base+'_%s'%i) in keys for i in range(3)):
+            groups.setdefault(base, []).append(k)
+        else:
+            groups[k] = [k]
+    return groups
+
+
+def SubNetworks(allFishers, allSNRs=None, subnets=None, ParNums=None, theta=None, **kwargs):
+    """
+    Compute the SNRs, FIMs, covariance matrices and errors of subnetworks of a network of detectors, from the quantities of the individual detectors.
+    
+    The FIM of each subnetwork is obtained adding the one of a single detector to the one of a smaller subnetwork, computed and stored before, so that a single sum is performed for each subnetwork. The FIMs of all the subnetworks are then inverted at once with :py:class:`gwfast.fisherTools.CovMatr`, by default with ``fastPath=True``.
+    
+    :param dict(array, array, ...) allFishers: Dictionary containing the FIMs of the individual detectors, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`, as returned by :py:class:`gwfast.network.DetNet.FisherMatr` with ``return_all=True``, or stored by ``calculate_forecasts_from_catalog.py`` with ``--return_all 1``. The three arms of a triangular detector (``name_0``, ``name_1`` and ``name_2``) are considered as a single detector, ``name``, and the ``'net'`` entry is not used.
+    :param dict(array, array, ...), optional allSNRs: Dictionary containing the SNRs of the individual detectors, with the same keys and for the same events as ``allFishers``. Notice that ``calculate_forecasts_from_catalog.py`` stores the SNRs of all the events and the FIMs only of the detected ones, whose positions are stored in the files ``idxs_det``.
+    :param list(list(str)), optional subnets: List of the subnetworks to compute, each given as a list of names of detectors. If ``None``, all the :math:`2^{N_{\\rm det}}-1` subnetworks are computed.
+    :param dict(int), optional ParNums: Dictionary specifying the position of each parameter in the FIMs, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`. If provided together with ``theta``, the 90% localisation regions are also computed, with :py:class:`gwfast.fisherTools.compute_localization_region`.
+    :param array, optional theta: Array containing the :math:`\\theta` sky position angle(s) of the event(s), in :math:`\\rm rad`.
+    :param kwargs: Keyword arguments passed to :py:class:`gwfast.fisherTools.CovMatr`.
+    
+    :return: Dictionary with the names of the detectors of each subnetwork joined by ``'+'`` as keys, and as values dictionaries containing the FIMs (``'fisher'``), covariance matrices (``'cov'``), inversion errors (``'eps'``), errors on the parameters (``'errors'``, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm events})`), and, if computed, the SNRs (``'snr'``) and 90% localisation regions in :math:`\\rm deg^2` (``'sky_area'``).
+    :rtype: dict(dict(array, array, ...), ...)
+    
+    """
+    groups = _group_detectors(allFishers.keys())
+    dets = list(groups.keys())
+    
+    if subnets is None:
+        subnets = [sub for n in range(1, len(dets)+1) for sub in itertools.combinations(dets, n)]
+    else:
+        for sub in subnets:
+            if (len(sub)==0) or any(d not in dets for d in sub):
+                raise ValueError('Subnetwork %s not valid, the available detectors are %s.' %(str(sub), str(dets)))
+        # Sort the detectors in the order of allFishers, so that the partial sums are shared
+        subnets = [tuple(d for d in dets if d in sub) for sub in subnets]
+    
+    detF = {d: sum(onp.asarray(allFishers[k]) for k in groups[d]) for d in dets}
+    if allSNRs is not None:
+        detSNRsq = {d: sum(onp.asarray(allSNRs[k])**2 for k in groups[d]) for d in dets}
+    
+    # Partial sums, indexed by the ordered tuple of detectors
+    cacheF, cacheSNRsq = {}, {}
+    def subSum(sub, cache, detQ):
+        if sub not in cache:
+            cache[sub] = detQ[sub[0]] if len(sub)==1 else subSum(sub[:-1], cache, detQ) + detQ[sub[-1]]
+        return cache[sub]
+    
+    allF = onp.concatenate([subSum(sub, cacheF, detF) for sub in subnets], axis=-1)
+    invKwargs = {'fastPath':True}
+    invKwargs.update(kwargs)
+    allCov, allEps = CovMatr(allF, **invKwargs)
+    
+    nEvents = allFishers[groups[dets[0]][0]].shape[-1]
+    res = {}
+    for i, sub in enumerate(subnets):
+        sl = slice(i*nEvents, (i+1)*nEvents)
+        res_ = {'fisher':allF[:, :, sl], 'cov':allCov[:, :, sl], 'eps':allEps[sl]}
+        res_['errors'] = onp.sqrt(onp.diagonal(res_['cov'], axis1=0, axis2=1).T)
+        if allSNRs is not None:
+            res_['snr'] = onp.sqrt(subSum(sub, cacheSNRsq, detSNRsq))
+        if (ParNums is not None) and (theta is not None):
+            res_['sky_area'] = compute_localization_region(res_['cov'], ParNums, theta, perc_level=90, units='SqDeg')
+        res['+'.join(sub)] = res_
+    
+    return res
+
+
+def DutyCycleRealisations(allFishers, allSNRs, dutyFactor, nRealisations, snr_th=12., idxs_det=None, ParNums=None, theta=None, seed=None, **kwargs):
+    """
+    Compute the SNRs, detections, errors and localisations of a catalog for multiple realisations of the duty cycle of the detectors, from the SNRs and FIMs of the individual detectors.
+    
+    In each realisation, each detector (each arm for triangular detectors) is independently on with probability ``dutyFactor``, as in ``calculate_forecasts_from_catalog.py``, and the events with network SNR above ``snr_th`` are detected. The FIMs of the detected events are obtained summing the ones of the detectors that are on, and, since the same event in the same configuration of the detectors has the same FIM in all the realisations, each of them is computed and inverted only once. All the FIMs are then inverted at once with :py:class:`gwfast.fisherTools.CovMatr`, by default with ``fastPath=True``.
+    
+    The SNRs and FIMs have to be computed with all the detectors on, i.e. with duty factor 1, and the FIMs have to be available for all the events which can be detected, i.e. computed with a threshold not higher than ``snr_th``, since the SNRs can only decrease when some detectors are off.
+    
+    :param dict(array, array, ...) allFishers: Dictionary containing the FIMs of the individual detectors, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events\\, with\\, FIM})`, as returned by :py:class:`gwfast.network.DetNet.FisherMatr` with ``return_all=True``, or stored by ``calculate_forecasts_from_catalog.py`` with ``--return_all 1``. The ``'net'`` entry is not used.
+    :param dict(array, array, ...) allSNRs: Dictionary containing the SNRs of the individual detectors for all the events, of shape :math:`(N_{\\rm events})`, with the same keys as ``allFishers``.
+    :param float dutyFactor: Duty factor of the detectors (the same is used for all detectors in the network), in :math:`(0,\\, 1]`.
+    :param int nRealisations: Number of realisations of the duty cycle.
+    :param float snr_th: Threshold value for the network SNR to consider an event detected.
+    :param array, optional idxs_det: Positions in ``allSNRs`` of the events for which the FIMs are given, as stored in the files ``idxs_det`` by ``calculate_forecasts_from_catalog.py``. If ``None``, the SNRs and FIMs are assumed to refer to the same events.
+    :param dict(int), optional ParNums: Dictionary specifying the position of each parameter in the FIMs, as :py:class:`gwfast.waveforms.WaveFormModel.ParNums`. If provided together with ``theta``, the 90% localisation regions are also computed, with :py:class:`gwfast.fisherTools.compute_localization_region`.
+    :param array, optional theta: Array containing the :math:`\\theta` sky position angle(s) of the events for which the FIMs are given, in :math:`\\rm rad`.
+    :param int, optional seed: Seed for the random number generator, to help reproducibility. A dedicated generator is used, so the global state of ``numpy.random`` is not modified.
+    :param kwargs: Keyword arguments passed to :py:class:`gwfast.fisherTools.CovMatr`.
+    
+    :return: Dictionary containing the network SNRs (``'snr'``) and the detection flags (``'detected'``) of all the events in each realisation, of shape :math:`(N_{\\rm realisations}`, :math:`N_{\\rm events})`, the number of detected events in each realisation (``'n_det'``), the errors on the parameters (``'errors'``, of shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm realisations}`, :math:`N_{\\rm events\\, with\\, FIM})`), the inversion errors (``'eps'``), and, if computed, the 90% localisation regions in :math:`\\rm deg^2` (``'sky_area'``) of the events for which the FIMs are given in each realisation, of shape :math:`(N_{\\rm realisations}`, :math:`N_{\\rm events\\, with\\, FIM})`, set to ``nan`` if the event is not detected.
+    :rtype: dict(array, array, ...)
+    
+    """
+    if (dutyFactor<=0) or (dutyFactor>1):
+        raise ValueError('The duty factor has to be in (0, 1].')
+    
+    keys = [k for k in allFishers.keys() if k!='net']
+    if any(k not in allSNRs.keys() for k in keys):
+        raise ValueError('The SNRs have to be given for all the detectors for which the FIMs are given.')
+    
+    nDet = len(keys)
+    nEvents = len(onp.atleast_1d(allSNRs[keys[0]]))
+    if idxs_det is None:
+        idxs_det = onp.arange(nEvents)
+    idxs_det = onp.asarray(idxs_det).astype('int').ravel()
+    nEventsF = len(idxs_det)
+    
+    # Use a dedicated generator rather than the global one, which is left untouched
+    rng = onp.random.default_rng(seed)
+    # One independent realisation of the duty cycle for each detector, of shape (nDet, nRealisations, nEvents)
+    isOn = rng.random((nDet, nRealisations, nEvents)) < dutyFactor
+    
+    snrsSq = onp.array([onp.atleast_1d(allSNRs[k])**2 for k in keys])
+    netSNR = onp.sqrt((isOn*snrsSq[:,onp.newaxis,:]).sum(axis=0))
+    detected = netSNR>snr_th
+    
+    hasFisher = onp.full(nEvents, False)
+    hasFisher[idxs_det] = True
+    if (detected & ~hasFisher).any():
+        raise ValueError('Some events are detected in some realisations but their FIMs are not given. The FIMs have to be computed with duty factor 1 and a threshold not higher than snr_th.')
+    
+    # Label each detected event by the configuration of the detectors which are on, and keep only the distinct pairs
+    detF = detected[:, idxs_det]
+    configs = (isOn[:, :, idxs_det]*(2**onp.arange(nDet))[:,onp.newaxis,onp.newaxis]).sum(axis=0)
+    pairs, pairIdx = onp.unique((configs*nEventsF + onp.arange(nEventsF))[detF], return_inverse=True)
+    pairConfigs, pairEvents = pairs//nEventsF, pairs%nEventsF
+    
+    nPars = allFishers[keys[0]].shape[0]
+    allF = onp.zeros((nPars, nPars, len(pairs)))
+    for i, k in enumerate(keys):
+        sel = ((pairConfigs>>i) & 1).astype(bool)
+        allF[:, :, sel] += onp.asarray(allFishers[k])[:, :, pairEvents[sel]]
+    
+    invKwargs = {'fastPath':True}
+    invKwargs.update(kwargs)
+    allCov, allEps = CovMatr(allF, **invKwargs)
+    
+    res = {'snr':netSNR, 'detected':detected, 'n_det':detected.sum(axis=-1)}
+    res['errors'] = onp.full((nPars, nRealisations, nEventsF), onp.nan)
+    res['errors'][:, detF] = onp.sqrt(onp.diagonal(allCov, axis1=0, axis2=1).T.astype('float64'))[:, pairIdx]
+    res['eps'] = onp.full((nRealisations, nEventsF), onp.nan)
+    res['eps'][detF] = onp.asarray(allEps).astype('float64')[pairIdx]
+    if (ParNums is not None) and (theta is not None):
+        res['sky_area'] = onp.full((nRealisations, nEventsF), onp.nan)
+        res['sky_area'][detF] = compute_localization_region(allCov, ParNums, onp.asarray(theta)[pairEvents], perc_level=90, units='SqDeg').astype('float64')[pairIdx]
+    
+    return res
+
+
 ##############################################################################
 # PLOTTING TOOLS (ELLIPSES)
 ##############################################################################
@@ -12,6 +12,7 @@ import numpy as np
 import jax.numpy as jnp
 import json
 import h5py
+from functools import lru_cache
 
 from gwfast import gwfastGlobals as glob
 
@@ -52,6 +53,83 @@ def get_events_subset(evs, detected):
     """
     return get_event(evs, np.argwhere(detected))
 
+def bucket_size(n):
+    """
+    Compute the size of the bucket in which a batch of events is placed, i.e. the smallest power of 2 greater than or equal to the number of events. Padding the batches to these sizes, jit compiled functions are compiled only once per bucket rather than once per number of events.
+
+    :param int n: The number of events in the batch.
+    
+    :return: The size of the bucket.
+    :rtype: int
+
+    """
+    return int(2**np.ceil(np.log2(max(n, 1))))
+
+def pad_batch(arr, size):
+    """
+    Pad an array along its last axis (the events axis) up to a given size, repeating the last event. Using copies of a physical event, rather than e.g. zeros, ensures that the padded entries do not produce ``nan`` s, and they can be simply discarded from the results.
+
+    :param array arr: The array to pad. The last axis has to be the one of the events.
+    :param int size: The size of the last axis after the padding.
+    
+    :return: The padded array.
+    :rtype: array
+
+    """
+    arr = jnp.asarray(arr)
+    nPad = size - arr.shape[-1]
+    if nPad <= 0:
+        return arr
+    return jnp.concatenate((arr, jnp.repeat(arr[...,-1:], nPad, axis=-1)), axis=-1)
+
+def shard_size(n, nDevices):
+    """
+    Compute the smallest multiple of the number of devices greater than or equal to a given batch size, so that the events can be split evenly among the devices.
+
+    :param int n: The number of events in the batch.
+    :param int nDevices: The number of devices.
+    
+    :return: The size of the batch to use.
+    :rtype: int
+
+    """
+    return int(-(-n//nDevices)*nDevices)
+
+def shard_batch(arr, devices):
+    """
+    Distribute an array among multiple devices along its last axis (the events axis), so that the jit compiled functions acting on it are executed in parallel on the devices, each on a subset of the events. The size of the last axis has to be a multiple of the number of devices, see :py:class:`gwfast.gwfastUtils.shard_size`.
+    
+    On CPU, multiple host devices can be obtained setting the ``XLA_FLAGS`` environment variable to ``--xla_force_host_platform_device_count=N`` before ``JAX`` is initialised, as done when importing :py:mod:`gwfast.fisherTools`.
+
+    :param array arr: The array to distribute. The last axis has to be the one of the events.
+    :param list devices: The devices among which to distribute the array, e.g. ``jax.devices()``.
+    
+    :return: The distributed array.
+    :rtype: array
+
+    """
+    import jax
+    from jax.sharding import Mesh, NamedSharding, PartitionSpec
+    
+    arr = jnp.asarray(arr)
+    spec = PartitionSpec(*([None]*(arr.ndim-1)+['events']))
+    return jax.device_put(arr, NamedSharding(Mesh(np.array(devices), ('events',)), spec))
+
+
+@lru_cache(maxsize=None)
+def gauss_legendre(n):
+    """
+    Compute the nodes and weights of the Gauss–Legendre quadrature rule of order n on the interval :math:`[-1, 1]`. The result is cached, since computing it scales as the cube of the order.
+
+    :param int n: The order of the rule.
+    
+    :return: The nodes and the weights of the rule.
+    :rtype: tuple(1-D array, 1-D array)
+
+    """
+    x, w = np.polynomial.legendre.leggauss(n)
+    x.flags.writeable, w.flags.writeable = False, False
+    return x, w
 
 def save_detectors(fname, detectors):
     """
@@ -1217,3 +1295,48 @@ class suppress_stdout_stderr(object):
         # Close all file descriptors
         for fd in self.null_fds + self.save_fds:
             os.close(fd)
+
+##############################################################################
+# JAX COMPILATION CACHE
+##############################################################################
+
+# Number of compilations which went through the persistent cache, and number of them found in the cache, in the current process
+_compilation_cache_stats = {'requests':0, 'hits':0}
+_compilation_cache_listener = False
+
+def _record_compilation_cache_event(event, **kwargs):
+    if event == '/jax/compilation_cache/compile_requests_use_cache':
+        _compilation_cache_stats['requests'] += 1
+    elif event == '/jax/compilation_cache/cache_hits':
+        _compilation_cache_stats['hits'] += 1
+
+def init_compilation_cache(cache_dir, min_compile_time_secs=1.):
+    """
+    Enable the persistent ``JAX`` compilation cache, storing the compiled functions in a directory on disk, so that they can be reused by subsequent runs and by other processes (e.g. parallel workers on the same node) instead of being compiled again.
+    
+    The entries of the cache are keyed by ``JAX`` on the compiled computation, which includes the waveform model, the detector, the flags and the shapes of the inputs, so that a single directory can be used for different configurations. This has to be called before the first compilation in the process, and the path cannot be changed afterwards. Depending on the ``JAX`` version, the cache may not be available on CPU.
+    
+    :param str cache_dir: Path to the directory of the cache. It is created if not existing.
+    :param float min_compile_time_secs: Minimum compilation time, in seconds, for a function to be stored in the cache.
+    
+    """
+    global _compilation_cache_listener
+    import jax
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    config.update('jax_compilation_cache_dir', cache_dir)
+    config.update('jax_persistent_cache_min_compile_time_secs', min_compile_time_secs)
+    
+    if not _compilation_cache_listener:
+        jax.monitoring.register_event_listener(_record_compilation_cache_event)
+        _compilation_cache_listener = True
+
+def compilation_cache_stats():
+    """
+    Get the number of hits and misses of the persistent ``JAX`` compilation cache in the current process, see :py:class:`gwfast.gwfastUtils.init_compilation_cache`.
+    
+    :return: Dictionary containing the number of compiled functions found in the cache (``'hits'``) and compiled from scratch (``'misses'``).
+    :rtype: dict(int, int)
+    
+    """
+    return {'hits':_compilation_cache_stats['hits'], 'misses':_compilation_cache_stats['requests']-_compilation_cache_stats['hits']}
@@ -17,9 +17,11 @@ class DetNet(object):
     
     :param dict(GWSignal, ...) signals: Dictionary containing one or multiple individual detector objects.
     :param bool, optional verbose: Boolean specifying if the code has to print additional details during execution.
+    :param bool, optional shareWaveform: Boolean specifying if, when possible, the waveform has to be evaluated only once for all the detectors, on a common frequency grid, so that only its projection is computed for each detector. This requires all the detectors to use the same waveform object and the same ``fmin`` and ``fmax``. For the FIM, it further requires the derivatives to be computed with automatic differentiation, with ``computeAnalyticalDeriv=True``, and the motion of the Earth not to be included. Otherwise, the computation is performed separately in each detector.
+    :param concurrent.futures.Executor, optional executor: Executor used to perform the computations of the individual detectors concurrently, e.g. a ``concurrent.futures.ThreadPoolExecutor``. The results are collected in the order of the detectors in ``signals``, hence they do not depend on the executor. If ``None``, the detectors are processed sequentially.
     
     """
-    def __init__(self, signals, verbose=True):
+    def __init__(self, signals, verbose=True, shareWaveform=True, executor=None):
         """
         Constructor method
         """
@@ -28,6 +30,8 @@ class DetNet(object):
         
         self.signals = signals
         self.verbose=verbose
+        self.shareWaveform = shareWaveform
+        self.executor = executor
     
 
     def _clear_cache(self):
@@ -50,13 +54,68 @@ class DetNet(object):
             if verbose:
                 print('\nSeed for detector %s is %s'%(d,self.signals[d].seedUse))
     
-    def SNR(self, evParams, res=1000, return_all=False):
+    def _can_share_waveform(self, fgrids=None):
+        """
+        Check if the waveform can be evaluated once for all the detectors of the network, i.e. if they use the same waveform object and frequency grids.
+        
+        :param dict(FrequencyGrid, FrequencyGrid, ...), optional fgrids: Frequency grids of the event(s) in each detector, as built by :py:class:`make_fgrids`.
+        
+        :return: Boolean specifying if the waveform can be shared.
+        :rtype: bool
+        
+        """
+        sigs = list(self.signals.values())
+        if (not self.shareWaveform) or (len(sigs)<2):
+            return False
+        if any((s.wf_model is not sigs[0].wf_model) or (s.fmin != sigs[0].fmin) or (s.fmax != sigs[0].fmax) for s in sigs):
+            return False
+        if fgrids is not None:
+            fgrids0 = fgrids[list(self.signals.keys())[0]].fgrids
+            if any(not onp.array_equal(onp.asarray(fgrids[d].fgrids), onp.asarray(fgrids0)) for d in self.signals.keys()):
+                return False
+        return True
+    
+    def _map_detectors(self, fun):
+        """
+        Apply a function to each detector of the network, concurrently if an executor is provided.
+        
+        :param callable fun: Function taking as input the name of a detector.
+        
+        :return: Output of the function for each detector, in the order of :py:data:`self.signals`.
+        :rtype: dict
+        
+        """
+        if self.executor is None:
+            return {d: fun(d) for d in self.signals.keys()}
+        futures = {d: self.executor.submit(fun, d) for d in self.signals.keys()}
+        return {d: futures[d].result() for d in self.signals.keys()}
+    
+    def make_fgrids(self, evParams, res=1000, **kwargs):
+        """
+        Build the frequency grids of the event(s) in each detector of the network, so that they can be reused in subsequent calls to :py:class:`SNR`, :py:class:`FisherMatr` and :py:class:`WFOverlap`.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        :param int res: The resolution of the frequency grid to use.
+        :param kwargs: Optional arguments to be passed to :py:class:`gwfast.signal.GWSignal.make_fgrid`, such as ``df`` or ``spacing``.
+        
+        :return: Frequency grids of the event(s) in each detector.
+        :rtype: dict(FrequencyGrid, FrequencyGrid, ...)
+        
+        """
+        utils.check_evparams(evParams)
+        return {d: self.signals[d].make_fgrid(evParams, res=res, **kwargs) for d in self.signals.keys()}
+    
+    def SNR(self, evParams, res=1000, return_all=False, fgrids=None, tol=None, resMax=8193, quadrature='trapz'):
         """
         Compute the *network signal-to-noise-ratio*, SNR, as a function of the parameters of the event(s).
         
         :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
         :param int res: The resolution of the frequency grid to use.
         :param bool, optional return_all: Boolean specifying if the SNRs of the individual detectors have to be returned separately, together with the network SNR(s). In this case the return type is *dict(array, array, ...)*.
+        :param dict(FrequencyGrid, FrequencyGrid, ...), optional fgrids: Frequency grids of the event(s) in each detector, as built by :py:class:`make_fgrids`. If provided, ``res`` is not used.
+        :param float, optional tol: If provided, the frequency grids are refined separately in each detector until the estimated relative error on the squared SNR is below ``tol``, as in :py:class:`gwfast.signal.GWSignal.SNRInteg`. In this case the waveform is not shared among the detectors, and the largest estimated relative error among the detectors, which bounds the one on the squared network SNR, and the number of points used in each detector are returned together with the SNR(s).
+        :param int, optional resMax: The maximum resolution of the frequency grids when ``tol`` is provided.
+        :param str, optional quadrature: The quadrature rule to use, among ``'trapz'``, ``'simpson'`` and ``'gauss'``, see :py:class:`gwfast.signal.GWSignal.make_fgrid`. This is only used if ``fgrids`` is not provided.
         
         :return: Network SNR(s) as a function of the parameters of the event(s). The shape is :math:`(N_{\\rm events})`.
         :rtype: 1-D array
@@ -64,8 +123,27 @@ class DetNet(object):
         """
         snrs = {}
         utils.check_evparams(evParams)
+        srcAmpls = None
+        if (tol is None) and self._can_share_waveform(fgrids):
+            # Evaluate the waveform once on the common frequency grid, only its projection differs among the detectors
+            if fgrids is None:
+                fgrids = self.make_fgrids(evParams, res=res, quadrature=quadrature)
+            d0 = list(self.signals.keys())[0]
+            self.signals[d0]._complete_evparams(evParams)
+            srcAmpls = self.signals[d0]._SourceAmplitudes(evParams, fgrids[d0].fgrids)
+        if self.executor is not None:
+            # Complete the parameters before dispatching, so that the dictionary is not modified by concurrent threads
+            for d in self.signals.keys():
+                self.signals[d]._complete_evparams(evParams)
+        if tol is None:
+            allSNRs = self._map_detectors(lambda d: self.signals[d].SNRInteg(evParams, res=res, return_all=return_all, fgrid=None if fgrids is None else fgrids[d], srcAmpls=srcAmpls, quadrature=quadrature))
+        else:
+            allSNRs = self._map_detectors(lambda d: self.signals[d].SNRInteg(evParams, res=res, return_all=return_all, fgrid=None if fgrids is None else fgrids[d], tol=tol, resMax=resMax, quadrature=quadrature))
+            errEst = onp.array([allSNRs[d][1] for d in self.signals.keys()]).max(axis=0)
+            nPoints = {d: allSNRs[d][2] for d in self.signals.keys()}
+            allSNRs = {d: allSNRs[d][0] for d in self.signals.keys()}
         for d in self.signals.keys():
-            snr_ = self.signals[d].SNRInteg(evParams, res=res, return_all=return_all)
+            snr_ = allSNRs[d]
             if self.signals[d].detector_shape=='T' and return_all:
                 for i in range(3):
                    snrs[d+'_%s'%i] = snr_[i]
@@ -76,12 +154,64 @@ class DetNet(object):
         if return_all:
             snrs['net'] = net_snr
             #onp.squeeze(onp.sqrt(sum( onp.array( list(snrs.values()),dtype=object)**2)))
-            return snrs
-        else:
-            return net_snr #onp.squeeze(onp.sqrt(sum( onp.array(list(snrs.values()),dtype=object)**2)))
+            net_snr = snrs
+        if tol is not None:
+            return net_snr, errEst, nPoints
+        return net_snr #onp.squeeze(onp.sqrt(sum( onp.array(list(snrs.values()),dtype=object)**2)))
         
     
-    def FisherMatr(self, evParams, return_all=False, **kwargs):
+    def ScreenSNR(self, evParams, snr_th, screen_res=100, margin=0.1, return_all=False):
+        """
+        Screen the event(s) against a threshold on the *network signal-to-noise-ratio*, through a cheap computation of the SNR, so that the exact SNR only has to be computed for the events that can be above threshold.
+        
+        The SNR is computed on frequency grids of ``screen_res`` points, and on grids of half the resolution, to estimate the error of the computation. An event is discarded only if its SNR is below threshold by more than a relative amount given by the largest among ``margin`` and twice the relative difference of the SNRs obtained at the two resolutions. Events with non-finite SNR are never discarded.
+        
+        Both ``margin`` and the comparison of the two resolutions are heuristics: they do not bound the error of the SNR on the coarse grids, so that an event whose exact SNR is above threshold can in principle be discarded, e.g. if its signal has features not resolved by either grid. ``margin`` and ``screen_res`` should thus be chosen conservatively, and checked against the exact computation on a subset of the events.
+        
+        The screening is performed with duty factor 1, thus it cannot be used if a duty factor is set in the detectors. Since the duty cycle can only decrease the SNR, the events discarded with duty factor 1 would be discarded also after applying it.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        :param float snr_th: The threshold on the network SNR.
+        :param int screen_res: The resolution of the frequency grids to use for the screening.
+        :param float margin: The minimum relative distance from the threshold for an event to be discarded.
+        :param bool, optional return_all: Boolean specifying if the screening SNRs of the individual detectors have to be returned separately, together with the network SNR(s), as in :py:class:`SNR`.
+        
+        :return: Boolean mask of the event(s) that can be above threshold, and the SNR(s) computed for the screening. The shape of the mask is :math:`(N_{\\rm events})`.
+        :rtype: tuple(1-D array, 1-D array) or tuple(1-D array, dict(array, array, ...))
+        
+        """
+        if any(self.signals[d].DutyFactor is not None for d in self.signals.keys()):
+            raise ValueError('The screening is performed with duty factor 1, and cannot be used if a duty factor is set in the detectors.')
+        if screen_res < 4:
+            raise ValueError('screen_res has to be at least 4.')
+        
+        utils.check_evparams(evParams)
+        
+        allSNRs = []
+        for res in [screen_res, screen_res//2]:
+            fgrids = self.make_fgrids(evParams, res=res)
+            snrs = self.SNR(evParams, return_all=return_all, fgrids=fgrids)
+            # Copy to writable arrays, so that the SNRs of the candidates can be replaced by the exact ones
+            if return_all:
+                snrs = {k: onp.array(snrs[k], dtype=onp.float64) for k in snrs.keys()}
+                allSNRs.append(snrs)
+            else:
+                allSNRs.append({'net':onp.array(snrs, dtype=onp.float64)})
+        
+        net_snr, net_snr_half = allSNRs[0]['net'], allSNRs[1]['net']
+        with onp.errstate(divide='ignore', invalid='ignore'):
+            tol = onp.maximum(margin, 2.*onp.abs(net_snr - net_snr_half)/net_snr)
+        # The comparison is False for non-finite values, which are thus kept
+        isCandidate = ~(net_snr < snr_th*(1.-tol))
+        if self.verbose:
+            print('%s events out of %s discarded by the SNR screening' %((~isCandidate).sum(), len(isCandidate)))
+        
+        if return_all:
+            return isCandidate, allSNRs[0]
+        else:
+            return isCandidate, net_snr
+    
+    def FisherMatr(self, evParams, return_all=False, fgrids=None, **kwargs):
         #nparams = self.signals[list(self.signals.keys())[0]].wf_model.nParams
         #nevents = len(evParams[list(evParams.keys())[0]])
         #totF = onp.zeros((nparams,nparams,nevents))
@@ -90,17 +220,38 @@ class DetNet(object):
         
         :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
         :param bool, optional return_all: Boolean specifying if the FIMs of the individual detectors have to be returned separately, together with the network FIM(s). In this case the return type is *dict(array, array, ...)*.
-        :param kwargs: Optional arguments to be passed to :py:class:`gwfast.signal.GWSignal.FisherMatr`, such as ``res`` or ``use_m1m2``.
+        :param dict(FrequencyGrid, FrequencyGrid, ...), optional fgrids: Frequency grids of the event(s) in each detector, as built by :py:class:`make_fgrids`. If provided, ``res``, ``df`` and ``spacing`` are not used.
+        :param kwargs: Optional arguments to be passed to :py:class:`gwfast.signal.GWSignal.FisherMatr`, such as ``res`` or ``use_m1m2``. If ``tol`` is among them, the frequency grids are refined separately in each detector, without sharing the waveform, and the largest estimated relative error among the detectors and the number of points used in each detector are returned together with the FIM(s), as in :py:class:`SNR`. If ``relBins`` is among them, the FIM is computed with relative binning separately in each detector, without sharing the waveform.
         :return: FIM(s) as a function of the parameters of the event(s). The shape is :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
         :rtype: 3-D array
         
         """
         allF={}
         utils.check_evparams(evParams)
-        for d in self.signals.keys():
+        wfPolDerivs = None
+        tol = kwargs.get('tol')
+        if (tol is None) and (kwargs.get('relBins') is None) and self._can_share_waveform(fgrids) and all(s._can_project_polarisations(computeDerivFinDiff=kwargs.get('computeDerivFinDiff', False), computeAnalyticalDeriv=kwargs.get('computeAnalyticalDeriv', True)) for s in self.signals.values()):
+            # Compute the derivatives of the polarisations once on the common frequency grid, only their projection differs among the detectors
+            if fgrids is None:
+                fgrids = self.make_fgrids(evParams, **{k:kwargs[k] for k in ['res', 'df', 'spacing', 'quadrature'] if k in kwargs})
+            d0 = list(self.signals.keys())[0]
+            if self.verbose:
+                print('Computing waveform derivatives...')
+            wfPolDerivs = self.signals[d0]._PolarisationDerivatives(evParams, fgrids[d0], **{k:kwargs[k] for k in ['use_m1m2', 'use_chi1chi2', 'use_prec_ang', 'freq_chunk', 'deriv_mode'] if k in kwargs})
+        if self.executor is not None:
+            for d in self.signals.keys():
+                self.signals[d]._complete_evparams(evParams)
+        def detFisher(d):
             if self.verbose:
                 print('Computing Fisher for %s...' %d)
-            F_ = self.signals[d].FisherMatr(evParams, return_all=return_all, **kwargs) 
+            return self.signals[d].FisherMatr(evParams, return_all=return_all, fgrid=None if fgrids is None else fgrids[d], wfPolDerivs=wfPolDerivs, **kwargs) 
+        allFdet = self._map_detectors(detFisher)
+        if tol is not None:
+            errEst = onp.array([allFdet[d][1] for d in self.signals.keys()]).max(axis=0)
+            nPoints = {d: allFdet[d][2] for d in self.signals.keys()}
+            allFdet = {d: allFdet[d][0] for d in self.signals.keys()}
+        for d in self.signals.keys():
+            F_ = allFdet[d]
             #totF +=  self.signals[d].FisherMatr(evParams, **kwargs) 
             if self.signals[d].detector_shape=='T' and return_all:
                 for i in range(3):
@@ -114,9 +265,10 @@ class DetNet(object):
         totF = onp.array([allF[k] for k in allF.keys()]).sum(axis=0)
         if return_all:
             allF['net'] = totF #sum(allF.values())
-            return allF
-        else:
-            return totF #sum(allF.values())
+            totF = allF
+        if tol is not None:
+            return totF, errEst, nPoints
+        return totF #sum(allF.values())
         
         
 
@@ -163,7 +315,7 @@ class DetNet(object):
             # For a network the minima can be different, thus to find the global one we use the basin-hopping method. Given the small interval, we find 50 iterations sufficient, but this can be easily changed
             return basinhopping(pattern_fixedtpsi, [1.,1.], niter=50, minimizer_kwargs={'bounds':((0.,onp.pi), (0.,2.*onp.pi))}).x
     
-    def WFOverlap(self, WF1, WF2, evParams1, evParams2, res=1000, **kwargs):
+    def WFOverlap(self, WF1, WF2, evParams1, evParams2, res=1000, fgrids=None, quadrature='trapz', **kwargs):
         """
         Compute the *overlap* of two waveforms in a detector network on two sets of parameters, for one or multiple events.
         
@@ -172,6 +324,8 @@ class DetNet(object):
         :param dict(array, array, ...) evParams1: Dictionary containing the parameters of the event(s) for the first waveform model, as in :py:data:`events`.
         :param dict(array, array, ...) evParams2: Dictionary containing the parameters of the event(s) for the second waveform model, as in :py:data:`events`.
         :param int res: The resolution of the frequency grid to use.
+        :param dict(FrequencyGrid, FrequencyGrid, ...), optional fgrids: Frequency grids of the event(s) in each detector. If provided, ``res`` is not used. Notice that the grids have to extend up to the highest among the cut frequencies of the two waveforms.
+        :param str, optional quadrature: The quadrature rule to use, among ``'trapz'``, ``'simpson'`` and ``'gauss'``, see :py:class:`gwfast.signal.GWSignal.make_fgrid`. This is only used if ``fgrids`` is not provided.
         :param unused kwargs: Optional arguments.
         
         :return: Overlap(s) of the two waveforms. The shape is :math:`(N_{\\rm events})`.
@@ -185,8 +339,14 @@ class DetNet(object):
         SNR1_all    = onp.zeros_like(evParams1['Mc'])
         SNR2_all    = onp.zeros_like(evParams1['Mc'])
         
+        if self.executor is None:
+            detOverlap = lambda d: self.signals[d].WFOverlap(WF1, WF2, evParams1, evParams2, res=res, return_separate=True, fgrid=None if fgrids is None else fgrids[d], quadrature=quadrature)
+        else:
+            # The parameters are completed in place by each detector, thus every thread works on its own copy of the dictionaries
+            detOverlap = lambda d: self.signals[d].WFOverlap(WF1, WF2, dict(evParams1), dict(evParams2), res=res, return_separate=True, fgrid=None if fgrids is None else fgrids[d], quadrature=quadrature)
+        allOverlaps = self._map_detectors(detOverlap)
         for d in self.signals.keys():
-            overlap_int, SNR1, SNR2 = self.signals[d].WFOverlap(WF1, WF2, evParams1, evParams2, res=res, return_separate=True)
+            overlap_int, SNR1, SNR2 = allOverlaps[d]
             
             overlap_all += overlap_int
             SNR1_all    += SNR1**2
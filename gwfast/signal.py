@@ -21,7 +21,7 @@ os.environ['XLA_PYTHON_CLIENT_ALLOCATOR']='platform'
 import numpy as onp
 import jax.numpy as np
 from jax.interpreters import xla
-from jax import pmap, vmap, jacrev, jit #jacfwd
+from jax import pmap, vmap, jacrev, jacfwd, jit
 import time
 import h5py
 import numdifftools as ndt
@@ -33,6 +33,66 @@ from gwfast import gwfastGlobals as glob
 
 
 
+class FrequencyGrid(object):
+    """
+    Class containing the frequency grids used to compute the integrals in a detector for a batch of events, together with the quantities needed for the integration that only depend on the grid.
+    
+    Building the grid once and passing it to :py:class:`gwfast.signal.GWSignal.SNRInteg`, :py:class:`gwfast.signal.GWSignal.FisherMatr` and :py:class:`gwfast.signal.GWSignal.WFOverlap` avoids recomputing the grid, the interpolation of the PSD and the quadrature weights at each call. The grids are usually built through :py:class:`gwfast.signal.GWSignal.make_fgrid`.
+    
+    :param array fgrids: The frequency grids, in :math:`\\rm Hz`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+    :param array strainGrids: The PSD of the detector evaluated on the frequency grids. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+    :param str, optional spacing: The kind of spacing of the frequency grids, ``'geom'``, ``'lin'`` or ``'multiband'``. This is only stored for reference.
+    :param array, optional weights: The quadrature weights, not including the PSD. If not provided, the trapezoid rule is used.
+    :param str, optional quadrature: The quadrature rule the weights correspond to, ``'trapz'``, ``'simpson'`` or ``'gauss'``, see :py:class:`gwfast.signal.GWSignal.make_fgrid`. This is only stored for reference.
+    
+    """
+    def __init__(self, fgrids, strainGrids, spacing='geom', weights=None, quadrature='trapz'):
+        """
+        Constructor method
+        """
+        self.fgrids = np.asarray(fgrids)
+        self.strainGrids = np.asarray(strainGrids)
+        self.spacing = spacing
+        self.quadrature = quadrature
+        self.res, self.nEvents = self.fgrids.shape
+        
+        # 1/S_n(f), precomputed once
+        self.invPSD = 1./self.strainGrids.real
+        
+        if weights is None:
+            # Weights of the trapezoid rule, such that the integral of g(f) is given by the sum over i of weights_i*g(f_i)
+            df = np.diff(self.fgrids.real, axis=0)
+            zerosRow = np.zeros((1, self.nEvents))
+            weights = 0.5*(np.concatenate((df, zerosRow), axis=0) + np.concatenate((zerosRow, df), axis=0))
+        self.weights = np.asarray(weights)
+        
+        # Weights to be used for the integrals of the form 4 Re int g(f)/S_n(f) df
+        self.quadWeights = self.weights*self.invPSD
+    
+    def subset(self, idxs):
+        """
+        Return the frequency grids for a subset of the events, without recomputing them.
+        
+        :param array idxs: Indices (or boolean mask) of the events to select.
+        
+        :return: Frequency grids of the selected events.
+        :rtype: FrequencyGrid
+        
+        """
+        return FrequencyGrid(self.fgrids[:,idxs], self.strainGrids[:,idxs], spacing=self.spacing, weights=self.weights[:,idxs], quadrature=self.quadrature)
+    
+    def check_nevents(self, nevents):
+        """
+        Check that the frequency grids have been built for the given number of events.
+        
+        :param int nevents: Number of events.
+        
+        """
+        if nevents != self.nEvents:
+            raise ValueError('The frequency grid has been built for %s events, while %s events are given.'%(self.nEvents, nevents))
+
+
+
 class GWSignal(object):
     """
     Class to compute the GW signal emitted by a coalescing binary system as seen by a detector on Earth.
@@ -55,6 +115,11 @@ class GWSignal(object):
     :param float DutyFactor: Duty factor of the detector, between 0 and 1, representing the percentage of time the detector (each detector independently in the case of a triangular detector) is supposed to be operational.
     :param bool, optional compute2arms: Boolean specifying if, in the case of a triangular detector, the computation can be performed only in two of the instruments, using the null-stream to get the signal in the third instrument, speeding up the computation by 1/3.
     :param bool, optional jitCompileDerivs: Boolean specifying if the derivatives function has to be jit compiled.
+    :param bool, optional jitCompileKernels: Boolean specifying if the whole computation of the SNR and FIM (construction of the frequency grids, interpolation of the PSD, computation of the signal or its derivatives and frequency integration) has to be jit compiled. The functions are compiled once for each batch size, see ``bucketBatches``. This is not available using LAL or TEOBResumS waveforms.
+    :param bool, optional bucketBatches: Boolean specifying if, when using ``jitCompileKernels=True``, the batches of events have to be padded to the next power of 2, so that the functions are compiled only for a few batch sizes rather than for each number of events. The padded entries are discarded from the results.
+    :param bool, optional shardEvents: Boolean specifying if, when using ``jitCompileKernels=True``, the events of each batch have to be split among all the available ``JAX`` devices (see :py:class:`gwfast.gwfastUtils.shard_batch`), so that the SNR and FIM are computed in parallel on the devices within a single process. The batches are padded to a multiple of the number of devices. On CPU, multiple host devices are obtained through the ``XLA_FLAGS`` environment variable, see :py:class:`gwfast.gwfastUtils.shard_batch`.
+    :param str, optional compilationCacheDir: Path to a directory in which to store the compiled functions, through the persistent ``JAX`` compilation cache (see :py:class:`gwfast.gwfastUtils.init_compilation_cache`), so that they can be reused in subsequent runs and by parallel processes. If ``None`` the cache is not used.
+    :param int, optional psdTableRes: If provided, the PSD is resampled at construction on a table of ``psdTableRes`` points evenly spaced in :math:`\\log f`, and interpolated linearly in :math:`\\log f`-:math:`\\log S_n` on the frequency grids, through index arithmetic rather than a search in the frequencies of the file, see :py:class:`_PSDInterp`. The relative difference with respect to the linear interpolation of the file on the squared SNR of the inspiral is stored in ``psdTableError``, see :py:class:`_make_PSD_table`. If ``None`` the file is interpolated linearly.
     
     """
     '''
@@ -78,7 +143,12 @@ class GWSignal(object):
                 IntTablePath=None,
                 DutyFactor=None,
                 compute2arms=True,
-                jitCompileDerivs=False):
+                jitCompileDerivs=False,
+                jitCompileKernels=False,
+                bucketBatches=True,
+                shardEvents=False,
+                compilationCacheDir=None,
+                psdTableRes=None):
         """
         Constructor method
         """
@@ -140,6 +210,13 @@ class GWSignal(object):
         self.fmin = fmin #Hz
         self.fmax = fmax #Hz or None
         
+        self.psdTableRes = psdTableRes
+        self.psdTableError = None
+        if psdTableRes is not None:
+            self._make_PSD_table(psdTableRes)
+            if verbose:
+                print('PSD tabulated on %s points, relative difference on the squared SNR of the inspiral with respect to the linear interpolation: %.2e' %(psdTableRes, self.psdTableError))
+        
         if detector_shape == 'L':
             self.angbtwArms = 0.5*np.pi
         elif detector_shape == 'T':
@@ -151,13 +228,98 @@ class GWSignal(object):
         onp.random.seed(None)
         self.seedUse = onp.random.randint(2**32 - 1, size=1)
         self.jitCompileDerivs = jitCompileDerivs
+        self.jitCompileKernels = jitCompileKernels and (not self.wf_model.is_LAL)
+        self.bucketBatches = bucketBatches
+        self.shardEvents = shardEvents and self.jitCompileKernels
+        self._shardDevices = jax.devices() if self.shardEvents else None
+        self.compilationCacheDir = compilationCacheDir
+        
+        # The SNR and Fisher kernels are jit compiled, if required, only at the end of the initialisation
+        self._SNRPipeline_use = self._SNRPipeline
+        self._SNRKernel_use = self._SNRKernel
+        self._FisherKernel_use = self._FisherKernel
+        self._FisherKernelBinned_use = self._FisherKernelBinned
     
         if not self.wf_model.is_LAL:
+            if self.compilationCacheDir is not None:
+                # This has to be done before the first compilation, in the initialisation
+                utils.init_compilation_cache(self.compilationCacheDir)
             self._init_jax()
         else:
             self._SignalDerivatives_use = self._SignalDerivatives
+            self._PolarisationDerivsKernel_use = self._PolarisationDerivsKernel
         
         
+    def _make_PSD_table(self, res):
+        """
+        Resample the PSD on a table evenly spaced in :math:`\\log f`, interpolating the file linearly as done without the table, and estimate the error with respect to the linear interpolation of the file as the relative difference on :math:`\\int f^{-7/3}/S_n(f)\\,{\\rm d}f` above :py:data:`fmin`, which gives the squared SNR of the inspiral, computed on the frequencies of the file and on the midpoints among them. The pointwise difference can be much larger close to narrow lines, which however give negligible contributions to the integrals.
+        
+        :param int res: The number of points of the table.
+        
+        """
+        if res < 2:
+            raise ValueError('The PSD table needs at least 2 points.')
+        self._psdTableLogf = onp.linspace(onp.log(self.strainFreq[0]), onp.log(self.strainFreq[-1]), res)
+        self._psdTableLogS = np.asarray(onp.log(onp.interp(onp.exp(self._psdTableLogf), self.strainFreq, self.noiseCurve)))
+        
+        fTest = onp.sort(onp.concatenate((self.strainFreq, 0.5*(self.strainFreq[1:] + self.strainFreq[:-1]))))
+        fTest = fTest[fTest >= self.fmin]
+        integLin = onp.trapz(fTest**(-7./3.)/onp.interp(fTest, self.strainFreq, self.noiseCurve), fTest)
+        integTable = onp.trapz(fTest**(-7./3.)/onp.asarray(self._PSDInterp(fTest)), fTest)
+        self.psdTableError = float(onp.abs(integTable/integLin - 1.))
+    
+    def _PSDInterp(self, fgrids):
+        """
+        Interpolate the PSD on given frequencies. Out of the range of the file a constant value of 1 is used, which results in completely negligible contributions.
+        
+        If the PSD has been tabulated through ``psdTableRes``, the index of the interval of the table is obtained directly from :math:`\\log f`, so that the cost does not depend on the length of the file, and the function is differentiable and can be jit compiled. Otherwise, the file is interpolated linearly.
+        
+        :param array fgrids: The frequencies, in :math:`\\rm Hz`.
+        
+        :return: The PSD on the given frequencies.
+        :rtype: array
+        
+        """
+        if self.psdTableRes is None:
+            return np.interp(fgrids, self.strainFreq, self.noiseCurve, left=1., right=1.)
+        
+        dlogf = self._psdTableLogf[1] - self._psdTableLogf[0]
+        x = (np.log(fgrids) - self._psdTableLogf[0])/dlogf
+        idx = np.clip(np.floor(x).astype(int), 0, self.psdTableRes-2)
+        w = x - idx
+        logS = (1.-w)*self._psdTableLogS[idx] + w*self._psdTableLogS[idx+1]
+        
+        return np.where((fgrids < self.strainFreq[0]) | (fgrids > self.strainFreq[-1]), 1., np.exp(logS))
+    
+    def _batch_size(self, nEvents):
+        """
+        Compute the size to which a batch of events is padded when using ``jitCompileKernels=True``, i.e. the next power of 2 if ``bucketBatches=True``, rounded up to a multiple of the number of devices if ``shardEvents=True``.
+        
+        :param int nEvents: The number of events in the batch.
+        
+        :return: The size of the padded batch.
+        :rtype: int
+        
+        """
+        nPad = utils.bucket_size(nEvents) if self.bucketBatches else nEvents
+        if self.shardEvents:
+            nPad = utils.shard_size(nPad, len(self._shardDevices))
+        return nPad
+    
+    def _shard_batch(self, arr):
+        """
+        Split an array among the available devices along the events axis if ``shardEvents=True``, see :py:class:`gwfast.gwfastUtils.shard_batch`.
+        
+        :param array arr: The array to distribute. The last axis has to be the one of the events, and its size a multiple of the number of devices.
+        
+        :return: The distributed array, or the input array if ``shardEvents=False``.
+        :rtype: array
+        
+        """
+        if self.shardEvents:
+            return utils.shard_batch(arr, self._shardDevices)
+        return arr
+    
     def _init_jax(self):
         """
         JAX initialisation method
@@ -171,11 +333,14 @@ class GWSignal(object):
         if self.verbose:
             print('Jax local device count: %s' %str(jax.local_device_count()))
             print('Jax  device count: %s' %str(jax.device_count()))
+            if self.shardEvents:
+                print('Splitting the events among %s devices' %len(self._shardDevices))
         
         if self.jitCompileDerivs:
-            self._SignalDerivatives_use = jit(self._SignalDerivatives, static_argnames=['use_chi1chi2', 'use_m1m2', 'computeAnalyticalDeriv', 'use_prec_ang', 'computeDerivFinDiff', 'stepNDT', 'methodNDT'])
+            self._SignalDerivatives_use = jit(self._SignalDerivatives, static_argnames=['use_chi1chi2', 'use_m1m2', 'computeAnalyticalDeriv', 'use_prec_ang', 'computeDerivFinDiff', 'stepNDT', 'methodNDT', 'deriv_mode'])
         else:
             self._SignalDerivatives_use = self._SignalDerivatives
+        self._jit_polarisation_derivs()
         
         inj_params_init = {'Mc': np.array([77.23905294]),
                            'Phicoal': np.array([3.28297867]),
@@ -211,11 +376,42 @@ class GWSignal(object):
             print('Done.')
         self.verbose = verboseOr
         self.detector_shape = detector_shapeOr
+        # The kernels depend on the detector shape, so they have to be compiled after the initialisation with an L
+        self._jit_kernels()
      
     def _clear_cache(self):
         if self.jitCompileDerivs:
             print('Clearing cache...')
-            self._SignalDerivatives_use = jax.jit(self._SignalDerivatives, static_argnums=(15,16,17,18,19))
+            self._SignalDerivatives_use = jit(self._SignalDerivatives, static_argnames=['use_chi1chi2', 'use_m1m2', 'computeAnalyticalDeriv', 'use_prec_ang', 'computeDerivFinDiff', 'stepNDT', 'methodNDT', 'deriv_mode'])
+        if self.jitCompileKernels:
+            print('Clearing kernels cache...')
+            self._jit_kernels()
+        if not self.wf_model.is_LAL:
+            self._jit_polarisation_derivs()
+    
+    def _jit_polarisation_derivs(self):
+        """
+        Jit compile the function computing the derivatives of the polarisations, :py:class:`_PolarisationDerivsKernel`, if ``jitCompileDerivs=True`` or ``jitCompileKernels=True``.
+        """
+        if self.jitCompileDerivs or self.jitCompileKernels:
+            self._PolarisationDerivsKernel_use = jit(self._PolarisationDerivsKernel, static_argnames=['use_chi1chi2', 'use_m1m2', 'use_prec_ang', 'deriv_mode'])
+        else:
+            self._PolarisationDerivsKernel_use = self._PolarisationDerivsKernel
+    
+    def _jit_kernels(self):
+        """
+        Jit compile the functions computing the SNR and FIM, if ``jitCompileKernels=True``. The compiled functions depend on the attributes of the object (e.g. the detector shape and ``fmax``), so this has to be called again if they are changed.
+        """
+        if self.jitCompileKernels:
+            self._SNRPipeline_use = jit(self._SNRPipeline, static_argnames=['res', 'quadrature'])
+            self._SNRKernel_use = jit(self._SNRKernel)
+            self._FisherKernel_use = jit(self._FisherKernel, static_argnames=['use_chi1chi2', 'use_m1m2', 'computeAnalyticalDeriv', 'use_prec_ang', 'computeDerivFinDiff', 'stepNDT', 'methodNDT', 'deriv_mode'])
+            self._FisherKernelBinned_use = jit(self._FisherKernelBinned, static_argnames=['use_chi1chi2', 'use_m1m2', 'computeAnalyticalDeriv', 'use_prec_ang', 'computeDerivFinDiff', 'stepNDT', 'methodNDT', 'deriv_mode'])
+        else:
+            self._SNRPipeline_use = self._SNRPipeline
+            self._SNRKernel_use = self._SNRKernel
+            self._FisherKernel_use = self._FisherKernel
+            self._FisherKernelBinned_use = self._FisherKernelBinned
      
     def _update_seed(self, seed=None):
         """
@@ -421,13 +617,14 @@ class GWSignal(object):
         
         return Delt # in seconds
     
-    def GWAmplitudes(self, evParams, f, rot=0.):
+    def GWAmplitudes(self, evParams, f, rot=0., srcAmpls=None):
         """
         Compute the amplitude of the signal(s) as seen by the detector, as a function of the parameters, at given frequencies.
         
         :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
         :param array or float f: The frequency(ies) at which to perform the calculation, in :math:`\\rm Hz`.
         :param float rot: Further rotation of the interferometer with respect to the :py:data:`self.xax` orientation, in degrees, needed for the triangular geometry.
+        :param tuple(array, array), optional srcAmpls: Plus and cross amplitudes of the signal before the projection on the detector, as returned by :py:class:`_SourceAmplitudes`. If provided, the waveform is not evaluated.
         :return: Plus and cross amplitudes at the detector, evaluated at the given parameters and frequency(ies).
         :rtype: tuple(array, array) or tuple(float, float)
         
@@ -454,16 +651,10 @@ class GWSignal(object):
         # wfAmpl = self.wf_model.Ampl(f, **evParams)
         Fp, Fc = self._PatternFunction(theta, phi, t, psi, rot=rot)
         
-        if (self.wf_model.is_HigherModes) or (self.wf_model.is_Precessing):
-        # If the waveform includes higher modes or precessing spins, it is not possible to compute amplitude and phase separately, make all together
-            hp, hc = self.wf_model.hphc(f, **evParams)
-            Ap, Ac = abs(hp)*Fp, abs(hc)*Fc
-        else:
-            wfAmpl = self.wf_model.Ampl(f, **evParams)
-            Ap = wfAmpl*Fp*0.5*(1.+(np.cos(iota))**2)
-            Ac = wfAmpl*Fc*np.cos(iota)
+        if srcAmpls is None:
+            srcAmpls = self._SourceAmplitudes(evParams, f)
         
-        return Ap, Ac
+        return srcAmpls[0]*Fp, srcAmpls[1]*Fc
     
     def GWPhase(self, evParams, f):
         """
@@ -482,11 +673,10 @@ class GWSignal(object):
 
         return 2.*np.pi*f*(tcoal*3600.*24.) - Phicoal - PhiGw
 
-    def GWstrain(self, f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=0., is_m1m2=False, is_chi1chi2=False, is_prec_ang=False, return_single_comp=None):
+    def _WFParams(self, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, is_m1m2=False, is_chi1chi2=False, is_prec_ang=False):
         """
-        Compute the full GW strain (complex) as a function of the parameters, at given frequencies.
+        Build the dictionary of parameters to be passed to :py:class:`self.wf_model` from the parameters used to compute the strain and its derivatives.
         
-        :param array or float f: The frequency(ies) at which to perform the calculation, in :math:`\\rm Hz`.
         :param array or float Mc: The chirp mass(es), :math:`{\cal M}_c`, in units of :math:`\\rm M_{\odot}`. If ``is_m1m2=True`` this is interpreted as the primary mass, :math:`m_1`, in units of :math:`\\rm M_{\odot}`.
         :param array or float eta:  The symmetric mass ratio(s), :math:`\eta`. If ``is_m1m2=True`` this is interpreted as the secondary mass, :math:`m_2`, in units of :math:`\\rm M_{\odot}`.
         :param array or float dL: The luminosity distance(s), :math:`d_L`, in :math:`\\rm Gpc`.
@@ -505,19 +695,13 @@ class GWSignal(object):
         :param array or float LambdaTilde: The adimensional tidal deformability(ies) of combination :math:`\\tilde{\Lambda}`.
         :param array or float deltaLambda: The adimensional tidal deformability(ies) of combination :math:`\delta\\tilde{\Lambda}`.
         :param array or float ecc: The orbital eccentricity(ies), :math:`e_0`.
-        :param float rot: Further rotation of the interferometer with respect to the :py:data:`self.xax` orientation, in degrees, needed for the triangular geometry.
         :param bool, optional is_m1m2: Boolean specifying if the ``Mc`` and ``eta`` inputs should be interpreted as the primary and secondary mass(es).
         :param bool, optional is_chi1chi2: Boolean specifying if the ``chiS`` and ``chiA`` inputs should be interpreted as the primary and secondary spin components along the axis :math:`z`.
         :param bool, optional is_prec_ang: Boolean specifying if the ``iota`` input should be interpreted as the inclination angle with respect to total angular momentum, ``chiS`` and ``chiA`` as the primary and secondary spin magnitudes, ``chi1x`` and ``chi2x`` as the primary and secondary spin tilts, ``chi1y`` as the azimuthal angle of orbital angular momentum relative to total angular momentum and ``chi2y`` as the difference in azimuthal angle between spin vectors.
-        :param str return_single_comp: String specifying if a single component of the signal should be returned, to be chosen among ``Ap`` and ``Ac``, to return the plus and cross amplitude, :math:`A_+` and :math:`A_{\\times}`, respectively, and ``Psip`` and ``Psic``, to return the plus and cross phase, :math:`\Phi_+` and :math:`\Phi_{\\times}`, respectively.
-        :return: Complete signal strain (complex), evaluated at the given parameters and frequency(ies).
-        :rtype: array or float
+        :return: Dictionary containing the parameters of the event(s), as needed by :py:class:`self.wf_model`. The entry ``iota`` always contains the inclination angle(s) with respect to orbital angular momentum.
+        :rtype: dict(array, array, ...)
         
         """
-        # Full GW strain expression (complex)
-        # Here we have the decompressed parameters and we put them back in a dictionary just to have an easier
-        # implementation of the JAX module for derivatives
-        
         if is_m1m2:
             # Interpret Mc as m1 and eta as m2
             McUse, etaUse = utils.Mceta_from_m1m2(Mc, eta)
@@ -556,6 +740,118 @@ class GWSignal(object):
         
         if self.wf_model.is_eccentric:
             evParams['ecc'] = ecc
+        
+        return evParams
+    
+    def _SourceAmplitudes(self, evParams, f):
+        """
+        Compute the amplitudes of the plus and cross polarisations of the signal(s), including the dependence on the inclination angle but before the projection on the detector, as a function of the parameters, at given frequencies.
+        
+        These do not depend on the detector, so that they can be computed once and shared among the detectors of a network, see :py:class:`GWAmplitudes`.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        :param array or float f: The frequency(ies) at which to perform the calculation, in :math:`\\rm Hz`.
+        :return: Plus and cross amplitudes of the signal, evaluated at the given parameters and frequency(ies).
+        :rtype: tuple(array, array) or tuple(float, float)
+        
+        """
+        if (self.wf_model.is_HigherModes) or (self.wf_model.is_Precessing):
+        # If the waveform includes higher modes or precessing spins, it is not possible to compute amplitude and phase separately, make all together
+            hp, hc = self.wf_model.hphc(f, **evParams)
+            return abs(hp), abs(hc)
+        else:
+            wfAmpl = self.wf_model.Ampl(f, **evParams)
+            return wfAmpl*0.5*(1.+(np.cos(evParams['iota']))**2), wfAmpl*np.cos(evParams['iota'])
+    
+    def _WFPolarisations(self, f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, is_m1m2=False, is_chi1chi2=False, is_prec_ang=False):
+        """
+        Compute the plus and cross polarisations (complex) of the signal(s), including the dependence on the inclination angle but before the projection on the detector, as a function of the parameters, at given frequencies.
+        
+        The arguments are the same as in :py:class:`GWstrain`, so that the derivatives can be taken with respect to the same parameters, but only the ones entering the waveform are used.
+        
+        :return: Plus and cross polarisations, stacked along the first axis.
+        :rtype: array
+        
+        """
+        evParams = self._WFParams(Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, is_m1m2=is_m1m2, is_chi1chi2=is_chi1chi2, is_prec_ang=is_prec_ang)
+        
+        if (self.wf_model.is_HigherModes) or (self.wf_model.is_Precessing):
+            wfhp, wfhc = self.wf_model.hphc(f, **evParams)
+        else:
+            wfPhiGw = self.wf_model.Phi(f, **evParams)
+            wfAmpl  = self.wf_model.Ampl(f, **evParams)
+            wfhp, wfhc = wfAmpl*np.exp(-1j*wfPhiGw)*0.5*(1.+(np.cos(evParams['iota']))**2), 1j*wfAmpl*np.exp(-1j*wfPhiGw)*np.cos(evParams['iota'])
+        
+        return np.stack((wfhp, wfhc))
+    
+    def _PolarisationProjection(self, f, theta, phi, psi, tcoal, Phicoal, rot=0.):
+        """
+        Compute the quantities needed to project the polarisations of the signal(s) on the detector, i.e. the pattern functions and the phase factor due to the time of coalescence, the phase at coalescence and the time delay from the Earth center. This is only possible if the motion of the Earth is not included, since otherwise the time of the detector depends on the frequency through the parameters of the waveform.
+        
+        :param array f: The frequency(ies) at which to perform the calculation, in :math:`\\rm Hz`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param array theta: The :math:`\\theta` sky position angle(s), in :math:`\\rm rad`.
+        :param array phi: The :math:`\phi` sky position angle(s), in :math:`\\rm rad`.
+        :param array psi: The polarisation angle(s), :math:`\psi`, in :math:`\\rm rad`.
+        :param array tcoal: The time(s) of coalescence, :math:`t_{\\rm coal}`, as a GMST.
+        :param array Phicoal: The phase(s) at coalescence, :math:`\Phi_{\\rm coal}`, in :math:`\\rm rad`.
+        :param float rot: Further rotation of the interferometer with respect to the :py:data:`self.xax` orientation, in degrees, needed for the triangular geometry.
+        :return: Plus and cross pattern functions and phase factor, such that the strain is given by :math:`(F_+ h_+ + F_{\\times} h_{\\times})` times the phase factor.
+        :rtype: tuple(array, array, array)
+        
+        """
+        if self.useEarthMotion:
+            raise ValueError('The projection of the polarisations on the detector cannot be separated from the waveform if the motion of the Earth is included.')
+        
+        if self.noMotion:
+            t = 0.
+        else:
+            t = tcoal
+        tmpDeltLoc = self._DeltLoc(theta, phi, t) # in seconds
+        t = t + tmpDeltLoc/(3600.*24.)
+        
+        Fp, Fc = self._PatternFunction(theta, phi, t, psi, rot=rot)
+        phiL = (2.*np.pi*f)*tmpDeltLoc
+        
+        return Fp, Fc, np.exp(1j*(phiL + 2.*np.pi*f*(tcoal*3600.*24.) - Phicoal))
+    
+    def GWstrain(self, f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=0., is_m1m2=False, is_chi1chi2=False, is_prec_ang=False, return_single_comp=None):
+        """
+        Compute the full GW strain (complex) as a function of the parameters, at given frequencies.
+        
+        :param array or float f: The frequency(ies) at which to perform the calculation, in :math:`\\rm Hz`.
+        :param array or float Mc: The chirp mass(es), :math:`{\cal M}_c`, in units of :math:`\\rm M_{\odot}`. If ``is_m1m2=True`` this is interpreted as the primary mass, :math:`m_1`, in units of :math:`\\rm M_{\odot}`.
+        :param array or float eta:  The symmetric mass ratio(s), :math:`\eta`. If ``is_m1m2=True`` this is interpreted as the secondary mass, :math:`m_2`, in units of :math:`\\rm M_{\odot}`.
+        :param array or float dL: The luminosity distance(s), :math:`d_L`, in :math:`\\rm Gpc`.
+        :param array or float theta: The :math:`\\theta` sky position angle(s), in :math:`\\rm rad`.
+        :param array or float phi: The :math:`\phi` sky position angle(s), in :math:`\\rm rad`.
+        :param array or float iota: The inclination angle(s), with respect to orbital angular momentum, :math:`\iota`, in :math:`\\rm rad`. If ``is_prec_ang=True`` this is interpreted as the inclination angle(s) with respect to total angular momentum, :math:`\\theta_{JN}`, in :math:`\\rm rad`.
+        :param array or float psi: The polarisation angle(s), :math:`\psi`, in :math:`\\rm rad`.
+        :param array or float tcoal: The time(s) of coalescence, :math:`t_{\\rm coal}`, as a GMST.
+        :param array or float Phicoal: The phase(s) at coalescence, :math:`\Phi_{\\rm coal}`, in :math:`\\rm rad`.
+        :param array or float chiS: The symmetric spin component(s), :math:`\chi_s`. If :py:class:`self.wf_model` is precessing or ``is_chi1chi2=True`` this is interpreted as the spin component(s) of the primary object(s) along the axis :math:`z`, :math:`\chi_{1,z}`. If ``is_prec_ang=True`` this is interpreted as the spin magnitude(s) of the primary object(s), :math:`\chi_1`.
+        :param array or float chiA: The antisymmetric spin component(s) :math:`\chi_a`. If :py:class:`self.wf_model` is precessing or ``is_chi1chi2=True`` this is interpreted as the spin component(s) of the secondary object(s) along the axis :math:`z`, :math:`\chi_{2,z}`. If ``is_prec_ang=True`` this is interpreted as the spin magnitude(s) of the secondary object(s), :math:`\chi_2`.
+        :param array or float chi1x: The spin component(s) of the primary object(s) along the axis :math:`x`, :math:`\chi_{1,x}`. If ``is_prec_ang=True`` this is interpreted as the spin tilt angle(s) of the primary object(s), :math:`\\theta_{s,1}`, in :math:`\\rm rad`.
+        :param array or float chi2x: The spin component(s) of the secondary object(s) along the axis :math:`x`, :math:`\chi_{2,x}`. If ``is_prec_ang=True`` this is interpreted as the spin tilt angle(s) of the secondary object(s), :math:`\\theta_{s,2}`, in :math:`\\rm rad`.
+        :param array or float chi1y: spin component(s) of the primary object(s) along the axis :math:`y`, :math:`\chi_{1,y}`. If ``is_prec_ang=True`` this is interpreted as the azimuthal angle(s) of orbital angular momentum relative to total angular momentum, :math:`\phi_{JL}`, in :math:`\\rm rad`.
+        :param array or float chi2y: spin component(s) of the secondary object(s) along the axis :math:`y`, :math:`\chi_{2,y}`. If ``is_prec_ang=True`` this is interpreted as the difference(s) in azimuthal angle between spin vectors, :math:`\phi_{1,2}`, in :math:`\\rm rad`.
+        :param array or float LambdaTilde: The adimensional tidal deformability(ies) of combination :math:`\\tilde{\Lambda}`.
+        :param array or float deltaLambda: The adimensional tidal deformability(ies) of combination :math:`\delta\\tilde{\Lambda}`.
+        :param array or float ecc: The orbital eccentricity(ies), :math:`e_0`.
+        :param float rot: Further rotation of the interferometer with respect to the :py:data:`self.xax` orientation, in degrees, needed for the triangular geometry.
+        :param bool, optional is_m1m2: Boolean specifying if the ``Mc`` and ``eta`` inputs should be interpreted as the primary and secondary mass(es).
+        :param bool, optional is_chi1chi2: Boolean specifying if the ``chiS`` and ``chiA`` inputs should be interpreted as the primary and secondary spin components along the axis :math:`z`.
+        :param bool, optional is_prec_ang: Boolean specifying if the ``iota`` input should be interpreted as the inclination angle with respect to total angular momentum, ``chiS`` and ``chiA`` as the primary and secondary spin magnitudes, ``chi1x`` and ``chi2x`` as the primary and secondary spin tilts, ``chi1y`` as the azimuthal angle of orbital angular momentum relative to total angular momentum and ``chi2y`` as the difference in azimuthal angle between spin vectors.
+        :param str return_single_comp: String specifying if a single component of the signal should be returned, to be chosen among ``Ap`` and ``Ac``, to return the plus and cross amplitude, :math:`A_+` and :math:`A_{\\times}`, respectively, and ``Psip`` and ``Psic``, to return the plus and cross phase, :math:`\Phi_+` and :math:`\Phi_{\\times}`, respectively.
+        :return: Complete signal strain (complex), evaluated at the given parameters and frequency(ies).
+        :rtype: array or float
+        
+        """
+        # Full GW strain expression (complex)
+        # Here we have the decompressed parameters and we put them back in a dictionary just to have an easier
+        # implementation of the JAX module for derivatives
+        
+        evParams = self._WFParams(Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, is_m1m2=is_m1m2, is_chi1chi2=is_chi1chi2, is_prec_ang=is_prec_ang)
+        iota = evParams['iota']
             
         if self.useEarthMotion:
             # Compute Doppler contribution
@@ -651,13 +947,188 @@ class GWSignal(object):
                 #return np.sqrt(Ap*Ap + Ac*Ac)*np.exp((Psi+phiP)*1j)
         
     
-    def SNRInteg(self, evParams, res=1000, return_all=False):
+    def _complete_evparams(self, evParams):
+        """
+        Add to the dictionary of parameters of the event(s) the quantities needed by :py:class:`self.wf_model`, if they can be computed from the provided ones (e.g. ``chi1z`` and ``chi2z`` from ``chiS`` and ``chiA``). The dictionary is modified in place.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        
+        """
+        if self.wf_model.is_Precessing:
+            try:
+                _ =evParams['chi1x']
+            except KeyError:
+                try:
+                    if self.verbose:
+                        print('Adding cartesian components of the spins from angular variables')
+                    evParams['iota'], evParams['chi1x'], evParams['chi1y'], evParams['chi1z'], evParams['chi2x'], evParams['chi2y'], evParams['chi2z'] = utils.TransformPrecessing_angles2comp(thetaJN=evParams['thetaJN'], phiJL=evParams['phiJL'], theta1=evParams['tilt1'], theta2=evParams['tilt2'], phi12=evParams['phi12'], chi1=evParams['chi1'], chi2=evParams['chi2'], Mc=evParams['Mc'], eta=evParams['eta'], fRef=self.fmin, phiRef=0.)
+                except KeyError:
+                    raise ValueError('Either the cartesian components of the precessing spins (iota, chi1x, chi1y, chi1z, chi2x, chi2y, chi2z) or their modulus and orientations (thetaJN, chi1, chi2, tilt1, tilt2, phiJL, phi12) have to be provided.')
+        else:
+            try:
+                _ =evParams['chi1z']
+            except KeyError:
+                try:
+                    if self.verbose:
+                        print('Adding chi1z, chi2z from chiS, chiA')
+                    evParams['chi1z'] = evParams['chiS'] + evParams['chiA']
+                    evParams['chi2z'] = evParams['chiS'] - evParams['chiA']
+                except KeyError:
+                    raise ValueError('Two among chi1z, chi2z and chiS, chiA have to be provided.')
+                    
+        if self.wf_model.is_tidal:
+            try:
+                _=evParams['Lambda1']
+            except KeyError:
+                try:
+                    evParams['Lambda1'], evParams['Lambda2'] = utils.Lam12_from_Lamt_delLam(evParams['LambdaTilde'], evParams['deltaLambda'], evParams['eta'])
+                except KeyError:
+                    raise ValueError('Two among Lambda1, Lambda2 and LambdaTilde and deltaLambda have to be provided.')
+    
+    def make_fgrid(self, evParams, res=1000, df=None, spacing='geom', fcut=None, quadrature='trapz', bandRes=None, bandDt=3600.):
+        """
+        Build the frequency grids for the event(s), together with the PSD and the quadrature weights on them, so that they can be reused in subsequent calls to :py:class:`SNRInteg`, :py:class:`FisherMatr` and :py:class:`WFOverlap`.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        :param int res: The resolution of the frequency grid to use.
+        :param float df: The spacing of the frequency grid to use, in :math:`\\rm Hz`. Alternative to ``res``.
+        :param str spacing: The kind of spacing of the frequency grid to use. If ``'geom'`` the grid will be spaced evenly on a log scale (geometric progression), if ``'lin'`` it will be spaced evenly on a linear scale, if ``'multiband'`` it will be divided in bands defined from the time to coalescence, see :py:class:`_MultibandGrids`.
+        :param array, optional fcut: The maximum frequency of the grid for each event, in :math:`\\rm Hz`. If not provided, the cut frequency of :py:class:`self.wf_model` is used.
+        :param str, optional quadrature: The quadrature rule to use for the integrals. If ``'trapz'`` the trapezoid rule is used, if ``'simpson'`` the composite Simpson's rule in the variable in which the grid is evenly spaced (:math:`f` or :math:`\\log f`), adding one point if ``res`` is even, if ``'gauss'`` the grid is given by the nodes of the Gauss–Legendre rule of order ``res-2`` in the same variable, plus the two extremes, with zero weight, which the waveform models use as reference frequencies. Multibanded grids are only available with ``'trapz'``.
+        :param list(int, int, ...), optional bandRes: The number of points in each band of the grid, from the lowest to the highest frequency, if ``spacing='multiband'``. If not provided, it is computed from ``res``, see :py:class:`_MultibandGrids`.
+        :param float, optional bandDt: The maximum separation in time to coalescence of the points of the grid, in seconds, if ``spacing='multiband'`` and ``bandRes`` is not provided, see :py:class:`_MultibandGrids`.
+        
+        :return: Frequency grids of the event(s).
+        :rtype: FrequencyGrid
+        
+        """
+        if fcut is None:
+            self._complete_evparams(evParams)
+            fcut = self.wf_model.fcut(**evParams)
+        
+        if self.fmax is not None:
+            fcut = np.where(fcut > self.fmax, self.fmax, fcut)
+        
+        fminarr = np.full(fcut.shape, self.fmin)
+        if res is None and df is not None:
+            res = np.floor( np.real((1+(fcut-fminarr)/df)))
+            res = np.amax(res)
+        elif res is None and df is None:
+            raise ValueError('Provide either resolution in frequency or step size.')
+        if spacing not in ['lin', 'geom', 'multiband']:
+            raise ValueError('Spacing of the frequency grid has to be among \'geom\', \'lin\' and \'multiband\'.')
+        if quadrature not in ['trapz', 'simpson', 'gauss']:
+            raise ValueError('The quadrature rule has to be among \'trapz\', \'simpson\' and \'gauss\'.')
+        res = int(res)
+        
+        weights = None
+        if spacing=='multiband':
+            if quadrature!='trapz':
+                raise ValueError('Multibanded frequency grids are only available with the trapezoid rule.')
+            if evParams is None:
+                raise ValueError('Multibanded frequency grids need the parameters of the events, to compute the time to coalescence.')
+            fgrids = self._MultibandGrids(evParams, fminarr, fcut, res=res, bandRes=bandRes, bandDt=bandDt)
+        elif quadrature=='gauss':
+            if res < 3:
+                raise ValueError('The Gauss-Legendre rule needs at least 3 points.')
+            # Nodes and weights of the Gauss-Legendre rule on [-1, 1], mapped on [fmin, fcut] or on [log(fmin), log(fcut)]
+            # The waveform models use the extremes of the grid as reference frequencies, thus these are included with zero weight
+            x, wx = utils.gauss_legendre(res-2)
+            x, wx = onp.concatenate(([-1.], x, [1.]))[:,onp.newaxis], onp.concatenate(([0.], wx, [0.]))[:,onp.newaxis]
+            if spacing=='lin':
+                fgrids = 0.5*(fcut+fminarr) + 0.5*(fcut-fminarr)*x
+                weights = 0.5*(fcut-fminarr)*wx
+            else:
+                logfmin, logfcut = np.log(fminarr), np.log(fcut)
+                fgrids = np.exp(0.5*(logfcut+logfmin) + 0.5*(logfcut-logfmin)*x)
+                # df = f dlog(f)
+                weights = 0.5*(logfcut-logfmin)*wx*fgrids
+        else:
+            if quadrature=='simpson' and res%2==0:
+                # Simpson's rule needs an even number of intervals
+                res = res+1
+            if spacing=='lin':
+                fgrids = np.linspace(fminarr, fcut, num=res)
+            else:
+                fgrids = np.geomspace(fminarr, fcut, num=res)
+            if quadrature=='simpson':
+                coeffs = onp.ones(res)
+                coeffs[1:-1:2], coeffs[2:-1:2] = 4., 2.
+                coeffs = coeffs[:,onp.newaxis]/3.
+                if spacing=='lin':
+                    weights = coeffs*(fcut-fminarr)/(res-1)
+                else:
+                    weights = coeffs*np.log(fcut/fminarr)/(res-1)*fgrids
+        
+        # Out of the provided PSD range, we use a constant value of 1, which results in completely negligible conntributions
+        strainGrids = self._PSDInterp(fgrids)
+        
+        return FrequencyGrid(fgrids, strainGrids, spacing=spacing, weights=weights, quadrature=quadrature)
+    
+    def _MultibandGrids(self, evParams, fmin, fcut, res=1000, bandRes=None, bandDt=3600.):
+        """
+        Build multibanded frequency grids, whose bands are defined from the time to coalescence of the signal(s), :py:class:`gwfast.waveforms.WaveFormModel.tau_star`.
+        
+        The edges of the bands are the frequencies at which the time to coalescence is halved, starting from its value at ``fmin``, and the last band extends up to ``fcut``. The grid is evenly spaced on a log scale within each band, with a number of points set separately for each band. If not provided, this is the largest between the number of points of a geometric grid with ``res`` points in the band, which resolves the variation of the amplitude and of the PSD, and the number needed for the points to be separated by at most ``bandDt`` in time to coalescence, which resolves the variation of the pattern functions due to the motion of the Earth where the signal lingers. The bands are added until their duration is shorter than ``bandDt``, and the number of points of each band is the largest among the events, so that the grids have at least ``res`` points. If the time to coalescence at ``fcut`` is longer than the lower edge of some of the bands, these collapse on ``fcut`` and their points do not contribute to the integrals.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        :param array fmin: The minimum frequency of the grid for each event, in :math:`\\rm Hz`.
+        :param array fcut: The maximum frequency of the grid for each event, in :math:`\\rm Hz`.
+        :param int res: The resolution of the geometric grid setting the minimum number of points of each band, used if ``bandRes`` is not provided.
+        :param list(int, int, ...), optional bandRes: The number of points in each band, from the lowest to the highest frequency, each at least 2. The bands share their edges, so that the grids have ``sum(bandRes)-len(bandRes)+1`` points.
+        :param float, optional bandDt: The maximum separation in time to coalescence of the points of the grids, in seconds, used if ``bandRes`` is not provided.
+        
+        :return: Frequency grids of the event(s), in :math:`\\rm Hz`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :rtype: 2-D array
+        
+        """
+        fmin, fcut = onp.asarray(fmin), onp.asarray(fcut)
+        # Time to coalescence on a fine grid, forced to be positive and decreasing in case the PN expression turns over close to fcut
+        logfTab = onp.linspace(onp.log(fmin), onp.log(fcut), 1025)
+        tauTab = onp.minimum.accumulate(onp.asarray(self.wf_model.tau_star(onp.exp(logfTab), **evParams)), axis=0)
+        logtauTab = onp.log(onp.maximum(tauTab, onp.finfo(float).tiny))
+        
+        if bandRes is None:
+            nBands = int(onp.clip(onp.ceil(onp.log2(tauTab[0].max()/bandDt)), 0, 40)) + 1
+        else:
+            nBands = len(bandRes)
+        
+        # The edges of the bands are the frequencies at which the time to coalescence is a fraction 1/2**k of its initial value
+        logtauEdges = logtauTab[0] - onp.log(2.)*onp.arange(1, nBands)[:,onp.newaxis]
+        idxs = onp.clip((logtauTab[onp.newaxis,:,:] > logtauEdges[:,onp.newaxis,:]).sum(axis=1), 1, logfTab.shape[0]-1)
+        tauL, tauR = onp.take_along_axis(logtauTab, idxs-1, axis=0), onp.take_along_axis(logtauTab, idxs, axis=0)
+        fL, fR = onp.take_along_axis(logfTab, idxs-1, axis=0), onp.take_along_axis(logfTab, idxs, axis=0)
+        with onp.errstate(divide='ignore', invalid='ignore'):
+            logfEdges = onp.where(tauL > tauR, fL + (fR - fL)*onp.clip((tauL - logtauEdges)/(tauL - tauR), 0., 1.), fR)
+        fEdges = onp.concatenate((fmin[onp.newaxis], onp.exp(logfEdges), fcut[onp.newaxis]), axis=0)
+        fEdges = onp.minimum(onp.maximum.accumulate(fEdges, axis=0), fcut)
+        
+        if bandRes is None:
+            logWidths = onp.diff(onp.log(fEdges), axis=0)
+            # Duration of each band, the last one lasting until fcut
+            tauEdges = onp.concatenate((tauTab[0]*0.5**onp.arange(nBands)[:,onp.newaxis], tauTab[-1:]), axis=0)
+            tauWidths = -onp.diff(onp.maximum(tauEdges, onp.maximum(tauTab[-1], 0.)), axis=0)
+            nLog = logWidths/(onp.log(fcut/fmin)/(res-1))
+            bandRes = (onp.ceil(onp.maximum(nLog, tauWidths/bandDt)).max(axis=1).astype(int) + 1).tolist()
+        elif any(n < 2 for n in bandRes):
+            raise ValueError('Each band of the grid needs at least 2 points.')
+        
+        allBands = [onp.geomspace(fEdges[i], fEdges[i+1], num=bandRes[i])[(1 if i>0 else 0):] for i in range(nBands)]
+        
+        return np.asarray(onp.concatenate(allBands, axis=0))
+    
+    def SNRInteg(self, evParams, res=1000, return_all=False, fgrid=None, srcAmpls=None, tol=None, resMax=8193, quadrature='trapz'):
         """
         Compute the *signal-to-noise-ratio*, SNR, as a function of the parameters of the event(s).
         
         :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
         :param int res: The resolution of the frequency grid to use.
         :param bool, optional return_all: Boolean specifying if, in the case of a triangular detector, the SNRs of the individual instruments have to be returned separately. In this case the return type is *list(array, array, array)*.
+        :param FrequencyGrid, optional fgrid: Frequency grids of the event(s), as built by :py:class:`make_fgrid`. If provided, ``res`` is not used.
+        :param tuple(array, array), optional srcAmpls: Plus and cross amplitudes of the signal(s) before the projection on the detector, evaluated on the frequency grids ``fgrid``, as returned by :py:class:`_SourceAmplitudes`. If provided, the waveform is not evaluated. This is used by :py:class:`gwfast.network.DetNet.SNR` to share the waveform among the detectors of a network.
+        :param float, optional tol: If provided, the frequency grid of each event is refined, starting from ``res`` points, until the estimated relative error on the squared SNR is below ``tol``, see :py:class:`_AdaptiveIntegral`. In this case ``fgrid`` and ``srcAmpls`` cannot be provided, and the estimated relative error on the squared SNR and the number of points used for each event are returned together with the SNR(s).
+        :param int, optional resMax: The maximum number of points of the frequency grids when ``tol`` is provided.
+        :param str, optional quadrature: The quadrature rule to use, among ``'trapz'``, ``'simpson'`` and ``'gauss'``, see :py:class:`make_fgrid`. The adaptive refinement with ``tol`` is only available with ``'trapz'``. This is only used if ``fgrid`` is not provided.
         
         :return: SNR(s) as a function of the parameters of the event(s). The shape is :math:`(N_{\\rm events})`.
         :rtype: 1-D array
@@ -666,7 +1137,8 @@ class GWSignal(object):
         # SNR calculation performing the frequency integral for each signal
         # This is computationally more expensive, but needed for complex waveform models
         if self.DutyFactor is not None:
-            onp.random.seed(self.seedUse)
+            # Use a dedicated generator rather than the global one, so that different detectors can be processed in parallel threads
+            rng = onp.random.RandomState(self.seedUse)
         
         utils.check_evparams(evParams)
         
@@ -675,19 +1147,215 @@ class GWSignal(object):
         #else:
         #    SNR = 0.
         
-        allSNRsq=[]
+        self._complete_evparams(evParams)
+        nEvents = len(evParams['Mc'])
         
-        if self.wf_model.is_Precessing:
-            try:
-                _ =evParams['chi1x']
-            except KeyError:
-                try:
-                    if self.verbose:
-                        print('Adding cartesian components of the spins from angular variables')
-                    evParams['iota'], evParams['chi1x'], evParams['chi1y'], evParams['chi1z'], evParams['chi2x'], evParams['chi2y'], evParams['chi2z'] = utils.TransformPrecessing_angles2comp(thetaJN=evParams['thetaJN'], phiJL=evParams['phiJL'], theta1=evParams['tilt1'], theta2=evParams['tilt2'], phi12=evParams['phi12'], chi1=evParams['chi1'], chi2=evParams['chi2'], Mc=evParams['Mc'], eta=evParams['eta'], fRef=self.fmin, phiRef=0.)
-                except KeyError:
-                    raise ValueError('Either the cartesian components of the precessing spins (iota, chi1x, chi1y, chi1z, chi2x, chi2y, chi2z) or their modulus and orientations (thetaJN, chi1, chi2, tilt1, tilt2, phiJL, phi12) have to be provided.')
+        if tol is not None:
+            if (fgrid is not None) or (srcAmpls is not None):
+                raise ValueError('With tol the frequency grids are built adaptively, thus fgrid and srcAmpls cannot be provided.')
+            if quadrature!='trapz':
+                raise ValueError('The adaptive refinement of the frequency grids is only available with the trapezoid rule.')
+            allSNRsq, errEst, nPoints = self._AdaptiveIntegral(evParams, lambda idxs, fg: self._SNRsq({key:onp.asarray(evParams[key])[idxs] for key in evParams.keys()}, fgrid=fg), self._SNRsqRelError, res=res, tol=tol, resMax=resMax)
+        else:
+            if fgrid is not None:
+                fgrid.check_nevents(nEvents)
+            elif srcAmpls is not None:
+                raise ValueError('The frequency grids on which the amplitudes are evaluated have to be provided.')
+            allSNRsq = self._SNRsq(evParams, res=res, fgrid=fgrid, srcAmpls=srcAmpls, quadrature=quadrature)
+        
+        if self.DutyFactor is not None:
+            # One draw for each instrument
+            excl = onp.array([rng.choice([0,1],nEvents, p=[1.-self.DutyFactor,self.DutyFactor]) for _ in range(allSNRsq.shape[0])])
+            allSNRsq = allSNRsq*excl
+        
+        if return_all:
+            if self.detector_shape=='T':
+                SNR = 2*np.sqrt(allSNRsq)
+            else:
+                SNR = np.squeeze(2*np.sqrt(allSNRsq), axis=0)
+        elif self.detector_shape=='T':
+            SNR = 2*np.sqrt(allSNRsq.sum(axis=0))
+        else:
+            SNR = np.squeeze(2*np.sqrt(allSNRsq), axis=0)
+        # The factor of two arises by cutting the integral from 0 to infinity
+        
+        if tol is not None:
+            return SNR, errEst, nPoints
+        return SNR
+    
+    def _SNRsq(self, evParams, res=1000, fgrid=None, srcAmpls=None, quadrature='trapz'):
+        """
+        Compute the squared SNR(s) in each instrument of the detector, without the duty factor, padding the batch if needed.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`, including all the quantities needed by :py:class:`self.wf_model`.
+        :param int res: The resolution of the frequency grid to use, if ``fgrid`` is not provided.
+        :param FrequencyGrid, optional fgrid: Frequency grids of the event(s).
+        :param tuple(array, array), optional srcAmpls: Plus and cross amplitudes of the signal(s) before the projection on the detector, evaluated on the frequency grids ``fgrid``, as in :py:class:`SNRInteg`.
+        :param str, optional quadrature: The quadrature rule to use if ``fgrid`` is not provided, see :py:class:`make_fgrid`.
+        
+        :return: Squared SNR(s) in each instrument, without the overall factor of 4. The shape is :math:`(N_{\\rm instruments}`, :math:`N_{\\rm events})`.
+        :rtype: 2-D array
+        
+        """
+        nEvents = len(evParams['Mc'])
+        if self.jitCompileKernels and (self.bucketBatches or self.shardEvents):
+            # Pad the batch, so that the compiled functions are reused for different numbers of events and the events can be split among the devices
+            nPad = self._batch_size(nEvents)
+            evParamsUse = {key:self._shard_batch(utils.pad_batch(evParams[key], nPad)) for key in evParams.keys()}
         else:
+            nPad = nEvents
+            evParamsUse = evParams
+        
+        if fgrid is None:
+            allSNRsq = self._SNRPipeline_use(evParamsUse, res=res, quadrature=quadrature)
+        else:
+            if srcAmpls is not None:
+                srcAmpls = tuple(self._shard_batch(utils.pad_batch(A, nPad)) for A in srcAmpls)
+            allSNRsq = self._SNRKernel_use(evParamsUse, self._shard_batch(utils.pad_batch(fgrid.fgrids, nPad)), self._shard_batch(utils.pad_batch(fgrid.quadWeights, nPad)), srcAmpls=srcAmpls)
+        return allSNRsq[:,:nEvents]
+    
+    def _SNRsqRelError(self, newSNRsq, oldSNRsq):
+        """
+        Estimate the relative error on the squared SNR(s) of a detector from the values obtained on two frequency grids, see :py:class:`_AdaptiveIntegral`.
+        
+        :param array newSNRsq: Squared SNR(s) in each instrument on the finer grids. The shape is :math:`(N_{\\rm instruments}`, :math:`N_{\\rm events})`.
+        :param array oldSNRsq: Squared SNR(s) in each instrument on the coarser grids.
+        
+        :return: Estimated relative error(s). The shape is :math:`(N_{\\rm events})`.
+        :rtype: 1-D array
+        
+        """
+        with onp.errstate(divide='ignore', invalid='ignore'):
+            return onp.nan_to_num(onp.abs((newSNRsq - oldSNRsq).sum(axis=0))/newSNRsq.sum(axis=0))
+    
+    def _AdaptiveIntegral(self, evParams, integral, relError, res=65, tol=1e-3, resMax=8193, spacing='geom'):
+        """
+        Compute integrals over frequency refining the grid of each event until a given tolerance is met.
+        
+        The grid of each event is refined by halving all its intervals, starting from ``res`` points, which gives a sequence of nested grids. On grids spaced evenly on a linear or log scale, the integral computed with the trapezoid rule on the refined grid can be obtained from the one on the previous grid, rescaled, adding the contribution of the new points and a correction at the two extremes, so that the integrand is evaluated only once at each point. The refinement of an event stops when the relative differences of the integrals on the last three grids, computed by ``relError``, are both below ``tol``, or when the next grid would exceed ``resMax`` points. The largest of the two differences is returned as the error estimate. For a smooth integrand the error of the trapezoid rule on the finest grid is about one third of the last difference, but narrow features of the PSD, such as lines, make the convergence irregular, which is why two consecutive differences are required.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        :param callable integral: Function computing the integrals on given frequency grids for a subset of the events, taking as input the indices of the events and a :py:class:`FrequencyGrid` object. The last axis of the output has to be the one of the events, and the output has to be linear in the quadrature weights.
+        :param callable relError: Function estimating the relative error of the integrals from their values on two consecutive grids, with the events along the last axis, returning one value per event.
+        :param int res: The initial resolution of the frequency grids. This has to be at least 3.
+        :param float tol: The tolerance on the relative error.
+        :param int resMax: The maximum resolution of the frequency grids.
+        :param str spacing: The kind of spacing of the frequency grids, ``'geom'`` or ``'lin'``.
+        
+        :return: The integrals, the estimated relative error and the number of points of the grid for each event.
+        :rtype: tuple(array, 1-D array, 1-D array)
+        
+        """
+        if res < 3:
+            raise ValueError('The initial resolution has to be at least 3.')
+        if spacing not in ['lin', 'geom']:
+            raise ValueError('The adaptive refinement of the frequency grids is only available with \'geom\' or \'lin\' spacing.')
+        
+        nEvents = len(evParams['Mc'])
+        fgrid = self.make_fgrid(evParams, res=res, spacing=spacing)
+        fcut = onp.asarray(fgrid.fgrids[-1])
+        
+        allInts = onp.array(integral(onp.arange(nEvents), fgrid))
+        errEst = onp.full(nEvents, onp.inf)
+        lastErr = onp.full(nEvents, onp.inf)
+        nPoints = onp.full(nEvents, res)
+        
+        active = onp.arange(nEvents)
+        n = res
+        while (len(active)>0) and (2*n-1 <= resMax):
+            fineGrid = self.make_fgrid(None, res=2*n-1, spacing=spacing, fcut=fcut[active])
+            fineWeights = fineGrid.weights
+            coarseWeights = FrequencyGrid(fineGrid.fgrids[::2], fineGrid.strainGrids[::2], spacing=spacing).weights
+            # The ratio of the weights of the points in common is the same for all the points but the extremes
+            ratio = fineWeights[2]/coarseWeights[1]
+            idxs = onp.concatenate(([0], onp.arange(1, 2*n-1, 2), [2*n-2]))
+            newWeights = fineWeights[idxs]
+            newWeights = newWeights.at[0].add(-ratio*coarseWeights[0]).at[-1].add(-ratio*coarseWeights[-1])
+            newGrid = FrequencyGrid(fineGrid.fgrids[idxs], fineGrid.strainGrids[idxs], spacing=spacing, weights=newWeights)
+            
+            oldInts = allInts[...,active]
+            newInts = onp.asarray(ratio)*oldInts + onp.asarray(integral(active, newGrid))
+            allInts[...,active] = newInts
+            newErr = relError(newInts, oldInts)
+            errEst[active] = onp.maximum(newErr, lastErr[active])
+            lastErr[active] = newErr
+            nPoints[active] = 2*n-1
+            
+            active = active[~(errEst[active] <= tol)]
+            n = 2*n-1
+        
+        if self.verbose and len(active)>0:
+            print('%s events did not reach the tolerance with %s points' %(len(active), n))
+        
+        return allInts, errEst, nPoints
+    
+    def _SNRPipeline(self, evParams, res=1000, quadrature='trapz'):
+        """
+        Compute the squared SNR(s) in each instrument of the detector, building the frequency grids. This function can be jit compiled as a whole.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`, including all the quantities needed by :py:class:`self.wf_model`.
+        :param int res: The resolution of the frequency grid to use.
+        :param str, optional quadrature: The quadrature rule to use, see :py:class:`make_fgrid`.
+        
+        :return: Squared SNR(s) in each instrument, without the duty factor and the overall factor of 4. The shape is :math:`(N_{\\rm instruments}`, :math:`N_{\\rm events})`.
+        :rtype: 2-D array
+        
+        """
+        fgrid = self.make_fgrid(evParams, res=res, fcut=self.wf_model.fcut(**evParams), quadrature=quadrature)
+        
+        return self._SNRKernel(evParams, fgrid.fgrids, fgrid.quadWeights)
+    
+    def _SNRKernel(self, evParams, fgrids, quadWeights, srcAmpls=None):
+        """
+        Compute the squared SNR(s) in each instrument of the detector, on given frequency grids. This function can be jit compiled as a whole.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`, including all the quantities needed by :py:class:`self.wf_model`.
+        :param array fgrids: The frequency grids, as in :py:class:`gwfast.signal.FrequencyGrid.fgrids`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param array quadWeights: The quadrature weights, divided by the PSD, as in :py:class:`gwfast.signal.FrequencyGrid.quadWeights`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param tuple(array, array), optional srcAmpls: Plus and cross amplitudes of the signal(s) before the projection on the detector, as returned by :py:class:`_SourceAmplitudes`. If not provided, they are computed here, once for all the instruments.
+        
+        :return: Squared SNR(s) in each instrument, without the duty factor and the overall factor of 4. The shape is :math:`(N_{\\rm instruments}`, :math:`N_{\\rm events})`.
+        :rtype: 2-D array
+        
+        """
+        if srcAmpls is None:
+            srcAmpls = self._SourceAmplitudes(evParams, fgrids)
+        
+        if self.detector_shape=='L':
+            allAmpls = [self.GWAmplitudes(evParams, fgrids, srcAmpls=srcAmpls)]
+        elif not self.compute2arms:
+            allAmpls = [self.GWAmplitudes(evParams, fgrids, rot=i*60., srcAmpls=srcAmpls) for i in range(3)]
+        else:
+            # The signal in 3 arms sums to zero for geometrical reasons, so we can use this to skip some calculations
+            Aps1, Acs1 = self.GWAmplitudes(evParams, fgrids, rot=0., srcAmpls=srcAmpls)
+            Aps2, Acs2 = self.GWAmplitudes(evParams, fgrids, rot=60., srcAmpls=srcAmpls)
+            allAmpls = [(Aps1, Acs1), (Aps2, Acs2), (- (Aps1 + Aps2), - (Acs1 + Acs2))]
+        
+        return np.array([np.sum((Aps*Aps + Acs*Acs)*quadWeights, axis=0) for Aps, Acs in allAmpls])
+    
+    
+    def _FisherParams(self, evParams, use_m1m2=False, use_chi1chi2=True, use_prec_ang=True):
+        """
+        Compute the parameters of the event(s) with respect to which the FIM is computed, in the order and with the conventions used by :py:class:`gwfast.signal.GWSignal._SignalDerivatives`.
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        :param bool, optional use_m1m2: Boolean specifying if the FIM has to be computed with respect to the individual masses ``m1`` and ``m2`` rather than ``Mc`` and ``eta``.
+        :param bool, optional use_chi1chi2: Boolean specifying if, in the non-precessing case, the FIM has to be computed with respect to the individual spins ``chi1z`` and ``chi2z`` rather than ``chiS`` and ``chiA``.
+        :param bool, optional use_prec_ang: Boolean specifying if, in the precessing case, the FIM has to be computed with respect to the spin angular variables rather than the spin cartesian components.
+        :return: The parameters ``Mc``, ``eta``, ``dL``, ``theta``, ``phi``, ``iota``, ``psi``, ``tcoal``, ``Phicoal``, ``chiS``, ``chiA``, ``chi1x``, ``chi2x``, ``chi1y``, ``chi2y``, ``LambdaTilde``, ``deltaLambda`` and ``ecc`` of the event(s).
+        :rtype: list(array, array, ...)
+        
+        """
+        McOr, dL, theta, phi = evParams['Mc'].astype('complex128'), evParams['dL'].astype('complex128'), evParams['theta'].astype('complex128'), evParams['phi'].astype('complex128')
+        iota, psi, tcoal, etaOr, Phicoal = evParams['iota'].astype('complex128'), evParams['psi'].astype('complex128'), evParams['tcoal'].astype('complex128'), evParams['eta'].astype('complex128'), evParams['Phicoal'].astype('complex128')
+            
+        if use_m1m2:
+            # In this case Mc represents m1 and eta represents m2
+            Mc, eta  = utils.m1m2_from_Mceta(McOr, etaOr)
+        else:
+            Mc, eta  = McOr, etaOr
+
+        if not self.wf_model.is_Precessing:
             try:
                 _ =evParams['chi1z']
             except KeyError:
@@ -699,338 +1367,549 @@ class GWSignal(object):
                 except KeyError:
                     raise ValueError('Two among chi1z, chi2z and chiS, chiA have to be provided.')
                     
+            chi1z, chi2z = evParams['chi1z'].astype('complex128'), evParams['chi2z'].astype('complex128')
+            
+            if use_chi1chi2:
+            # In this case chiS represents chi1z and chiA represents chi2z
+                chiS, chiA = chi1z, chi2z
+            else:
+                chiS, chiA = 0.5*(chi1z + chi2z), 0.5*(chi1z - chi2z)
+            
+            chi1x, chi2x, chi1y, chi2y = np.zeros(Mc.shape), np.zeros(Mc.shape), np.zeros(Mc.shape), np.zeros(Mc.shape)
+            
+        else:
+            try:
+               _=evParams['chi1x']
+            except KeyError:
+                try:
+                    if self.verbose:
+                        print('Adding cartesian components of the spins from angular variables')
+                    evParams['iota'], evParams['chi1x'], evParams['chi1y'], evParams['chi1z'], evParams['chi2x'], evParams['chi2y'], evParams['chi2z'] = utils.TransformPrecessing_angles2comp(thetaJN=evParams['thetaJN'], phiJL=evParams['phiJL'], theta1=evParams['tilt1'], theta2=evParams['tilt2'], phi12=evParams['phi12'], chi1=evParams['chi1'], chi2=evParams['chi2'], Mc=evParams['Mc'], eta=evParams['eta'], fRef=self.fmin, phiRef=0.)
+                except KeyError:
+                    raise ValueError('Either the cartesian components of the precessing spins (iota, chi1x, chi1y, chi1z, chi2x, chi2y, chi2z) or their modulus and orientations (thetaJN, chi1, chi2, tilt1, tilt2, phiJL, phi12) have to be provided.')
+            if not use_prec_ang:
+                chiS, chiA = evParams['chi1z'].astype('complex128'), evParams['chi2z'].astype('complex128')
+                chi1x, chi2x, chi1y, chi2y = evParams['chi1x'].astype('complex128'), evParams['chi2x'].astype('complex128'), evParams['chi1y'].astype('complex128'), evParams['chi2y'].astype('complex128')
+            else:
+                # In this case iota=thetaJN, chi1y=phiJL, chi1x=tilt1, chi2x=tilt2, chi2y=phi12, chiS=chi1, chiA=chi2
+                iota, chi1y, chi1x, chi2x, chi2y, chiS, chiA = utils.TransformPrecessing_comp2angles(evParams['iota'].astype('complex128'), evParams['chi1x'].astype('complex128'), evParams['chi1y'].astype('complex128'), evParams['chi1z'].astype('complex128'), evParams['chi2x'].astype('complex128'), evParams['chi2y'].astype('complex128'), evParams['chi2z'].astype('complex128'), McOr, etaOr, fRef=self.fmin, phiRef=0.)
+        
         if self.wf_model.is_tidal:
             try:
-                _=evParams['Lambda1']
+                Lambda1, Lambda2 = evParams['Lambda1'].astype('complex128'), evParams['Lambda2'].astype('complex128')
             except KeyError:
                 try:
-                    evParams['Lambda1'], evParams['Lambda2'] = utils.Lam12_from_Lamt_delLam(evParams['LambdaTilde'], evParams['deltaLambda'], evParams['eta'])
+                    Lambda1, Lambda2  = utils.Lam12_from_Lamt_delLam(evParams['LambdaTilde'].astype('complex128'), evParams['deltaLambda'].astype('complex128'), etaOr)
                 except KeyError:
                     raise ValueError('Two among Lambda1, Lambda2 and LambdaTilde and deltaLambda have to be provided.')
+            LambdaTilde, deltaLambda = utils.Lamt_delLam_from_Lam12(Lambda1, Lambda2, etaOr)
+            
+        else:
+            Lambda1, Lambda2, LambdaTilde, deltaLambda = np.zeros(Mc.shape), np.zeros(Mc.shape), np.zeros(Mc.shape), np.zeros(Mc.shape)
         
-        fcut = self.wf_model.fcut(**evParams)
+        if self.wf_model.is_eccentric:
+            try:
+                ecc = evParams['ecc'].astype('complex128')
+            except KeyError:
+                raise ValueError('Eccentricity has to be provided.')
+        else:
+            ecc = np.zeros(Mc.shape)
+            
         
-        if self.fmax is not None:
-            fcut = np.where(fcut > self.fmax, self.fmax, fcut)
+        return [Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc]
+    
+    def FisherMatr(self, evParams, res=1000, df=None, spacing='geom', 
+                   use_m1m2=False, use_chi1chi2=True, use_prec_ang=True,
+                   computeDerivFinDiff=False, computeAnalyticalDeriv=True,
+                   return_all=False, freq_chunk=None, fgrid=None, wfPolDerivs=None,
+                   tol=None, resMax=8193, quadrature='trapz', relBins=None, **kwargs):
+        """
+        Compute the *Fisher information matrix*, FIM, as a function of the parameters of the event(s).
+        
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        :param int res: The resolution of the frequency grid to use.
+        :param float df: The spacing of the frequency grid to use, in :math:`\\rm Hz`. Alternative to ``res``.
+        :param str spacing: The kind of spacing of the frequency grid to use. If ``'geom'`` the grid will be spaced evenly on a log scale (geometric progression), if ``'lin'`` it will be spaced evenly on a linear scale, if ``'multiband'`` it will be divided in bands defined from the time to coalescence, with the default number of points in each band, see :py:class:`make_fgrid`.
+        :param bool, optional use_m1m2: Boolean specifying if the FIM has to be computed with respect to the individual masses ``m1`` and ``m2`` rather than ``Mc`` and ``eta``.
+        :param bool, optional use_chi1chi2: Boolean specifying if, in the non-precessing case, the FIM has to be computed with respect to the individual spins ``chi1z`` and ``chi2z`` rather than ``chiS`` and ``chiA``.
+        :param bool, optional use_prec_ang: Boolean specifying if, in the precessing case, the FIM has to be computed with respect to the spin angular variables rather than the spin cartesian components.
+        :param bool, optional computeDerivFinDiff: Boolean specifying if the derivatives have to be computed using numerical differentiation (finite differences) through the `numdifftools <https://github.com/pbrod/numdifftools>`_ package.
+        :param bool, optional computeAnalyticalDeriv: Boolean specifying if the derivatives with respect to ``dL``, ``theta``, ``phi``, ``psi``, ``tcoal``, ``Phicoal`` and ``iota`` (the latter only for the fundamental mode in the non-precessing case) have to be computed analytically. This considerably speeds up the calculation and provides better accuracy.
+        :param bool, optional return_all: Boolean specifying if, in the case of a triangular detector, the FIMs of the individual instruments have to be returned separately. In this case the return type is *list(array, array, array)*.
+        :param int, optional freq_chunk: If provided, the derivatives are computed and integrated in consecutive blocks of ``freq_chunk`` points of the frequency grid, which are accumulated in the FIM. This bounds the peak memory usage by the block size rather than by the full resolution of the grid, at the price of a slightly longer computation time. If ``None`` the whole grid is used at once.
+        :param FrequencyGrid, optional fgrid: Frequency grids of the event(s), as built by :py:class:`make_fgrid`. If provided, ``res``, ``df`` and ``spacing`` are not used.
+        :param tuple(array, array), optional wfPolDerivs: Polarisations of the signal(s) and their derivatives with respect to the parameters entering the waveform, evaluated on the frequency grids ``fgrid``, as returned by :py:class:`_PolarisationDerivatives`. If provided, only the projection on the detector is computed. This is used by :py:class:`gwfast.network.DetNet.FisherMatr` to share the waveform among the detectors of a network, and is only possible with ``computeAnalyticalDeriv=True`` and without the motion of the Earth.
+        :param float, optional tol: If provided, the frequency grid of each event is refined, starting from ``res`` points, until the estimated error on each element of the FIM, relative to the square root of the product of the corresponding diagonal elements, is below ``tol``, see :py:class:`_AdaptiveIntegral`. In this case ``fgrid`` and ``wfPolDerivs`` cannot be provided, ``df`` is not used, and the estimated relative error and the number of points used for each event are returned together with the FIM(s).
+        :param int, optional resMax: The maximum number of points of the frequency grids when ``tol`` is provided.
+        :param str, optional quadrature: The quadrature rule to use, among ``'trapz'``, ``'simpson'`` and ``'gauss'``, see :py:class:`make_fgrid`. The adaptive refinement with ``tol`` is only available with ``'trapz'``. This is only used if ``fgrid`` is not provided.
+        :param int, optional relBins: If provided, the FIM is computed with *relative binning*: the frequency grid is divided in ``relBins`` bins, the derivatives of the signal are only computed at their edges, and their ratio to the signal, which is a smooth function of the frequency, is interpolated linearly within each bin, see :py:class:`_FisherKernelBinned`. The signal itself is still evaluated on the whole grid. This can reduce the cost of the computation for long signals, which need dense grids, by a factor depending on the cost of the derivatives of the waveform model, at the price of an interpolation error decreasing as the square of the size of the bins. In this case ``tol`` and ``wfPolDerivs`` cannot be provided, and ``freq_chunk`` is not used.
+        :param kwargs: Optional arguments to be passed to :py:class:`gwfast.signal.GWSignal._SignalDerivatives`, such as ``methodNDT`` or ``deriv_mode`` (to choose between forward and reverse mode automatic differentiation).
+        :return: FIM(s) as a function of the parameters of the event(s). The shape is :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+        :rtype: 3-D array
+        
+        """
+        # If use_m1m2=True the Fisher is computed w.r.t. m1 and m2, not Mc and eta
+        # If use_chi1chi2=True the Fisher is computed w.r.t. chi1z and chi2z, not chiS and chiA
+        if self.DutyFactor is not None:
+            rng = onp.random.RandomState(self.seedUse)
+        
+        utils.check_evparams(evParams)
+        
+        fisherParams = self._FisherParams(evParams, use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang)
+        
+        if wfPolDerivs is not None:
+            if fgrid is None:
+                raise ValueError('The frequency grids on which the polarisations are evaluated have to be provided.')
+            if not self._can_project_polarisations(computeDerivFinDiff=computeDerivFinDiff, computeAnalyticalDeriv=computeAnalyticalDeriv):
+                raise ValueError('The derivatives of the polarisations can only be used with automatic differentiation, computeAnalyticalDeriv=True and without the motion of the Earth.')
+        
+        if relBins is not None:
+            if tol is not None:
+                raise ValueError('Relative binning cannot be used together with the adaptive refinement of the frequency grids.')
+            if wfPolDerivs is not None:
+                raise ValueError('With relative binning the derivatives are only computed at the edges of the bins, thus wfPolDerivs cannot be provided.')
+        
+        if tol is not None:
+            if (fgrid is not None) or (wfPolDerivs is not None):
+                raise ValueError('With tol the frequency grids are built adaptively, thus fgrid and wfPolDerivs cannot be provided.')
+            if quadrature!='trapz':
+                raise ValueError('The adaptive refinement of the frequency grids is only available with the trapezoid rule.')
+        elif fgrid is None:
+            fgrid = self.make_fgrid(evParams, res=res, df=df, spacing=spacing, quadrature=quadrature)
+        else:
+            fgrid.check_nevents(len(evParams['Mc']))
+        
+        if (self.wf_model.is_LAL) and (not computeDerivFinDiff):
+            computeDerivFinDiff=True
+            if self.verbose:
+                print('Using LAL or TEOBResumS waveforms it is not possible to compute the derivatives using JAX automatic differentiation routines, being the functions written in C. Proceeding using numdifftools for numerical differentiation (finite differences)')
             
-        fminarr = np.full(fcut.shape, self.fmin)
-        fgrids = np.geomspace(fminarr,fcut,num=int(res))
-        # Out of the provided PSD range, we use a constant value of 1, which results in completely negligible conntributions
-        strainGrids = np.interp(fgrids, self.strainFreq, self.noiseCurve, left=1., right=1.)
-        
-        if self.detector_shape=='L':    
-            Aps, Acs = self.GWAmplitudes(evParams, fgrids)
-            Atot = Aps*Aps + Acs*Acs
-            SNRsq = np.trapz(Atot/strainGrids, fgrids, axis=0)
-            if self.DutyFactor is not None:
-                excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                SNRsq = SNRsq*excl
-            allSNRsq.append(SNRsq)
+        nEvents = len(evParams['Mc'])
+        integralArgs = {'freq_chunk':freq_chunk, 'use_m1m2':use_m1m2, 'use_chi1chi2':use_chi1chi2, 'use_prec_ang':use_prec_ang, 'computeAnalyticalDeriv':computeAnalyticalDeriv, 'computeDerivFinDiff':computeDerivFinDiff}
+        if tol is None:
+            allFishers = self._FisherOnGrid(fisherParams, fgrid, wfPolDerivs=wfPolDerivs, relBins=relBins, **integralArgs, **kwargs)
+        else:
+            allFishers, errEst, nPoints = self._AdaptiveIntegral(evParams, lambda idxs, fg: self._FisherOnGrid([x[idxs] for x in fisherParams], fg, **integralArgs, **kwargs), self._FisherRelError, res=res, tol=tol, resMax=resMax, spacing=spacing)
+        allFishers = list(allFishers)
+        
+        if self.DutyFactor is not None:
+            for i in range(len(allFishers)):
+                excl = rng.choice([0,1],nEvents, p=[1.-self.DutyFactor,self.DutyFactor])
+                allFishers[i] = allFishers[i]*excl
+            
+        if return_all:
+            FisherMatrs = allFishers
         elif self.detector_shape=='T':
-            if not self.compute2arms:
-                for i in range(3):
-                    Aps, Acs = self.GWAmplitudes(evParams, fgrids, rot=i*60.)
-                    Atot = Aps*Aps + Acs*Acs
-                    tmpSNRsq = np.trapz(Atot/strainGrids, fgrids, axis=0)
-                    if self.DutyFactor is not None:
-                        excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                        tmpSNRsq = tmpSNRsq*excl
-                    allSNRsq.append(tmpSNRsq)
-                    #SNR = SNR + tmpSNRsq
-                #SNR = np.sqrt(SNR)
-            else:
+            FisherMatrs = onp.array(allFishers).sum(axis=0)
+        else:
+            FisherMatrs = allFishers[0]
+        
+        if tol is not None:
+            return FisherMatrs, errEst, nPoints
+        return FisherMatrs
+    
+    def _FisherOnGrid(self, fisherParams, fgrid, freq_chunk=None, wfPolDerivs=None, relBins=None, use_m1m2=False, use_chi1chi2=True, use_prec_ang=True, computeAnalyticalDeriv=True, computeDerivFinDiff=False, **kwargs):
+        """
+        Compute the FIM(s) in each instrument of the detector, without the duty factor, on given frequency grids, padding the batch if needed and accumulating the integral over blocks of the grids.
+        
+        :param list(array, array, ...) fisherParams: The parameters of the event(s), as returned by :py:class:`_FisherParams`.
+        :param FrequencyGrid fgrid: Frequency grids of the event(s).
+        :param int, optional freq_chunk: If provided, the integral is accumulated over consecutive blocks of ``freq_chunk`` points of the frequency grids, as in :py:class:`FisherMatr`.
+        :param tuple(array, array), optional wfPolDerivs: Polarisations of the signal(s) and their derivatives on the frequency grids ``fgrid``, as in :py:class:`FisherMatr`.
+        :param int, optional relBins: If provided, the number of bins of the grids used to compute the FIM(s) with relative binning, see :py:class:`_FisherKernelBinned`. In this case ``freq_chunk`` is not used.
+        :param bool, optional use_m1m2, use_chi1chi2, use_prec_ang, computeAnalyticalDeriv, computeDerivFinDiff: Options of the computation, as in :py:class:`FisherMatr`.
+        :param kwargs: Optional arguments to be passed to :py:class:`gwfast.signal.GWSignal._SignalDerivatives`.
+        
+        :return: FIM(s) in each instrument. The shape is :math:`(N_{\\rm instruments}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+        :rtype: 4-D array
+        
+        """
+        nEvents = fgrid.nEvents
+        
+        if (self.jitCompileKernels) and (not computeDerivFinDiff):
+            FisherKernel, FisherKernelBinned = self._FisherKernel_use, self._FisherKernelBinned_use
+            # Pad the batch, so that the compiled functions are reused for different numbers of events and the events can be split among the devices
+            nPad = self._batch_size(nEvents)
+            shardUse = self._shard_batch
+        else:
+            # Numerical differentiation cannot be jit compiled
+            FisherKernel, FisherKernelBinned = self._FisherKernel, self._FisherKernelBinned
+            nPad = nEvents
+            shardUse = lambda x: x
+        
+        kernelParams = [shardUse(utils.pad_batch(x, nPad)) for x in fisherParams]
+        # Quadrature weights, including the PSD, are defined on the full grid so that the integral can be split in blocks
+        fgrids, quadWeights = shardUse(utils.pad_batch(fgrid.fgrids, nPad)), shardUse(utils.pad_batch(fgrid.quadWeights, nPad))
+        if wfPolDerivs is not None:
+            wfPols, wfPolDerivs = shardUse(utils.pad_batch(wfPolDerivs[0], nPad)), shardUse(utils.pad_batch(wfPolDerivs[1], nPad))
+        
+        nFreq = fgrids.shape[0]
+        if self.verbose:
+            # The kernels compute all the arms at once and can be jit compiled, so the message is printed here rather than inside them
+            print('Filling matrix for arm 1...' if self.detector_shape=='L' else 'Filling matrices for arms 1, 2 and 3...')
+        if relBins is not None:
+            if relBins < 1:
+                raise ValueError('relBins has to be a positive integer.')
+            # The bins are delimited by points of the grids, as evenly spaced as possible in index
+            edgeIdxs = onp.unique(onp.round(onp.linspace(0, nFreq-1, int(relBins)+1)).astype(int))
+            binIdxs = onp.clip(onp.searchsorted(edgeIdxs, onp.arange(nFreq), side='right')-1, 0, len(edgeIdxs)-2)
+            allFishers = onp.asarray(FisherKernelBinned(fgrids, quadWeights, edgeIdxs, binIdxs, *kernelParams, use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang, computeAnalyticalDeriv=computeAnalyticalDeriv, computeDerivFinDiff=computeDerivFinDiff, **kwargs))
+            return allFishers[...,:nEvents]
+        
+        if freq_chunk is None:
+            freq_chunk = nFreq
+        elif freq_chunk < 1:
+            raise ValueError('freq_chunk has to be a positive integer.')
+        
+        allFishers = 0.
+        
+        for iStart in range(0, nFreq, int(freq_chunk)):
+            iEnd = min(iStart+int(freq_chunk), nFreq)
+            if self.verbose and (iEnd-iStart < nFreq):
+                print('Frequency points %s to %s of %s...'%(iStart, iEnd, nFreq))
+            idxs = self._block_indices(iStart, iEnd, nFreq)
+            # The extremes of the grid added to the block do not contribute to the integral
+            blockWeights = quadWeights[idxs] if len(idxs)==nFreq else quadWeights[idxs].at[0].set(0.).at[-1].set(0.)
+            if wfPolDerivs is not None:
+                kwargs['wfPols'], kwargs['wfPolDerivs'] = wfPols[:,idxs], wfPolDerivs[:,:,idxs]
+            allFishers = allFishers + onp.asarray(FisherKernel(fgrids[idxs], blockWeights, *kernelParams, use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang, computeAnalyticalDeriv=computeAnalyticalDeriv, computeDerivFinDiff=computeDerivFinDiff, **kwargs))
+        
+        
+        return allFishers[...,:nEvents]
+    
+    def _block_indices(self, iStart, iEnd, nFreq):
+        """
+        Indices of the points of the frequency grids to use for a block of the grids. The waveform models use the extremes of the grid as reference frequencies (e.g. the phase is set to zero at the lowest frequency), so, unless the block covers the whole grid, the first and last points of the grid are added at its extremes.
+        
+        :param int iStart: Index of the first point of the block.
+        :param int iEnd: Index following the last point of the block.
+        :param int nFreq: Number of points of the grids.
+        
+        :return: Indices of the points to use.
+        :rtype: 1-D array
+        
+        """
+        if iEnd-iStart == nFreq:
+            return onp.arange(nFreq)
+        return onp.concatenate(([0], onp.arange(iStart, iEnd), [nFreq-1]))
+    
+    def _FisherRelError(self, newFishers, oldFishers):
+        """
+        Estimate the relative error on the elements of the FIM(s) of a detector from the values obtained on two frequency grids, see :py:class:`_AdaptiveIntegral`. The error on each element is normalised to the square root of the product of the corresponding diagonal elements, and the largest among the elements is returned.
+        
+        :param array newFishers: FIM(s) in each instrument on the finer grids. The shape is :math:`(N_{\\rm instruments}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+        :param array oldFishers: FIM(s) in each instrument on the coarser grids.
+        
+        :return: Estimated relative error(s). The shape is :math:`(N_{\\rm events})`.
+        :rtype: 1-D array
+        
+        """
+        diffFisher = onp.abs((newFishers - oldFishers).sum(axis=0))
+        diagSqrt = onp.sqrt(onp.abs(onp.einsum('iie->ie', newFishers.sum(axis=0))))
+        norm = diagSqrt[:,None,:]*diagSqrt[None,:,:]
+        with onp.errstate(divide='ignore', invalid='ignore'):
+            return onp.where(norm>0, diffFisher/norm, 0.).max(axis=(0,1))
+
+    def _FisherKernel(self, fgrids, quadWeights, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, **kwargs):
+        """
+        Compute the FIM(s) in each instrument of the detector, on given frequency grids. Unless numerical differentiation is used, this function can be jit compiled as a whole.
+        
+        :param array fgrids: The frequency grids, as in :py:class:`gwfast.signal.FrequencyGrid.fgrids`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param array quadWeights: The quadrature weights, divided by the PSD, as in :py:class:`gwfast.signal.FrequencyGrid.quadWeights`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param array Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc: The parameters of the event(s), as in :py:class:`gwfast.signal.GWSignal._SignalDerivatives`.
+        :param kwargs: Optional arguments to be passed to :py:class:`gwfast.signal.GWSignal._SignalDerivatives`.
+        
+        :return: FIM(s) in each instrument. The shape is :math:`(N_{\\rm instruments}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+        :rtype: 4-D array
+        
+        """
+        allDerivs = self._ArmDerivatives(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, **kwargs)
+        
+        allFishers = []
+        for i in range(len(allDerivs)):
+            allFishers.append(self._FisherIntegral(allDerivs[i], quadWeights))
+        
+        return np.array(allFishers)
+    
+    def _ArmDerivatives(self, fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, **kwargs):
+        """
+        Compute the derivatives of the signal(s) in each instrument of the detector, on given frequency grids, with the derivative with respect to ``tcoal`` in seconds.
+        
+        :param array fgrids: The frequency grids, as in :py:class:`gwfast.signal.FrequencyGrid.fgrids`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param array Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc: The parameters of the event(s), as in :py:class:`gwfast.signal.GWSignal._SignalDerivatives`.
+        :param kwargs: Optional arguments to be passed to :py:class:`gwfast.signal.GWSignal._SignalDerivatives`.
+        
+        :return: Derivatives of the signal(s) in each instrument. Each element has shape :math:`(N_{\\rm parameters}`, :math:`N_{\\rm events}`, :math:`N_{\\rm freq})`.
+        :rtype: list(array, array, ...)
+        
+        """
+        tcelem = self.wf_model.ParNums['tcoal']
+        
+        if self.detector_shape=='L':
+            armRots = [0.]
+        elif not self.compute2arms:
+            armRots = [0., 60., 120.]
+        else:
             # The signal in 3 arms sums to zero for geometrical reasons, so we can use this to skip some calculations
-                Aps1, Acs1 = self.GWAmplitudes(evParams, fgrids, rot=0.)
-                Atot1 = Aps1*Aps1 + Acs1*Acs1
-                Aps2, Acs2 = self.GWAmplitudes(evParams, fgrids, rot=60.)
-                Atot2 = Aps2*Aps2 + Acs2*Acs2
-                Aps3, Acs3 = - (Aps1 + Aps2), - (Acs1 + Acs2)
-                Atot3 = Aps3*Aps3 + Acs3*Acs3
-                tmpSNRsq1 = np.trapz(Atot1/strainGrids, fgrids, axis=0)
-                tmpSNRsq2 = np.trapz(Atot2/strainGrids, fgrids, axis=0)
-                tmpSNRsq3 = np.trapz(Atot3/strainGrids, fgrids, axis=0)
-                if self.DutyFactor is not None:
-                    excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                    tmpSNRsq1 = tmpSNRsq1 * excl
-                    excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                    tmpSNRsq2 = tmpSNRsq2 * excl
-                    excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                    tmpSNRsq3 = tmpSNRsq3 * excl
-                allSNRsq.append(tmpSNRsq1)
-                allSNRsq.append(tmpSNRsq2)
-                allSNRsq.append(tmpSNRsq3)
-                #SNR = np.sqrt(tmpSNRsq1 + tmpSNRsq2 + tmpSNRsq3)
-        allSNRsq = np.array(allSNRsq)
+            armRots = [0., 60.]
+        
+        if (len(armRots)>1) and (kwargs.get('wfPolDerivs') is None) and self._can_project_polarisations(computeDerivFinDiff=kwargs.get('computeDerivFinDiff', False), computeAnalyticalDeriv=kwargs.get('computeAnalyticalDeriv', True)):
+            # The arms only differ by the projection, so the derivatives of the polarisations are computed once and projected on each arm
+            kwargs['wfPols'], kwargs['wfPolDerivs'] = self._PolarisationDerivsKernel_use(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, **{k:kwargs[k] for k in ['use_m1m2', 'use_chi1chi2', 'use_prec_ang', 'deriv_mode'] if k in kwargs})
+        
+        allDerivs = []
+        for rot in armRots:
+            # Compute derivatives
+            FisherDerivs = self._SignalDerivatives_use(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=rot, **kwargs)
+            # Change the units of the tcoal derivative from days to seconds (this improves conditioning)
+            FisherDerivs = np.asarray(FisherDerivs).at[tcelem].divide(3600.*24.)
+            allDerivs.append(FisherDerivs)
+        if (self.detector_shape=='T') and (self.compute2arms):
+            allDerivs.append(- (allDerivs[0] + allDerivs[1]))
+        
+        return allDerivs
+
+
+    def _FisherKernelBinned(self, fgrids, quadWeights, edgeIdxs, binIdxs, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, **kwargs):
+        """
+        Compute the FIM(s) in each instrument of the detector with *relative binning* (or *heterodyning*). Unless numerical differentiation is used, this function can be jit compiled as a whole.
+        
+        The derivatives are written as :math:`\\partial_i h = h\\,r_i`, where the ratios :math:`r_i` are smooth functions of the frequency, since the oscillating phase of the signal cancels out. The derivatives are thus only computed at the edges of the bins, and :math:`r_i` is interpolated linearly in frequency within each bin. Defining :math:`t` as the position of a frequency inside its bin, the FIM is then a sum over the bins of the products of the ratios at the edges, with the coefficients :math:`\\sum w\\,|h|^2(1-t)^2`, :math:`\\sum w\\,|h|^2 t(1-t)` and :math:`\\sum w\\,|h|^2 t^2` (the *summary data*), where :math:`w` are the quadrature weights on the full grid and the signal is evaluated on the full grid.
+        
+        The interpolation error decreases as the square of the size of the bins. For waveforms with higher modes, the modes have different phases and their beating makes the ratios oscillate, so that many more bins are needed for the same accuracy.
+        
+        :param array fgrids: The frequency grids, as in :py:class:`gwfast.signal.FrequencyGrid.fgrids`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param array quadWeights: The quadrature weights, divided by the PSD, as in :py:class:`gwfast.signal.FrequencyGrid.quadWeights`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param array edgeIdxs: Indices of the points of the grids at the edges of the bins, including the first and last points. The shape is :math:`(N_{\\rm bins}+1)`.
+        :param array binIdxs: Index of the bin of each point of the grids. The shape is :math:`(N_{\\rm freq})`.
+        :param array Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc: The parameters of the event(s), as in :py:class:`gwfast.signal.GWSignal._SignalDerivatives`.
+        :param kwargs: Optional arguments to be passed to :py:class:`gwfast.signal.GWSignal._SignalDerivatives`.
+        
+        :return: FIM(s) in each instrument. The shape is :math:`(N_{\\rm instruments}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+        :rtype: 4-D array
+        
+        """
+        fEdges = fgrids[edgeIdxs]
+        # The edges include the extremes of the grids, so the reference frequencies of the waveform are the same as on the full grids
+        allDerivs = self._ArmDerivatives(fEdges, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, **kwargs)
+        
+        strainArgs = {'is_m1m2':kwargs.get('use_m1m2', False), 'is_chi1chi2':kwargs.get('use_chi1chi2', True), 'is_prec_ang':kwargs.get('use_prec_ang', True)}
+        if self.detector_shape=='L':
+            armRots = [0.]
+        elif not self.compute2arms:
+            armRots = [0., 60., 120.]
+        else:
+            armRots = [0., 60.]
+        allStrains = [self.GWstrain(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=rot, **strainArgs) for rot in armRots]
+        if (self.detector_shape=='T') and (self.compute2arms):
+            allStrains.append(- (allStrains[0] + allStrains[1]))
+        
+        # Position of each point of the grids inside its bin
+        t = (fgrids - fEdges[binIdxs])/(fEdges[binIdxs+1] - fEdges[binIdxs])
+        nBins = edgeIdxs.shape[0]-1
+        
+        allFishers = []
+        for i in range(len(allDerivs)):
+            strainEdges = allStrains[i][edgeIdxs].T
+            isNonZero = strainEdges!=0.
+            # The signal can vanish at the edges only where it is tapered to zero, where the bins do not contribute
+            ratios = np.where(isNonZero, allDerivs[i]/np.where(isNonZero, strainEdges, 1.), 0.)
+            weights = quadWeights*abs(allStrains[i])**2
+            summ00 = np.zeros((nBins, fgrids.shape[1])).at[binIdxs].add(weights*(1.-t)**2)
+            summ01 = np.zeros((nBins, fgrids.shape[1])).at[binIdxs].add(weights*t*(1.-t))
+            summ11 = np.zeros((nBins, fgrids.shape[1])).at[binIdxs].add(weights*t**2)
+            ratiosL, ratiosR = ratios[...,:-1], ratios[...,1:]
+            # The cross terms between the two edges of each bin are obtained from the integral of their sum
+            allFishers.append(self._FisherIntegral(ratiosL, summ00-summ01) + self._FisherIntegral(ratiosR, summ11-summ01) + self._FisherIntegral(ratiosL+ratiosR, summ01))
+        
+        return np.array(allFishers)
+    
+    def _FisherIntegral(self, FisherDerivs, quadWeights):
+        """
+        Compute the frequency integral entering the *Fisher information matrix* for all the couples of parameters and all the events at once.
+
+        The integral is written as a weighted sum over the frequency grid, so that all the elements of the matrix are obtained with a single batched matrix product. Being a sum, it can also be accumulated over consecutive blocks of the grid.
+
+        :param array FisherDerivs: The derivatives of the signal with respect to the parameters, as returned by :py:class:`gwfast.signal.GWSignal._SignalDerivatives`. The shape is :math:`(N_{\\rm parameters}`, :math:`N_{\\rm events}`, :math:`N_{\\rm freq})`.
+        :param array quadWeights: The quadrature weights, divided by the PSD, as stored in :py:class:`gwfast.signal.FrequencyGrid.quadWeights`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :return: FIM(s). The shape is :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
+        :rtype: 3-D array
+
+        """
+        # Put the events axis first, so that the sum over frequency is a batched matrix product.
+        # Re(conj(a)*b) = Re(a)*Re(b) + Im(a)*Im(b), so we can work with real arrays
+        FisherDerivs = np.asarray(FisherDerivs).transpose(1,0,2)
+        derivsRe, derivsIm = FisherDerivs.real, FisherDerivs.imag
+        weights = np.asarray(quadWeights).T[:,np.newaxis,:]
+
+        Fisher = np.matmul(derivsRe*weights, derivsRe.transpose(0,2,1)) + np.matmul(derivsIm*weights, derivsIm.transpose(0,2,1))
+        # Overall factor of 4, symmetrising to remove round-off differences between (alpha, beta) and (beta, alpha)
+        Fisher = 2.*(Fisher + Fisher.transpose(0,2,1))
+
+        return Fisher.transpose(1,2,0)
+
+
+    def _DerivArgs(self, computeAnalyticalDeriv=True):
+        """
+        Get the positions of the parameters with respect to which the derivatives of the signal are computed numerically or through automatic differentiation, among the arguments of :py:class:`GWstrain`.
         
-        if return_all:
-            if self.detector_shape=='T':
-                return 2*np.sqrt(allSNRsq)
+        :param bool, optional computeAnalyticalDeriv: Boolean specifying if the derivatives with respect to ``dL``, ``theta``, ``phi``, ``psi``, ``tcoal``, ``Phicoal`` and ``iota`` (the latter only for the fundamental mode in the non-precessing case) are computed analytically.
+        :return: The positions of the parameters, and the positions at which the analytical derivatives with respect to ``dL`` and ``iota`` have to be inserted (``None`` if ``computeAnalyticalDeriv=False``).
+        :rtype: tuple(tuple(int, ...) or int, int, int)
+        
+        """
+        inputNumdL, inputNumiota = None, None
+        if (self.wf_model.is_newtonian):
+            if computeAnalyticalDeriv:
+                derivargs = (1)
+                inputNumdL, inputNumiota = 1, 2
             else:
-                return np.squeeze(2*np.sqrt(allSNRsq), axis=0)
-        elif self.detector_shape=='T':
-            return 2*np.sqrt(allSNRsq.sum(axis=0))
+                derivargs = (1,3,4,5,6,7,8,9)
         else:
-            return np.squeeze(2*np.sqrt(allSNRsq), axis=0)
+            if computeAnalyticalDeriv:
+                if (not self.wf_model.is_HigherModes) and (not self.wf_model.is_Precessing):
+                    derivargs = (1,2,10,11,16,17)
+                elif self.wf_model.is_Precessing:
+                    derivargs = (1,2,6,10,11,12,13,14,15,16,17)
+                elif (not self.wf_model.is_Precessing) and self.wf_model.is_HigherModes:
+                    derivargs = (1,2,6,10,11,16,17)
+                inputNumdL, inputNumiota = 2, 3
+            else:
+                if not self.wf_model.is_Precessing:
+                    derivargs = (1,2,3,4,5,6,7,8,9,10,11,16,17)
+                else:
+                    derivargs = (1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17)
+        if not self.wf_model.is_tidal:
+            derivargs = derivargs[:-2]
             
-        # The factor of two arises by cutting the integral from 0 to infinity
+        if self.wf_model.is_eccentric:
+            derivargs = derivargs + (18,)
+        
+        return derivargs, inputNumdL, inputNumiota
     
+    def _select_jacobian(self, deriv_mode, nArgs, nFreq):
+        """
+        Select the ``JAX`` function to use to compute the Jacobian, see :py:class:`_SignalDerivatives`.
+        
+        :param str deriv_mode: The mode of automatic differentiation to use, among ``'fwd'``, ``'rev'`` and ``'auto'``.
+        :param int nArgs: The number of parameters with respect to which the derivatives are computed.
+        :param int nFreq: The number of frequencies at which the derivatives are computed.
+        :return: ``jax.jacfwd`` or ``jax.jacrev``.
+        :rtype: function
+        
+        """
+        # Forward mode costs one pass per input parameter, reverse mode one pass per output frequency
+        if deriv_mode=='auto':
+            deriv_mode = 'fwd' if nArgs <= nFreq else 'rev'
+        if deriv_mode=='fwd':
+            return jacfwd
+        elif deriv_mode=='rev':
+            return jacrev
+        else:
+            raise ValueError('deriv_mode has to be among \'fwd\', \'rev\' and \'auto\'.')
     
-    def FisherMatr(self, evParams, res=1000, df=None, spacing='geom', 
-                   use_m1m2=False, use_chi1chi2=True, use_prec_ang=True,
-                   computeDerivFinDiff=False, computeAnalyticalDeriv=True,
-                   return_all=False,
-                   **kwargs):
+    def _can_project_polarisations(self, computeDerivFinDiff=False, computeAnalyticalDeriv=True):
         """
-        Compute the *Fisher information matrix*, FIM, as a function of the parameters of the event(s).
+        Check if the derivatives of the signal can be obtained projecting the derivatives of the polarisations, as computed by :py:class:`_PolarisationDerivatives`, on the detector. This requires the derivatives to be computed through automatic differentiation, with ``computeAnalyticalDeriv=True``, and the motion of the Earth not to be included.
         
-        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
-        :param int res: The resolution of the frequency grid to use.
-        :param float df: The spacing of the frequency grid to use, in :math:`\\rm Hz`. Alternative to ``res``.
-        :param str spacing: The kind of spacing of the frequency grid to use. If ``'geom'`` the grid will be spaced evenly on a log scale (geometric progression), if ``'lin'`` it will be spaced evenly on a linear scale.
-        :param bool, optional use_m1m2: Boolean specifying if the FIM has to be computed with respect to the individual masses ``m1`` and ``m2`` rather than ``Mc`` and ``eta``.
-        :param bool, optional use_chi1chi2: Boolean specifying if, in the non-precessing case, the FIM has to be computed with respect to the individual spins ``chi1z`` and ``chi2z`` rather than ``chiS`` and ``chiA``.
-        :param bool, optional use_prec_ang: Boolean specifying if, in the precessing case, the FIM has to be computed with respect to the spin angular variables rather than the spin cartesian components.
-        :param bool, optional computeDerivFinDiff: Boolean specifying if the derivatives have to be computed using numerical differentiation (finite differences) through the `numdifftools <https://github.com/pbrod/numdifftools>`_ package.
-        :param bool, optional computeAnalyticalDeriv: Boolean specifying if the derivatives with respect to ``dL``, ``theta``, ``phi``, ``psi``, ``tcoal``, ``Phicoal`` and ``iota`` (the latter only for the fundamental mode in the non-precessing case) have to be computed analytically. This considerably speeds up the calculation and provides better accuracy.
-        :param bool, optional return_all: Boolean specifying if, in the case of a triangular detector, the FIMs of the individual instruments have to be returned separately. In this case the return type is *list(array, array, array)*.
-        :param kwargs: Optional arguments to be passed to :py:class:`gwfast.signal.GWSignal._SignalDerivatives`, such as ``methodNDT``.
-        :return: FIM(s) as a function of the parameters of the event(s). The shape is :math:`(N_{\\rm parameters}`, :math:`N_{\\rm parameters}`, :math:`N_{\\rm events})`.
-        :rtype: 3-D array
+        :param bool, optional computeDerivFinDiff: Boolean specifying if the derivatives are computed using numerical differentiation (finite differences).
+        :param bool, optional computeAnalyticalDeriv: Boolean specifying if the derivatives with respect to ``dL``, ``theta``, ``phi``, ``psi``, ``tcoal``, ``Phicoal`` and ``iota`` (the latter only for the fundamental mode in the non-precessing case) are computed analytically.
+        :return: Boolean specifying if the derivatives of the polarisations can be used.
+        :rtype: bool
         
         """
-        # If use_m1m2=True the Fisher is computed w.r.t. m1 and m2, not Mc and eta
-        # If use_chi1chi2=True the Fisher is computed w.r.t. chi1z and chi2z, not chiS and chiA
-        if self.DutyFactor is not None:
-            onp.random.seed(self.seedUse)
+        return (not computeDerivFinDiff) and computeAnalyticalDeriv and (not self.useEarthMotion) and (not self.wf_model.is_LAL)
+    
+    def _PolarisationDerivatives(self, evParams, fgrid, use_m1m2=False, use_chi1chi2=True, use_prec_ang=True, freq_chunk=None, deriv_mode='auto'):
+        """
+        Compute the plus and cross polarisations of the signal(s), before the projection on the detector, and their derivatives with respect to the parameters entering the waveform (i.e. all but the ones for which the derivatives are computed analytically, see :py:class:`_SignalDerivatives`).
         
-        utils.check_evparams(evParams)
+        These do not depend on the detector, so that they can be computed once for a network of detectors with the same waveform model and frequency grids, and passed to :py:class:`FisherMatr` through the argument ``wfPolDerivs``.
         
+        :param dict(array, array, ...) evParams: Dictionary containing the parameters of the event(s), as in :py:data:`events`.
+        :param FrequencyGrid fgrid: Frequency grids of the event(s), as built by :py:class:`make_fgrid`.
+        :param bool, optional use_m1m2: Boolean specifying if the derivatives have to be computed with respect to the individual masses ``m1`` and ``m2`` rather than ``Mc`` and ``eta``.
+        :param bool, optional use_chi1chi2: Boolean specifying if, in the non-precessing case, the derivatives have to be computed with respect to the individual spins ``chi1z`` and ``chi2z`` rather than ``chiS`` and ``chiA``.
+        :param bool, optional use_prec_ang: Boolean specifying if, in the precessing case, the derivatives have to be computed with respect to the spin angular variables rather than the spin cartesian components.
+        :param int, optional freq_chunk: If provided, the derivatives are computed in consecutive blocks of ``freq_chunk`` points of the frequency grid.
+        :param str deriv_mode: The mode of automatic differentiation to use, among ``'fwd'``, ``'rev'`` and ``'auto'``, see :py:class:`_SignalDerivatives`.
+        :return: Polarisations, with shape :math:`(2`, :math:`N_{\\rm freq}`, :math:`N_{\\rm events})`, and their derivatives, with shape :math:`(N_{\\rm parameters}`, :math:`2`, :math:`N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :rtype: tuple(array, array)
         
-        McOr, dL, theta, phi = evParams['Mc'].astype('complex128'), evParams['dL'].astype('complex128'), evParams['theta'].astype('complex128'), evParams['phi'].astype('complex128')
-        iota, psi, tcoal, etaOr, Phicoal = evParams['iota'].astype('complex128'), evParams['psi'].astype('complex128'), evParams['tcoal'].astype('complex128'), evParams['eta'].astype('complex128'), evParams['Phicoal'].astype('complex128')
-            
-        if use_m1m2:
-            # In this case Mc represents m1 and eta represents m2
-            Mc, eta  = utils.m1m2_from_Mceta(McOr, etaOr)
-        else:
-            Mc, eta  = McOr, etaOr
-
-        if not self.wf_model.is_Precessing:
-            try:
-                _ =evParams['chi1z']
-            except KeyError:
-                try:
-                    if self.verbose:
-                        print('Adding chi1z, chi2z from chiS, chiA')
-                    evParams['chi1z'] = evParams['chiS'] + evParams['chiA']
-                    evParams['chi2z'] = evParams['chiS'] - evParams['chiA']
-                except KeyError:
-                    raise ValueError('Two among chi1z, chi2z and chiS, chiA have to be provided.')
-                    
-            chi1z, chi2z = evParams['chi1z'].astype('complex128'), evParams['chi2z'].astype('complex128')
-            
-            if use_chi1chi2:
-            # In this case chiS represents chi1z and chiA represents chi2z
-                chiS, chiA = chi1z, chi2z
-            else:
-                chiS, chiA = 0.5*(chi1z + chi2z), 0.5*(chi1z - chi2z)
-            
-            chi1x, chi2x, chi1y, chi2y = np.zeros(Mc.shape), np.zeros(Mc.shape), np.zeros(Mc.shape), np.zeros(Mc.shape)
-            
-        else:
-            try:
-               _=evParams['chi1x']
-            except KeyError:
-                try:
-                    if self.verbose:
-                        print('Adding cartesian components of the spins from angular variables')
-                    evParams['iota'], evParams['chi1x'], evParams['chi1y'], evParams['chi1z'], evParams['chi2x'], evParams['chi2y'], evParams['chi2z'] = utils.TransformPrecessing_angles2comp(thetaJN=evParams['thetaJN'], phiJL=evParams['phiJL'], theta1=evParams['tilt1'], theta2=evParams['tilt2'], phi12=evParams['phi12'], chi1=evParams['chi1'], chi2=evParams['chi2'], Mc=evParams['Mc'], eta=evParams['eta'], fRef=self.fmin, phiRef=0.)
-                except KeyError:
-                    raise ValueError('Either the cartesian components of the precessing spins (iota, chi1x, chi1y, chi1z, chi2x, chi2y, chi2z) or their modulus and orientations (thetaJN, chi1, chi2, tilt1, tilt2, phiJL, phi12) have to be provided.')
-            if not use_prec_ang:
-                chiS, chiA = evParams['chi1z'].astype('complex128'), evParams['chi2z'].astype('complex128')
-                chi1x, chi2x, chi1y, chi2y = evParams['chi1x'].astype('complex128'), evParams['chi2x'].astype('complex128'), evParams['chi1y'].astype('complex128'), evParams['chi2y'].astype('complex128')
-            else:
-                # In this case iota=thetaJN, chi1y=phiJL, chi1x=tilt1, chi2x=tilt2, chi2y=phi12, chiS=chi1, chiA=chi2
-                iota, chi1y, chi1x, chi2x, chi2y, chiS, chiA = utils.TransformPrecessing_comp2angles(evParams['iota'].astype('complex128'), evParams['chi1x'].astype('complex128'), evParams['chi1y'].astype('complex128'), evParams['chi1z'].astype('complex128'), evParams['chi2x'].astype('complex128'), evParams['chi2y'].astype('complex128'), evParams['chi2z'].astype('complex128'), McOr, etaOr, fRef=self.fmin, phiRef=0.)
+        """
+        if self.wf_model.is_LAL:
+            raise ValueError('Using LAL or TEOBResumS waveforms it is not possible to compute the derivatives using JAX automatic differentiation routines.')
         
-        if self.wf_model.is_tidal:
-            try:
-                Lambda1, Lambda2 = evParams['Lambda1'].astype('complex128'), evParams['Lambda2'].astype('complex128')
-            except KeyError:
-                try:
-                    Lambda1, Lambda2  = utils.Lam12_from_Lamt_delLam(evParams['LambdaTilde'].astype('complex128'), evParams['deltaLambda'].astype('complex128'), etaOr)
-                except KeyError:
-                    raise ValueError('Two among Lambda1, Lambda2 and LambdaTilde and deltaLambda have to be provided.')
-            LambdaTilde, deltaLambda = utils.Lamt_delLam_from_Lam12(Lambda1, Lambda2, etaOr)
-            
-        else:
-            Lambda1, Lambda2, LambdaTilde, deltaLambda = np.zeros(Mc.shape), np.zeros(Mc.shape), np.zeros(Mc.shape), np.zeros(Mc.shape)
+        utils.check_evparams(evParams)
+        nEvents = len(evParams['Mc'])
+        fgrid.check_nevents(nEvents)
         
-        if self.wf_model.is_eccentric:
-            try:
-                ecc = evParams['ecc'].astype('complex128')
-            except KeyError:
-                raise ValueError('Eccentricity has to be provided.')
+        if self.jitCompileKernels:
+            # Pad the batch, so that the compiled functions are reused for different numbers of events and the events can be split among the devices
+            nPad = self._batch_size(nEvents)
         else:
-            ecc = np.zeros(Mc.shape)
-            
-        fcut = self.wf_model.fcut(**evParams)
-        
-        if self.fmax is not None:
-            fcut = np.where(fcut > self.fmax, self.fmax, fcut)
+            nPad = nEvents
+        
+        kernelParams = [self._shard_batch(utils.pad_batch(x, nPad)) for x in self._FisherParams(evParams, use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang)]
+        fgrids = self._shard_batch(utils.pad_batch(fgrid.fgrids, nPad))
+        
+        nFreq = fgrids.shape[0]
+        if freq_chunk is None:
+            freq_chunk = nFreq
+        elif freq_chunk < 1:
+            raise ValueError('freq_chunk has to be a positive integer.')
+        
+        allPols, allDerivs = [], []
+        for iStart in range(0, nFreq, int(freq_chunk)):
+            iEnd = min(iStart+int(freq_chunk), nFreq)
+            idxs = self._block_indices(iStart, iEnd, nFreq)
+            # Remove the extremes of the grid added to the block
+            keep = slice(0, None) if len(idxs)==nFreq else slice(1, -1)
+            wfPols, wfPolDerivs = self._PolarisationDerivsKernel_use(fgrids[idxs], *kernelParams, use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang, deriv_mode=deriv_mode)
+            allPols.append(wfPols[...,keep,:nEvents])
+            allDerivs.append(wfPolDerivs[...,keep,:nEvents])
+        
+        return np.concatenate(allPols, axis=-2), np.concatenate(allDerivs, axis=-2)
+    
+    def _PolarisationDerivsKernel(self, fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, use_m1m2=False, use_chi1chi2=True, use_prec_ang=True, deriv_mode='auto'):
+        """
+        Compute the plus and cross polarisations of the signal(s), before the projection on the detector, and their derivatives through automatic differentiation, on given frequency grids. This function can be jit compiled as a whole.
         
-        fminarr = np.full(fcut.shape, self.fmin)
-        if res is None and df is not None:
-            res = np.floor( np.real((1+(fcut-fminarr)/df)))
-            res = np.amax(res)
-        elif res is None and df is None:
-            raise ValueError('Provide either resolution in frequency or step size.')
-        if spacing=='lin':
-            fgrids = np.linspace(fminarr, fcut, num=int(res))
-        elif spacing=='geom':
-            fgrids = np.geomspace(fminarr, fcut, num=int(res))
-            
-        # Out of the provided PSD range, we use a constant value of 1, which results in completely negligible conntributions
-        strainGrids = np.interp(fgrids, self.strainFreq, self.noiseCurve, left=1., right=1.)
-
-        nParams = self.wf_model.nParams
-        tcelem = self.wf_model.ParNums['tcoal']
+        :param array fgrids: The frequency grids, as in :py:class:`gwfast.signal.FrequencyGrid.fgrids`. The shape is :math:`(N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param array Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc: The parameters of the event(s), as in :py:class:`gwfast.signal.GWSignal._SignalDerivatives`.
+        :return: Polarisations, with shape :math:`(2`, :math:`N_{\\rm freq}`, :math:`N_{\\rm events})`, and their derivatives, with shape :math:`(N_{\\rm parameters}`, :math:`2`, :math:`N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :rtype: tuple(array, array)
         
-        if (self.wf_model.is_LAL) and (not computeDerivFinDiff):
-            computeDerivFinDiff=True
-            if self.verbose:
-                print('Using LAL or TEOBResumS waveforms it is not possible to compute the derivatives using JAX automatic differentiation routines, being the functions written in C. Proceeding using numdifftools for numerical differentiation (finite differences)')
-            
-        allFishers=[]
+        """
+        derivargs, _, _ = self._DerivArgs(computeAnalyticalDeriv=True)
+        jacUse = self._select_jacobian(deriv_mode, onp.size(derivargs), fgrids.shape[0])
         
-        if self.detector_shape=='L': 
-            # Compute derivatives
-            FisherDerivs = self._SignalDerivatives_use(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=0., use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang, computeAnalyticalDeriv=computeAnalyticalDeriv, computeDerivFinDiff=computeDerivFinDiff, **kwargs)
-            # Change the units of the tcoal derivative from days to seconds (this improves conditioning)
-            FisherDerivs = onp.array(FisherDerivs)
-            FisherDerivs[tcelem,:,:] /= (3600.*24.)
+        if self.wf_model.is_holomorphic:
+            def WFPolsUse(f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc):
+                wfPols = self._WFPolarisations(f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, is_m1m2=use_m1m2, is_chi1chi2=use_chi1chi2, is_prec_ang=use_prec_ang)
+                return wfPols, wfPols
             
-            FisherIntegrands = (onp.conjugate(FisherDerivs[:,:,onp.newaxis,:])*FisherDerivs.transpose(1,0,2))
-    
-            Fisher = onp.zeros((nParams,nParams,len(Mc)))
-            # This for is unavoidable
-            for alpha in range(nParams):
-                for beta in range(alpha,nParams):
-                    tmpElem = FisherIntegrands[alpha,:,beta,:].T
-                    Fisher[alpha,beta, :] = onp.trapz(tmpElem.real/strainGrids.real, fgrids.real, axis=0)*4.
-
-                    Fisher[beta,alpha, :] = Fisher[alpha,beta, :]
-            if self.DutyFactor is not None:
-                excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                Fisher = Fisher*excl
-            allFishers.append(Fisher)
+            wfPolDerivs, wfPols = vmap(jacUse(WFPolsUse, argnums=derivargs, holomorphic=True, has_aux=True))(fgrids.T, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc)
+            wfPolDerivs = np.asarray(wfPolDerivs)
         else:
-            #Fisher = onp.zeros((nParams,nParams,len(Mc)))
-            if not self.compute2arms:
-                for i in range(3):
-                    # Change rot and compute derivatives
-                    FisherDerivs = self._SignalDerivatives_use(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=i*60., use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang, computeAnalyticalDeriv=computeAnalyticalDeriv, computeDerivFinDiff=computeDerivFinDiff, **kwargs)
-                    # Change the units of the tcoal derivative from days to seconds (this improves conditioning)
-                    FisherDerivs = onp.array(FisherDerivs)
-                    FisherDerivs[tcelem,:,:] /= (3600.*24.)
-                    FisherIntegrands = (onp.conjugate(FisherDerivs[:,:,onp.newaxis,:])*FisherDerivs.transpose(1,0,2))
-                    
-                    tmpFisher = onp.zeros((nParams,nParams,len(Mc)))
-                    # This for is unavoidable
-                    if self.verbose:
-                        print('Filling matrix for arm %s...'%(i+1))
-
-                    for alpha in range(nParams):
-                        for beta in range(alpha,nParams):
-                            tmpElem = FisherIntegrands[alpha,:,beta,:].T
-                            tmpFisher[alpha,beta, :] = onp.trapz(tmpElem.real/strainGrids.real, fgrids.real, axis=0)*4.
-                            
-                            tmpFisher[beta,alpha, :] = tmpFisher[alpha,beta, :]
-                    if self.DutyFactor is not None:
-                        excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                        tmpFisher = tmpFisher*excl
-                    allFishers.append(tmpFisher)
-                    #Fisher += tmpFisher
-            else:
-            # The signal in 3 arms sums to zero for geometrical reasons, so we can use this to skip some calculations
+            # As in _SignalDerivatives, the derivatives of the real and imaginary parts are computed as real functions
+            fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc = np.real(fgrids), np.real(Mc), np.real(eta), np.real(dL), np.real(theta), np.real(phi), np.real(iota), np.real(psi), np.real(tcoal), np.real(Phicoal), np.real(chiS), np.real(chiA), np.real(chi1x), np.real(chi2x), np.real(chi1y), np.real(chi2y), np.real(LambdaTilde), np.real(deltaLambda), np.real(ecc)
             
-                # Compute derivatives
-                FisherDerivs1 = self._SignalDerivatives_use(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=0., use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang, computeAnalyticalDeriv=computeAnalyticalDeriv, computeDerivFinDiff=computeDerivFinDiff, **kwargs)
-                # Change the units of the tcoal derivative from days to seconds (this improves conditioning)
-                FisherDerivs1 = onp.array(FisherDerivs1)
-                FisherDerivs1[tcelem,:,:] /= (3600.*24.)
-
-                FisherIntegrands = (onp.conjugate(FisherDerivs1[:,:,onp.newaxis,:])*FisherDerivs1.transpose(1,0,2))
-                    
-                tmpFisher = onp.zeros((nParams,nParams,len(Mc)))
-                if self.verbose:
-                    print('Filling matrix for arm 1...')
-                # This for is unavoidable
-                for alpha in range(nParams):
-                    for beta in range(alpha,nParams):
-                        tmpElem = FisherIntegrands[alpha,:,beta,:].T
-                        tmpFisher[alpha,beta, :] = onp.trapz(tmpElem.real/strainGrids.real, fgrids.real, axis=0)*4.
-                            
-                        tmpFisher[beta,alpha, :] = tmpFisher[alpha,beta, :]
-                if self.DutyFactor is not None:
-                    excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                    tmpFisher = tmpFisher*excl
-                #Fisher += tmpFisher
-                allFishers.append(tmpFisher)
-                
-                
-                FisherDerivs2 = self._SignalDerivatives_use(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=60., use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang, computeAnalyticalDeriv=computeAnalyticalDeriv, computeDerivFinDiff=computeDerivFinDiff, **kwargs)
-                FisherDerivs2 = onp.array(FisherDerivs2)
-                FisherDerivs2[tcelem,:,:] /= (3600.*24.)
-                FisherIntegrands = (onp.conjugate(FisherDerivs2[:,:,onp.newaxis,:])*FisherDerivs2.transpose(1,0,2))
-                    
-                tmpFisher = onp.zeros((nParams,nParams,len(Mc)))
-                # This for is unavoidable
-                if self.verbose:
-                    print('Filling matrix for arm 2...')
-                for alpha in range(nParams):
-                    for beta in range(alpha,nParams):
-                        tmpElem = FisherIntegrands[alpha,:,beta,:].T
-                        tmpFisher[alpha,beta, :] = onp.trapz(tmpElem.real/strainGrids.real, fgrids.real, axis=0)*4.
-                            
-                        tmpFisher[beta,alpha, :] = tmpFisher[alpha,beta, :]
-                if self.DutyFactor is not None:
-                    excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                    tmpFisher = tmpFisher*excl
-                #Fisher += tmpFisher
-                allFishers.append(tmpFisher)
-                
-                FisherDerivs3 = - (FisherDerivs1 + FisherDerivs2)
-                    
-                FisherIntegrands = (onp.conjugate(FisherDerivs3[:,:,onp.newaxis,:])*FisherDerivs3.transpose(1,0,2))
-                    
-                tmpFisher = onp.zeros((nParams,nParams,len(Mc)))
-                # This for is unavoidable
-                if self.verbose:
-                    print('Filling matrix for arm 3...')
-                for alpha in range(nParams):
-                    for beta in range(alpha,nParams):
-                        tmpElem = FisherIntegrands[alpha,:,beta,:].T
-                        tmpFisher[alpha,beta, :] = onp.trapz(tmpElem.real/strainGrids.real, fgrids.real, axis=0)*4.
-                            
-                        tmpFisher[beta,alpha, :] = tmpFisher[alpha,beta, :]
-                if self.DutyFactor is not None:
-                    excl = onp.random.choice([0,1],len(evParams['Mc']), p=[1.-self.DutyFactor,self.DutyFactor])
-                    tmpFisher = tmpFisher*excl
-                #Fisher += tmpFisher
-                allFishers.append(tmpFisher)
+            def WFPolsUse_realimag(f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc):
+                wfPols = self._WFPolarisations(f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, is_m1m2=use_m1m2, is_chi1chi2=use_chi1chi2, is_prec_ang=use_prec_ang)
+                return np.stack((np.real(wfPols), np.imag(wfPols))), wfPols
             
-        if return_all:
-            return allFishers
-        elif self.detector_shape=='T':
-            return onp.array(allFishers).sum(axis=0)
-        else:
-            return allFishers[0]
-    
-    
+            realimagDerivs, wfPols = vmap(jacUse(WFPolsUse_realimag, argnums=derivargs, has_aux=True))(fgrids.T, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc)
+            realimagDerivs = np.asarray(realimagDerivs)
+            wfPolDerivs = realimagDerivs[...,0,:,:] + 1j*realimagDerivs[...,1,:,:]
+        
+        if onp.isscalar(derivargs):
+            wfPolDerivs = wfPolDerivs[np.newaxis]
+        
+        # Put the frequencies and events axes last, as in the frequency grids
+        return wfPols.transpose(1,2,0), wfPolDerivs.transpose(0,2,3,1)
     
-    def _SignalDerivatives(self, fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=0., use_m1m2=False, use_chi1chi2=True, use_prec_ang=True, computeDerivFinDiff=False, computeAnalyticalDeriv=True, stepNDT=MaxStepGenerator(base_step=1e-5), methodNDT='central', **kwargs):
+    def _SignalDerivatives(self, fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=0., use_m1m2=False, use_chi1chi2=True, use_prec_ang=True, computeDerivFinDiff=False, computeAnalyticalDeriv=True, stepNDT=MaxStepGenerator(base_step=1e-5), methodNDT='central', deriv_mode='auto', wfPols=None, wfPolDerivs=None, **kwargs):
         """
         Compute the derivatives of the GW strain with respect to the parameters of the event(s) at given frequencies (in :math:`\\rm Hz`).
         
@@ -1062,6 +1941,9 @@ class GWSignal(object):
         :param stepNDT: The step size to use in the computation with numerical differentiation (finite differences).
         :type stepNDT: float or numdifftools.step_generators.MaxStepGenerator
         :param str methodNDT: The method to use in the computation with numerical differentiation (finite differences). This can be ``'central'``, ``'complex'``, ``'multicomplex'``, ``'forward'`` or ``'backward'``.
+        :param str deriv_mode: The mode of automatic differentiation to use with JAX. This can be ``'fwd'`` (forward mode, through ``jax.jacfwd``), ``'rev'`` (reverse mode, through ``jax.jacrev``) or ``'auto'``. Forward mode requires one pass per parameter and reverse mode one pass per frequency, so that ``'auto'`` chooses forward mode if the number of parameters to differentiate is smaller than the number of frequencies, which is almost always the case. The result does not depend on this choice up to numerical round-off.
+        :param array, optional wfPols: Plus and cross polarisations of the signal(s), before the projection on the detector, as returned by :py:class:`_PolarisationDerivatives`. The shape is :math:`(2`, :math:`N_{\\rm freq}`, :math:`N_{\\rm events})`.
+        :param array, optional wfPolDerivs: Derivatives of the plus and cross polarisations of the signal(s) with respect to the parameters entering the waveform, as returned by :py:class:`_PolarisationDerivatives`. The shape is :math:`(N_{\\rm parameters}`, :math:`2`, :math:`N_{\\rm freq}`, :math:`N_{\\rm events})`. If provided together with ``wfPols``, the waveform is not evaluated and only the projection on the detector is computed, which requires ``computeAnalyticalDeriv=True`` and no motion of the Earth.
         :return: Complete signal strain derivatives (complex), evaluated at the given parameters and frequency(ies).
         :rtype: array
         
@@ -1074,50 +1956,40 @@ class GWSignal(object):
         if (self.wf_model.is_newtonian):
             if self.verbose:
                 print('WARNING: In the Newtonian inspiral case the mass ratio and spins do not enter the waveform, and the corresponding Fisher matrix elements vanish, we then discard them.\n')
-            
-            if computeAnalyticalDeriv:
-                derivargs = (1)
-                inputNumdL, inputNumiota = 1, 2
-            else:
-                derivargs = (1,3,4,5,6,7,8,9)
-        else:
-            if computeAnalyticalDeriv:
-                if (not self.wf_model.is_HigherModes) and (not self.wf_model.is_Precessing):
-                    derivargs = (1,2,10,11,16,17)
-                elif self.wf_model.is_Precessing:
-                    derivargs = (1,2,6,10,11,12,13,14,15,16,17)
-                elif (not self.wf_model.is_Precessing) and self.wf_model.is_HigherModes:
-                    derivargs = (1,2,6,10,11,16,17)
-                inputNumdL, inputNumiota = 2, 3
-            else:
-                if not self.wf_model.is_Precessing:
-                    derivargs = (1,2,3,4,5,6,7,8,9,10,11,16,17)
-                else:
-                    derivargs = (1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17)
-        if not self.wf_model.is_tidal:
-            derivargs = derivargs[:-2]
-            
-        if self.wf_model.is_eccentric:
-            derivargs = derivargs + (18,)
+        
+        derivargs, inputNumdL, inputNumiota = self._DerivArgs(computeAnalyticalDeriv=computeAnalyticalDeriv)
         
         nParams = self.wf_model.nParams
         
-        if not computeDerivFinDiff:
+        if (wfPolDerivs is not None) and (not computeDerivFinDiff):
+            # The derivatives of the polarisations with respect to the parameters entering the waveform are given, so that only the projection on the detector is needed
+            if not self.wf_model.is_holomorphic:
+                fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc = np.real(fgrids), np.real(Mc), np.real(eta), np.real(dL), np.real(theta), np.real(phi), np.real(iota), np.real(psi), np.real(tcoal), np.real(Phicoal), np.real(chiS), np.real(chiA), np.real(chi1x), np.real(chi2x), np.real(chi1y), np.real(chi2y), np.real(LambdaTilde), np.real(deltaLambda), np.real(ecc)
+            
+            Fp, Fc, phaseFac = self._PolarisationProjection(fgrids, theta, phi, psi, tcoal, Phicoal, rot=rot)
+            FisherDerivs = ((wfPolDerivs[:,0]*Fp + wfPolDerivs[:,1]*Fc)*phaseFac).transpose(0,2,1)
+            if onp.isscalar(derivargs):
+                FisherDerivs = FisherDerivs[0]
+        
+        elif not computeDerivFinDiff:
+            jacUse = self._select_jacobian(deriv_mode, onp.size(derivargs), fgrids.shape[0])
+            
             if self.wf_model.is_holomorphic:
                 GWstrainUse = lambda f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc: self.GWstrain(f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=rot, is_m1m2=use_m1m2, is_chi1chi2=use_chi1chi2, is_prec_ang=use_prec_ang)
                 
-                FisherDerivs = np.asarray(vmap(jacrev(GWstrainUse, argnums=derivargs, holomorphic=True))(fgrids.T, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc))
+                FisherDerivs = np.asarray(vmap(jacUse(GWstrainUse, argnums=derivargs, holomorphic=True))(fgrids.T, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc))
             else:
                 # In the non holomorphic case, to improve the accuracy, we compute separately the derivatives of the real and imaginary part of the strain as real functions
+                # Both are stacked in the output of a single function, so that the waveform is evaluated only once
                 fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc = np.real(fgrids), np.real(Mc), np.real(eta), np.real(dL), np.real(theta), np.real(phi), np.real(iota), np.real(psi), np.real(tcoal), np.real(Phicoal), np.real(chiS), np.real(chiA), np.real(chi1x), np.real(chi2x), np.real(chi1y), np.real(chi2y), np.real(LambdaTilde), np.real(deltaLambda), np.real(ecc)
                 
-                GWstrainUse_real = lambda f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc: np.real(self.GWstrain(f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=rot, is_m1m2=use_m1m2, is_chi1chi2=use_chi1chi2, is_prec_ang=use_prec_ang))
-                GWstrainUse_imag = lambda f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc: np.imag(self.GWstrain(f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=rot, is_m1m2=use_m1m2, is_chi1chi2=use_chi1chi2, is_prec_ang=use_prec_ang))
+                def GWstrainUse_realimag(f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc):
+                    GWstrain = self.GWstrain(f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=rot, is_m1m2=use_m1m2, is_chi1chi2=use_chi1chi2, is_prec_ang=use_prec_ang)
+                    return np.stack((np.real(GWstrain), np.imag(GWstrain)))
                 
-                realDerivs = np.asarray(vmap(jacrev(GWstrainUse_real, argnums=derivargs))(fgrids.T, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc))
-                imagDerivs = np.asarray(vmap(jacrev(GWstrainUse_imag, argnums=derivargs))(fgrids.T, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc))
-            
-                FisherDerivs = realDerivs + 1j*imagDerivs
+                realimagDerivs = np.asarray(vmap(jacUse(GWstrainUse_realimag, argnums=derivargs))(fgrids.T, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc))
+                
+                FisherDerivs = realimagDerivs[...,0,:] + 1j*realimagDerivs[...,1,:]
         else:
             if self.wf_model.is_newtonian:
                 if computeAnalyticalDeriv:
@@ -1218,7 +2090,7 @@ class GWSignal(object):
             else:
                 NAnalyticalDerivs = 6
                 
-            dL_deriv, theta_deriv, phi_deriv, iota_deriv, psi_deriv, tc_deriv, Phicoal_deriv = self._AnalyticalDerivatives(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=rot, use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang)
+            dL_deriv, theta_deriv, phi_deriv, iota_deriv, psi_deriv, tc_deriv, Phicoal_deriv = self._AnalyticalDerivatives(fgrids, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=rot, use_m1m2=use_m1m2, use_chi1chi2=use_chi1chi2, use_prec_ang=use_prec_ang, wfPols=wfPols)
             if (not self.wf_model.is_HigherModes) and (not self.wf_model.is_Precessing):
                 if not self.wf_model.is_newtonian:
                     tmpsplit1, tmpsplit2, _ = onp.vsplit(FisherDerivs, onp.array([inputNumdL, nParams-NAnalyticalDerivs]))
@@ -1231,7 +2103,7 @@ class GWSignal(object):
         
         return FisherDerivs
         
-    def _AnalyticalDerivatives(self, f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=0., use_m1m2=False, use_chi1chi2=False, use_prec_ang=False):
+    def _AnalyticalDerivatives(self, f, Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, rot=0., use_m1m2=False, use_chi1chi2=False, use_prec_ang=False, wfPols=None):
         """
         Compute analytical derivatives with respect to ``dL``, ``theta``, ``phi``, ``psi``, ``tcoal``, ``Phicoal`` and ``iota`` (the latter only for the fundamental mode in the non-precessing case).
         
@@ -1258,54 +2130,24 @@ class GWSignal(object):
         :param bool, optional use_m1m2: Boolean specifying if the ``Mc`` and ``eta`` inputs should be interpreted as the primary and secondary mass(es).
         :param bool, optional use_chi1chi2: Boolean specifying if the ``chiS`` and ``chiA`` inputs should be interpreted as the primary and secondary spin components along the axis :math:`z`.
         :param bool, optional use_prec_ang: Boolean specifying if the ``iota`` input should be interpreted as the inclination angle with respect to total angular momentum, ``chiS`` and ``chiA`` as the primary and secondary spin magnitudes, ``chi1x`` and ``chi2x`` as the primary and secondary spin tilts, ``chi1y`` as the azimuthal angle of orbital angular momentum relative to total angular momentum and ``chi2y`` as the difference in azimuthal angle between spin vectors.
+        :param array, optional wfPols: Plus and cross polarisations of the signal(s), before the projection on the detector, as returned by :py:class:`_WFPolarisations`. If provided, the waveform is not evaluated.
         :return: Analytical derivatives with respect to ``dL``, ``theta``, ``phi``, ``iota``, ``psi``, ``tcoal`` and ``Phicoal``. If the :py:class:`self.wf_model` is precessing or includes higher order modes the derivative with respect to ``iota`` will be ``None``
         :rtype: tuple(array, array, array, array, array, array, array)
         
         """
         # Module to compute analytically the derivatives w.r.t. dL, theta, phi, psi, tcoal, Phicoal and also iota in absence of HM or precessing spins. Each derivative is inserted into its own function with representative name, for ease of check.
-        if use_m1m2:
-            # Interpret Mc as m1 and eta as m2
-            McUse, etaUse = utils.Mceta_from_m1m2(Mc, eta)
-        else:
-            McUse  = Mc
-            etaUse = eta
-            
-        if not self.wf_model.is_Precessing:
-            if use_chi1chi2:
-                # Interpret chiS as chi1z and chiA as chi2z
-                chi1z = chiS
-                chi2z = chiA
-            else:
-                chi1z = chiS + chiA
-                chi2z = chiS - chiA
-            chi1xUse, chi2xUse, chi1yUse, chi2yUse = McUse*0., McUse*0., McUse*0., McUse*0.
-        else:
-            if not use_prec_ang:
-                chi1z = chiS
-                chi2z = chiA
-                chi1xUse = chi1x
-                chi2xUse = chi2x
-                chi1yUse = chi1y
-                chi2yUse = chi2y
-            else:
-            # convert angles and iota
-                iota, chi1xUse, chi1yUse, chi1z, chi2xUse, chi2yUse, chi2z = utils.TransformPrecessing_angles2comp(thetaJN=iota, phiJL=chi1y, theta1=chi1x, theta2=chi2x, phi12=chi2y, chi1=chiS, chi2=chiA, Mc=McUse, eta=etaUse, fRef=self.fmin, phiRef=0.)
-                
-        evParams = {'Mc':McUse, 'dL':dL, 'theta':theta, 'phi':phi, 'iota':iota, 'psi':psi, 'tcoal':tcoal, 'eta':etaUse, 'Phicoal':Phicoal, 'chi1z':chi1z, 'chi2z':chi2z, 'chi1x':chi1xUse, 'chi2x':chi2xUse, 'chi1y':chi1yUse, 'chi2y':chi2yUse}
-        
-        if self.wf_model.is_tidal:
-            Lambda1, Lambda2 = utils.Lam12_from_Lamt_delLam(LambdaTilde, deltaLambda, etaUse)
-            
-            evParams['Lambda1'] = Lambda1
-            evParams['Lambda2'] = Lambda2
-            
-        if self.wf_model.is_eccentric:
-            evParams['ecc'] = ecc
-        
-        if (not self.wf_model.is_HigherModes) and (not self.wf_model.is_Precessing):
+        evParams = self._WFParams(Mc, eta, dL, theta, phi, iota, psi, tcoal, Phicoal, chiS, chiA, chi1x, chi2x, chi1y, chi2y, LambdaTilde, deltaLambda, ecc, is_m1m2=use_m1m2, is_chi1chi2=use_chi1chi2, is_prec_ang=use_prec_ang)
+        iota = evParams['iota']
+        
+        if wfPols is not None:
+            wfhp, wfhc = wfPols[0], wfPols[1]
+            # The signal without the dependence on the inclination angle, needed for the derivative with respect to iota
+            wfhNoIota = 2.*wfhp/(1.+(np.cos(iota))**2)
+        elif (not self.wf_model.is_HigherModes) and (not self.wf_model.is_Precessing):
             wfPhiGw = self.wf_model.Phi(f, **evParams)
             wfAmpl  = self.wf_model.Ampl(f, **evParams)
-            wfhp, wfhc = wfAmpl*np.exp(-1j*wfPhiGw)*0.5*(1.+(np.cos(iota))**2), 1j*wfAmpl*np.exp(-1j*wfPhiGw)*np.cos(iota)
+            wfhNoIota = wfAmpl*np.exp(-1j*wfPhiGw)
+            wfhp, wfhc = wfhNoIota*0.5*(1.+(np.cos(iota))**2), 1j*wfhNoIota*np.cos(iota)
         else:
             # If the waveform includes higher modes, it is not possible to compute amplitude and phase separately, make all together
             wfhp, wfhc = self.wf_model.hphc(f, **evParams)
@@ -1498,7 +2340,7 @@ class GWSignal(object):
         def iota_par_deriv():
             
             if (not self.wf_model.is_HigherModes) and (not self.wf_model.is_Precessing):
-                wfhp_iotader, wfhc_iotader = -wfAmpl*np.exp(-1j*wfPhiGw)*(np.cos(iota)*np.sin(iota)), -1j*wfAmpl*np.exp(-1j*wfPhiGw)*np.sin(iota)
+                wfhp_iotader, wfhc_iotader = -wfhNoIota*(np.cos(iota)*np.sin(iota)), -1j*wfhNoIota*np.sin(iota)
                 return wfhp_iotader*Fp*np.exp(1j*(2.*np.pi*f*(tcoal*3600.*24.) - Phicoal + phiD + phiL)) + wfhc_iotader*Fc*np.exp(1j*(2.*np.pi*f*(tcoal*3600.*24.) - Phicoal + phiD + phiL))
             else:
                 # This derivative is computed numerically if the waveform contains higher modes
@@ -1660,7 +2502,7 @@ class GWSignal(object):
                 
                 fminarr = np.full(fcut.shape, self.fmin)
                 fgrids = np.geomspace(fminarr,fcut,num=int(5000))
-                strainGrids = np.interp(fgrids, self.strainFreq, self.noiseCurve, left=1., right=1.)
+                strainGrids = self._PSDInterp(fgrids)
                 
                 for m in range(4):
                     tmpIntegrandC = IntegrandC(fgrids, Mc, tcoal, m+1.)
@@ -1687,7 +2529,7 @@ class GWSignal(object):
         
         return SNR
             
-    def WFOverlap(self, WF1, WF2, evParams1, evParams2, res=1000, return_separate=False, **kwargs):
+    def WFOverlap(self, WF1, WF2, evParams1, evParams2, res=1000, return_separate=False, fgrid=None, quadrature='trapz', **kwargs):
         """
         Compute the *overlap* of two waveforms in a single detector on two sets of parameters, for one or multiple events.
         
@@ -1697,6 +2539,8 @@ class GWSignal(object):
         :param dict(array, array, ...) evParams2: Dictionary containing the parameters of the event(s) for the second waveform model, as in :py:data:`events`.
         :param int res: The resolution of the frequency grid to use.
         :param bool, optional return_all: Boolean specifying if, instead of returning the overlap, the function has to return separately product at the numerator of the definition, :math:`(h_1|h_2)`, and the SNRs at the denominator. This is needed to compute the overlap for a detector network. In this case the return type is *tuple(array, array, array)*.
+        :param FrequencyGrid, optional fgrid: Frequency grids of the event(s), as built by :py:class:`make_fgrid`. If provided, ``res`` is not used. Notice that the grids have to extend up to the highest among the cut frequencies of the two waveforms.
+        :param str, optional quadrature: The quadrature rule to use, among ``'trapz'``, ``'simpson'`` and ``'gauss'``, see :py:class:`make_fgrid`. This is only used if ``fgrid`` is not provided.
         :param unused kwargs: Optional arguments.
         
         :return: Overlap(s) of the two waveforms. The shape is :math:`(N_{\\rm events})`.
@@ -1786,61 +2630,60 @@ class GWSignal(object):
 
         fcutUse = np.where(fcut1>fcut2, fcut1, fcut2)
 
-        if self.fmax is not None:
-            fcutUse = np.where(fcutUse > self.fmax, self.fmax, fcut1)
-        fminarr = np.full(fcutUse.shape, self.fmin)
-
-        fgrids = np.geomspace(fminarr,fcutUse,num=int(res))
-        # Out of the provided PSD range, we use a constant value of 1, which results in completely negligible conntributions
-        strainGrids = np.interp(fgrids, self.strainFreq, self.noiseCurve, left=1., right=1.)
-
+        if fgrid is None:
+            fgrid = self.make_fgrid(evParams1, res=res, fcut=fcutUse, quadrature=quadrature)
+        else:
+            fgrid.check_nevents(len(evParams1['Mc']))
+        fgrids, quadWeights = fgrid.fgrids, fgrid.quadWeights
+        
         # This is a horrible way of changing the waveform, but the fastest to implement
-        WFor = copy.deepcopy(self.wf_model)
+        # Keep a reference to the original object, so that it is still shared with the other detectors of a network after being restored
+        WFor = self.wf_model
 
         if self.detector_shape=='L':
             self.wf_model = WF1
             h1 = self.GWstrain(fgrids, evParams1['Mc'], evParams1['eta'], evParams1['dL'], evParams1['theta'], evParams1['phi'], evParams1['iota'], evParams1['psi'], evParams1['tcoal'], evParams1['Phicoal'], evParams1['chi1z'], evParams1['chi2z'], evParams1['chi1x'], evParams1['chi2x'], evParams1['chi1y'], evParams1['chi2y'], evParams1['LambdaTilde'], evParams1['deltaLambda'], evParams1['ecc'], is_chi1chi2=True)
             h1sq = np.conjugate(h1)*h1
-            SNRh1 = np.sqrt(4.*np.trapz(h1sq.real/strainGrids, fgrids, axis=0))
+            SNRh1 = np.sqrt(4.*np.sum(h1sq.real*quadWeights, axis=0))
             self.wf_model = WF2
             h2 = self.GWstrain(fgrids, evParams2['Mc'], evParams2['eta'], evParams2['dL'], evParams2['theta'], evParams2['phi'], evParams2['iota'], evParams2['psi'], evParams2['tcoal'], evParams2['Phicoal'], evParams2['chi1z'], evParams2['chi2z'], evParams2['chi1x'], evParams2['chi2x'], evParams2['chi1y'], evParams2['chi2y'], evParams2['LambdaTilde'], evParams2['deltaLambda'], evParams2['ecc'], is_chi1chi2=True)
             h2sq = np.conjugate(h2)*h2
-            SNRh2 = np.sqrt(4.*np.trapz(h2sq.real/strainGrids, fgrids, axis=0))
+            SNRh2 = np.sqrt(4.*np.sum(h2sq.real*quadWeights, axis=0))
 
             overlap_h1h2 = h1*np.conjugate(h2)
-            overlap_int= 4.*np.trapz(overlap_h1h2.real/strainGrids, fgrids, axis=0)
+            overlap_int= 4.*np.sum(overlap_h1h2.real*quadWeights, axis=0)
 
         elif self.detector_shape=='T':
             self.wf_model = WF1
             h1_1 = self.GWstrain(fgrids, evParams1['Mc'], evParams1['eta'], evParams1['dL'], evParams1['theta'], evParams1['phi'], evParams1['iota'], evParams1['psi'], evParams1['tcoal'], evParams1['Phicoal'], evParams1['chi1z'], evParams1['chi2z'], evParams1['chi1x'], evParams1['chi2x'], evParams1['chi1y'], evParams1['chi2y'], evParams1['LambdaTilde'], evParams1['deltaLambda'], evParams1['ecc'], is_chi1chi2=True, rot=0.)
             h1_1sq = np.conjugate(h1_1)*h1_1
-            SNRh1_1sq = 4.*np.trapz(h1_1sq.real/strainGrids, fgrids, axis=0)
+            SNRh1_1sq = 4.*np.sum(h1_1sq.real*quadWeights, axis=0)
             h1_2 = self.GWstrain(fgrids, evParams1['Mc'], evParams1['eta'], evParams1['dL'], evParams1['theta'], evParams1['phi'], evParams1['iota'], evParams1['psi'], evParams1['tcoal'], evParams1['Phicoal'], evParams1['chi1z'], evParams1['chi2z'], evParams1['chi1x'], evParams1['chi2x'], evParams1['chi1y'], evParams1['chi2y'], evParams1['LambdaTilde'], evParams1['deltaLambda'], evParams1['ecc'], is_chi1chi2=True, rot=60.)
             h1_2sq = np.conjugate(h1_2)*h1_2
-            SNRh1_2sq = 4.*np.trapz(h1_2sq.real/strainGrids, fgrids, axis=0)
+            SNRh1_2sq = 4.*np.sum(h1_2sq.real*quadWeights, axis=0)
             h1_3 = - (h1_1 + h1_2)
             h1_3sq = np.conjugate(h1_3)*h1_3
-            SNRh1_3sq = 4.*np.trapz(h1_3sq.real/strainGrids, fgrids, axis=0)
+            SNRh1_3sq = 4.*np.sum(h1_3sq.real*quadWeights, axis=0)
             SNRh1 = np.sqrt(SNRh1_1sq + SNRh1_2sq + SNRh1_3sq)
 
             self.wf_model = WF2
             h2_1 = self.GWstrain(fgrids, evParams2['Mc'], evParams2['eta'], evParams2['dL'], evParams2['theta'], evParams2['phi'], evParams2['iota'], evParams2['psi'], evParams2['tcoal'], evParams2['Phicoal'], evParams2['chi1z'], evParams2['chi2z'], evParams2['chi1x'], evParams2['chi2x'], evParams2['chi1y'], evParams2['chi2y'], evParams2['LambdaTilde'], evParams2['deltaLambda'], evParams2['ecc'], is_chi1chi2=True, rot=0.)
             h2_1sq = np.conjugate(h2_1)*h2_1
-            SNRh2_1sq = 4.*np.trapz(h2_1sq.real/strainGrids, fgrids, axis=0)
+            SNRh2_1sq = 4.*np.sum(h2_1sq.real*quadWeights, axis=0)
             h2_2 = self.GWstrain(fgrids, evParams2['Mc'], evParams2['eta'], evParams2['dL'], evParams2['theta'], evParams2['phi'], evParams2['iota'], evParams2['psi'], evParams2['tcoal'], evParams2['Phicoal'], evParams2['chi1z'], evParams2['chi2z'], evParams2['chi1x'], evParams2['chi2x'], evParams2['chi1y'], evParams2['chi2y'], evParams2['LambdaTilde'], evParams2['deltaLambda'], evParams2['ecc'], is_chi1chi2=True, rot=60.)
             h2_2sq = np.conjugate(h2_2)*h2_2
-            SNRh2_2sq = 4.*np.trapz(h2_2sq.real/strainGrids, fgrids, axis=0)
+            SNRh2_2sq = 4.*np.sum(h2_2sq.real*quadWeights, axis=0)
             h2_3 = - (h2_1 + h2_2)
             h2_3sq = np.conjugate(h2_3)*h2_3
-            SNRh2_3sq = 4.*np.trapz(h2_3sq.real/strainGrids, fgrids, axis=0)
+            SNRh2_3sq = 4.*np.sum(h2_3sq.real*quadWeights, axis=0)
             SNRh2 = np.sqrt(SNRh2_1sq + SNRh2_2sq + SNRh2_3sq)
 
             overlap_h1h2_1 = h1_1*np.conjugate(h2_1)
-            overlap_int_1  = 4.*np.trapz(overlap_h1h2_1.real/strainGrids, fgrids, axis=0)
+            overlap_int_1  = 4.*np.sum(overlap_h1h2_1.real*quadWeights, axis=0)
             overlap_h1h2_2 = h1_2*np.conjugate(h2_2)
-            overlap_int_2  = 4.*np.trapz(overlap_h1h2_2.real/strainGrids, fgrids, axis=0)
+            overlap_int_2  = 4.*np.sum(overlap_h1h2_2.real*quadWeights, axis=0)
             overlap_h1h2_3 = h1_3*np.conjugate(h2_3)
-            overlap_int_3  = 4.*np.trapz(overlap_h1h2_3.real/strainGrids, fgrids, axis=0)
+            overlap_int_3  = 4.*np.sum(overlap_h1h2_3.real*quadWeights, axis=0)
 
             overlap_int = overlap_int_1 + overlap_int_2 + overlap_int_3
         # Restore the waveform
@@ -736,19 +736,29 @@ class TaylorF2_RestrictedPN(WaveFormModel):
         self.use_QuadMonTid = use_QuadMonTid
         super().__init__(objectT, fHigh, is_tidal=is_tidal, is_eccentric=is_eccentric, is_holomorphic=True, **kwargs)
     
-    def Phi(self, f, **kwargs):
+    def _PNv(self, f, **kwargs):
         """
-        Compute the phase of the GW as a function of frequency, given the events parameters.
+        Compute the total mass of the binary in seconds and the PN expansion parameter :math:`v = (\\pi M f)^{1/3}`, which are shared by :py:class:`Phi`, :py:class:`Ampl` and :py:class:`tau_star`, so that they are computed only once when these are compiled together.
         
-        :param array f: Frequency grid on which the phase will be computed, in :math:`\\rm Hz`.
-        :param dict(array, array, ...) kwargs: Dictionary with arrays containing the parameters of the events to compute the phase of, as in :py:data:`events`.
-        :return: GW phase for the chosen events evaluated on the frequency grid.
-        :rtype: array
+        :param array f: Frequency grid on which the expansion parameter will be computed, in :math:`\\rm Hz`.
+        :param dict(array, array, ...) kwargs: Dictionary with arrays containing the parameters of the events, as in :py:data:`events`.
+        :return: Total mass of the binary(ies) in seconds and PN expansion parameter evaluated on the frequency grid.
+        :rtype: tuple(array, array)
         
         """
-        # From A. Buonanno, B. Iyer, E. Ochsner, Y. Pan, B.S. Sathyaprakash - arXiv:0907.0700 - eq. (3.18) plus spins as in arXiv:1107.1267 eq. (5.3) up to 2.5PN and PhysRevD.93.084054 eq. (6) for 3PN and 3.5PN
         Mtot_sec = kwargs['Mc']*glob.GMsun_over_c3/(kwargs['eta']**(3./5.))
-        v = (np.pi*Mtot_sec*f)**(1./3.)
+        return Mtot_sec, (np.pi*Mtot_sec*f)**(1./3.)
+    
+    def _PhiCoeffs(self, **kwargs):
+        """
+        Compute the coefficients of the PN expansion of the phase, which depend only on the events parameters and not on the frequency, including the spin, quadrupole-monopole and tidal terms.
+        
+        :param dict(array, array, ...) kwargs: Dictionary with arrays containing the parameters of the events, as in :py:data:`events`.
+        :return: Dictionary with the coefficients of the powers of :math:`v` in the phase (``'two'`` to ``'seven'``, ``'five_log'`` and ``'six_log'`` for the terms proportional to :math:`{\\rm log}\\, v`, ``'ten'`` and ``'twelve'`` for the tidal terms), the overall amplitude of the phase (``'OverallAmpl'``) and the reference phase (``'phiR'``).
+        :rtype: dict(array, array, ...)
+        
+        """
+        # From A. Buonanno, B. Iyer, E. Ochsner, Y. Pan, B.S. Sathyaprakash - arXiv:0907.0700 - eq. (3.18) plus spins as in arXiv:1107.1267 eq. (5.3) up to 2.5PN and PhysRevD.93.084054 eq. (6) for 3PN and 3.5PN
         eta = kwargs['eta']
         eta2 = eta*eta
         # This is needed to stabilize JAX derivatives
@@ -772,16 +782,15 @@ class TaylorF2_RestrictedPN(WaveFormModel):
             # A non-zero tidal deformability induces a quadrupole moment (for BBH it is 1).
             # The relation between the two is given in arxiv:1608.02582 eq. (15) with coefficients from third row of Table I
             # We also extend the range to 0 <= Lam < 1, as done in LALSimulation in LALSimUniversalRelations.c line 123
-            QuadMon1 = np.where(Lambda1 < 1., 1. + Lambda1*(0.427688866723244 + Lambda1*(-0.324336526985068 + Lambda1*0.1107439432180572)), np.exp(0.1940 + 0.09163 * np.log(Lambda1) + 0.04812 * np.log(Lambda1) * np.log(Lambda1) -4.283e-3 * np.log(Lambda1) * np.log(Lambda1) * np.log(Lambda1) + 1.245e-4 * np.log(Lambda1) * np.log(Lambda1) * np.log(Lambda1) * np.log(Lambda1)))
-            QuadMon2 = np.where(Lambda2 < 1., 1. + Lambda2*(0.427688866723244 + Lambda2*(-0.324336526985068 + Lambda2*0.1107439432180572)), np.exp(0.1940 + 0.09163 * np.log(Lambda2) + 0.04812 * np.log(Lambda2) * np.log(Lambda2) -4.283e-3 * np.log(Lambda2) * np.log(Lambda2) * np.log(Lambda2) + 1.245e-4 * np.log(Lambda2) * np.log(Lambda2) * np.log(Lambda2) * np.log(Lambda2)))
+            logLam1, logLam2 = np.log(Lambda1), np.log(Lambda2)
+            QuadMon1 = np.where(Lambda1 < 1., 1. + Lambda1*(0.427688866723244 + Lambda1*(-0.324336526985068 + Lambda1*0.1107439432180572)), np.exp(0.1940 + logLam1*(0.09163 + logLam1*(0.04812 + logLam1*(-4.283e-3 + logLam1*1.245e-4)))))
+            QuadMon2 = np.where(Lambda2 < 1., 1. + Lambda2*(0.427688866723244 + Lambda2*(-0.324336526985068 + Lambda2*0.1107439432180572)), np.exp(0.1940 + logLam2*(0.09163 + logLam2*(0.04812 + logLam2*(-4.283e-3 + logLam2*1.245e-4)))))
         else:
             QuadMon1, QuadMon2 = np.ones(eta.shape), np.ones(eta.shape)
         
         TF2coeffs = {}
-        TF2OverallAmpl = 3./(128. * eta)
+        TF2coeffs['OverallAmpl'] = 3./(128. * eta)
         
-        TF2coeffs['zero'] = 1.
-        TF2coeffs['one'] = 0.
         TF2coeffs['two'] = 3715./756. + (55.*eta)/9.
         TF2coeffs['three'] = -16.*np.pi + (113.*Seta*chi_a)/3. + (113./3. - (76.*eta)/3.)*chi_s
         #TF2coeffs['four'] = 15293365./508032. + (27145.*eta)/504.+ (3085.*eta2)/72. + (-405./8. + 200.*eta)*chi_a2 - (405.*Seta*chi_sdotchi_a)/4. + (-405./8. + (5.*eta)/2.)*chi_s2
@@ -791,11 +800,11 @@ class TaylorF2_RestrictedPN(WaveFormModel):
         TF2_5coeff_tmp = (732985./2268. - 24260.*eta/81. - 340.*eta2/9.)*chi_s + (732985./2268. + 140.*eta/9.)*Seta*chi_a
         if self.phiref_vlso:
             TF2coeffs['five'] = (38645.*np.pi/756. - 65.*np.pi*eta/9. - TF2_5coeff_tmp)*(1.-3.*np.log(vlso))
-            phiR = 0.
+            TF2coeffs['phiR'] = 0.
         else:
             TF2coeffs['five'] = (38645.*np.pi/756. - 65.*np.pi*eta/9. - TF2_5coeff_tmp)
             # This pi factor is needed to include LAL fRef rescaling, so to end up with the exact same waveform
-            phiR = np.pi
+            TF2coeffs['phiR'] = np.pi
         TF2coeffs['five_log'] = (38645.*np.pi/756. - 65.*np.pi*eta/9. - TF2_5coeff_tmp)*3.
         #TF2coeffs['six'] = 11583231236531./4694215680. - 640./3.*np.pi**2 - 6848./21.*np.euler_gamma + eta*(-15737765635./3048192. + 2255./12.*np.pi**2) + eta2*76055./1728. - eta2*eta*127825./1296. - (6848./21.)*np.log(4.) + np.pi*(2270.*Seta*chi_a/3. + (2270./3. - 520.*eta)*chi_s) + (75515./144. - 8225.*eta/18.)*Seta*chi_sdotchi_a + (75515./288. - 263245.*eta/252. - 480.*eta2)*chi_a2 + (75515./288. - 232415.*eta/504. + 1255.*eta2/9.)*chi_s2
         # For 3PN coeff we use chi1 and chi2 so to have the quadrupole moment explicitly appearing
@@ -806,56 +815,79 @@ class TaylorF2_RestrictedPN(WaveFormModel):
             TF2coeffs['seven'] = 77096675.*np.pi/254016. + 378515.*np.pi*eta/1512.- 74045.*np.pi*eta2/756. + (-25150083775./3048192. + 10566655595.*eta/762048. - 1042165.*eta2/3024. + 5345.*eta2*eta/36. + (14585./8. - 7270.*eta + 80.*eta2)*chi_a2)*chi_s + (14585./24. - 475.*eta/6. + 100.*eta2/3.)*chi_s2*chi_s + Seta*((-25150083775./3048192. + 26804935.*eta/6048. - 1985.*eta2/48.)*chi_a + (14585./24. - 2380.*eta)*chi_a2*chi_a + (14585./8. - 215.*eta/2.)*chi_a*chi_s2)
         else:
             TF2coeffs['seven'] = 77096675.*np.pi/254016. + 378515.*np.pi*eta/1512.- 74045.*np.pi*eta2/756. + (-25150083775./3048192. + 10566655595.*eta/762048. - 1042165.*eta2/3024. + 5345.*eta2*eta/36.)*chi_s + Seta*((-25150083775./3048192. + 26804935.*eta/6048. - 1985.*eta2/48.)*chi_a)
-
+        
+        if self.is_tidal:
+            # Add tidal contribution if needed, as in PhysRevD.89.103012
+            Lam_t, delLam = utils.Lamt_delLam_from_Lam12(kwargs['Lambda1'], kwargs['Lambda2'], eta)
+            TF2coeffs['ten'] = -0.5*39.*Lam_t
+            TF2coeffs['twelve'] = -3115./64.*Lam_t + 6595./364.*Seta*delLam
+        
+        return TF2coeffs
+    
+    def _PhiEccCoeffs(self, eta, v0ecc):
+        """
+        Compute the coefficients of the powers of :math:`v` in the eccentricity dependent part of the phase, up to 3 PN order, in the low-eccentricity limit, from `arXiv:1605.00304 <https://arxiv.org/abs/1605.00304>`_. These depend on the events parameters and on the expansion parameter at the reference frequency of the eccentricity, :math:`v_{0}`, but not on the frequency.
+        
+        :param array eta: The symmetric mass ratio(s) of the events.
+        :param array v0ecc: The expansion parameter(s) at the reference frequency of the eccentricity.
+        :return: Dictionary with the coefficients of the powers of :math:`v` from 0 to 6 (``'six_log'`` for the term proportional to :math:`{\\rm log}\\, v`).
+        :rtype: dict(array, array, ...)
+        
+        """
+        eta2 = eta*eta
+        v02 = v0ecc*v0ecc
+        v03 = v02*v0ecc
+        v04 = v02*v02
+        
+        TF2EccCoeffs = {}
+        
+        TF2EccCoeffs['zero']  = 1. + (2.833/1.008 - 19.7/3.6*eta)*v02 + 37.7/7.2*np.pi*v03 + (-1.193251/3.048192 - 66.317/9.072*eta +18.155/1.296*eta2)*v04 + (76.4881/9.0720*np.pi - 94.9457/2.2680*np.pi*eta)*v04*v0ecc + (265.31900578691/1.68991764480 - 33.17/1.26*np.euler_gamma + 12.2833/1.0368*np.pi*np.pi + (91.55185261/5.48674560 - 3.977/1.152*np.pi*np.pi)*eta - 5.732473/1.306368*eta2 - 30.90307/1.39968*eta2*eta + 87.419/1.890*np.log(2.) - 260.01/5.60*np.log(3.) - 33.17/2.52*np.log(16.*v02))*v04*v02
+        TF2EccCoeffs['two']   = 29.9076223/8.1976608 + 18.766963/2.927736*eta + (84.7282939759/8.2632420864-7.18901219/3.68894736*eta-36.97091711/1.05398496*eta2)*v02 + (112.751736071/5.902315776*np.pi + 70.75145051/2.10796992*np.pi*eta)*v03 + (-3.56873002170973/2.49880440692736 - 260.399751935005/8.924301453312*eta + 15.0484695827/3.5413894656*eta2 + 340.714213265/3.794345856*eta2*eta)*v04
+        TF2EccCoeffs['three'] = -28.19123/2.82600*np.pi + (-79.86575459/2.84860800*np.pi + 55.5367231/1.0173600*np.pi*eta)*v02 - 106.2809371/2.0347200*np.pi*np.pi*v03
+        TF2EccCoeffs['four']  = 16.237683263/3.330429696 + 241.33060753/9.71375328*eta+156.2608261/6.9383952*eta2 + (46.001356684079/3.357073133568 + 253.471410141755/5.874877983744*eta - 169.3852244423/2.3313007872*eta2 - 307.833827417/2.497822272*eta2*eta)*v02
+        TF2EccCoeffs['five']  = -28.31492681/1.18395270*np.pi - 115.52066831/2.70617760*np.pi*eta
+        # The term 53.6803271/3.9564000*log(16 v^2) is split in its constant and log(v) parts
+        TF2EccCoeffs['six']   = -436.03153867072577087/1.32658535116800000 + 53.6803271/1.9782000*np.euler_gamma + 157.22503703/3.25555200*np.pi*np.pi +(2991.72861614477/6.89135247360 - 15.075413/1.446912*np.pi*np.pi)*eta +345.5209264991/4.1019955200*eta2 + 506.12671711/8.78999040*eta2*eta + 384.3505163/5.9346000*np.log(2.) - 112.1397129/1.7584000*np.log(3.) + 53.6803271/3.9564000*np.log(16.)
+        TF2EccCoeffs['six_log'] = 53.6803271/1.9782000
+        
+        return TF2EccCoeffs
+    
+    def Phi(self, f, **kwargs):
+        """
+        Compute the phase of the GW as a function of frequency, given the events parameters.
+        
+        The coefficients depending only on the events parameters are computed once in :py:class:`_PhiCoeffs` and the expansion in :math:`v` is evaluated with the Horner scheme.
+        
+        :param array f: Frequency grid on which the phase will be computed, in :math:`\\rm Hz`.
+        :param dict(array, array, ...) kwargs: Dictionary with arrays containing the parameters of the events to compute the phase of, as in :py:data:`events`.
+        :return: GW phase for the chosen events evaluated on the frequency grid.
+        :rtype: array
+        
+        """
+        Mtot_sec, v = self._PNv(f, **kwargs)
+        TF2coeffs = self._PhiCoeffs(**kwargs)
+        
+        logv = np.log(v)
+        v2 = v*v
+        v5 = v2*v2*v
+        
+        phase = 1. + v2*(TF2coeffs['two'] + v*(TF2coeffs['three'] + v*(TF2coeffs['four'] + v*(TF2coeffs['five'] + TF2coeffs['five_log']*logv + v*(TF2coeffs['six'] + TF2coeffs['six_log']*logv + v*TF2coeffs['seven'])))))
+        
+        if self.is_tidal:
+            phase = phase + v5*v5*(TF2coeffs['ten'] + TF2coeffs['twelve']*v2)
+        
         if self.is_eccentric:
-            # These are the eccentricity dependent coefficients up to 3 PN order, in the low-eccentricity limit, from arXiv:1605.00304
-            ecc = kwargs['ecc']
             if self.fRef_ecc is None:
                 v0ecc = np.amin(v, axis=0)
             else:
                 v0ecc = (np.pi*Mtot_sec*self.fRef_ecc)**(1./3.)
-                
-            TF2EccCoeffs = {}
-            
-            TF2EccOverallAmpl = -2.355/1.462*ecc*ecc*((v0ecc/v)**(19./3.))
             
-            TF2EccCoeffs['zero']      = 1.
-            TF2EccCoeffs['one']       = 0.
-            TF2EccCoeffs['twoV']      = 29.9076223/8.1976608 + 18.766963/2.927736*eta
-            TF2EccCoeffs['twoV0']     = 2.833/1.008 - 19.7/3.6*eta
-            TF2EccCoeffs['threeV']    = -28.19123/2.82600*np.pi
-            TF2EccCoeffs['threeV0']   = 37.7/7.2*np.pi
-            TF2EccCoeffs['fourV4']    = 16.237683263/3.330429696 + 241.33060753/9.71375328*eta+156.2608261/6.9383952*eta2
-            TF2EccCoeffs['fourV2V02'] = 84.7282939759/8.2632420864-7.18901219/3.68894736*eta-36.97091711/1.05398496*eta2
-            TF2EccCoeffs['fourV04']   = -1.193251/3.048192 - 66.317/9.072*eta +18.155/1.296*eta2
-            TF2EccCoeffs['fiveV5']    = -28.31492681/1.18395270*np.pi - 115.52066831/2.70617760*np.pi*eta
-            TF2EccCoeffs['fiveV3V02'] = -79.86575459/2.84860800*np.pi + 55.5367231/1.0173600*np.pi*eta
-            TF2EccCoeffs['fiveV2V03'] = 112.751736071/5.902315776*np.pi + 70.75145051/2.10796992*np.pi*eta
-            TF2EccCoeffs['fiveV05']   = 76.4881/9.0720*np.pi - 94.9457/2.2680*np.pi*eta
-            TF2EccCoeffs['sixV6']     = -436.03153867072577087/1.32658535116800000 + 53.6803271/1.9782000*np.euler_gamma + 157.22503703/3.25555200*np.pi*np.pi +(2991.72861614477/6.89135247360 - 15.075413/1.446912*np.pi*np.pi)*eta +345.5209264991/4.1019955200*eta2 + 506.12671711/8.78999040*eta2*eta + 384.3505163/5.9346000*np.log(2.) - 112.1397129/1.7584000*np.log(3.)
-            TF2EccCoeffs['sixV4V02']  = 46.001356684079/3.357073133568 + 253.471410141755/5.874877983744*eta - 169.3852244423/2.3313007872*eta2 - 307.833827417/2.497822272*eta2*eta
-            TF2EccCoeffs['sixV3V03']  = -106.2809371/2.0347200*np.pi*np.pi
-            TF2EccCoeffs['sixV2V04']  = -3.56873002170973/2.49880440692736 - 260.399751935005/8.924301453312*eta + 15.0484695827/3.5413894656*eta2 + 340.714213265/3.794345856*eta2*eta
-            TF2EccCoeffs['sixV06']    = 265.31900578691/1.68991764480 - 33.17/1.26*np.euler_gamma + 12.2833/1.0368*np.pi*np.pi + (91.55185261/5.48674560 - 3.977/1.152*np.pi*np.pi)*eta - 5.732473/1.306368*eta2 - 30.90307/1.39968*eta2*eta + 87.419/1.890*np.log(2.) - 260.01/5.60*np.log(3.)
+            TF2EccCoeffs = self._PhiEccCoeffs(kwargs['eta'], v0ecc)
+            TF2EccOverallAmpl = -2.355/1.462*kwargs['ecc']*kwargs['ecc']*((v0ecc/v)**(19./3.))
             
-            phi_Ecc = TF2EccOverallAmpl*(TF2EccCoeffs['zero'] + TF2EccCoeffs['one']*v + (TF2EccCoeffs['twoV']*v*v + TF2EccCoeffs['twoV0']*v0ecc*v0ecc) + (TF2EccCoeffs['threeV']*v*v*v + TF2EccCoeffs['threeV0']*v0ecc*v0ecc*v0ecc) + (TF2EccCoeffs['fourV4']*v*v*v*v + TF2EccCoeffs['fourV2V02']*v*v*v0ecc*v0ecc + TF2EccCoeffs['fourV04']*v0ecc*v0ecc*v0ecc*v0ecc) + (TF2EccCoeffs['fiveV5']*v*v*v*v*v + TF2EccCoeffs['fiveV3V02']*v*v*v*v0ecc*v0ecc + TF2EccCoeffs['fiveV2V03']*v*v*v0ecc*v0ecc*v0ecc + TF2EccCoeffs['fiveV05']*v0ecc*v0ecc*v0ecc*v0ecc*v0ecc) + ((TF2EccCoeffs['sixV6'] + 53.6803271/3.9564000*np.log(16.*v*v))*(v**6) + TF2EccCoeffs['sixV4V02']*v*v*v*v*v0ecc*v0ecc + TF2EccCoeffs['sixV3V03']*v*v*v*v0ecc*v0ecc*v0ecc + TF2EccCoeffs['sixV2V04']*v*v*v0ecc*v0ecc*v0ecc*v0ecc + (TF2EccCoeffs['sixV06'] - 33.17/2.52*np.log(16.*v0ecc*v0ecc))*(v0ecc**6)))
+            phase = phase + TF2EccOverallAmpl*(TF2EccCoeffs['zero'] + v2*(TF2EccCoeffs['two'] + v*(TF2EccCoeffs['three'] + v*(TF2EccCoeffs['four'] + v*(TF2EccCoeffs['five'] + v*(TF2EccCoeffs['six'] + TF2EccCoeffs['six_log']*logv))))))
         
-        else:
-            phi_Ecc = 0.
-            
-        if self.is_tidal:
-            # Add tidal contribution if needed, as in PhysRevD.89.103012
-            Lambda1, Lambda2 = kwargs['Lambda1'], kwargs['Lambda2']
-            Lam_t, delLam    = utils.Lamt_delLam_from_Lam12(Lambda1, Lambda2, eta)
-            
-            phi_Tidal = (-0.5*39.*Lam_t)*(v**10.) + (-3115./64.*Lam_t + 6595./364.*Seta*delLam)*(v**12.)
-            
-        else:
-            phi_Tidal = 0.
-        
-        phase = TF2OverallAmpl*(TF2coeffs['zero'] + TF2coeffs['one']*v + TF2coeffs['two']*v*v + TF2coeffs['three']*v**3 + TF2coeffs['four']*v**4 + (TF2coeffs['five'] + TF2coeffs['five_log']*np.log(v))*v**5 + (TF2coeffs['six'] + TF2coeffs['six_log']*np.log(v))*v**6 + TF2coeffs['seven']*v**7 + phi_Tidal + phi_Ecc)/(v**5.)
-            
-        return phase + phiR - np.pi*0.25
+        return TF2coeffs['OverallAmpl']*phase/v5 + TF2coeffs['phiR'] - np.pi*0.25
 
     def Ampl(self, f, **kwargs):
         """
@@ -868,14 +900,16 @@ class TaylorF2_RestrictedPN(WaveFormModel):
         
         """
         # In the restricted PN approach the amplitude is the same as for the Newtonian approximation, so this term is equivalent
-        amplitude = np.sqrt(5./24.) * (np.pi**(-2./3.)) * glob.clightGpc/kwargs['dL'] * (glob.GMsun_over_c3*kwargs['Mc'])**(5./6.) * (f**(-7./6.))
+        # f^(-7/6) is written as (pi*Mtot)^(7/6)*v^(-7/2), so that v is shared with the phase
+        Mtot_sec, v = self._PNv(f, **kwargs)
+        amplitude = np.sqrt(5./24.) * (np.pi**(-2./3.)) * glob.clightGpc/kwargs['dL'] * (glob.GMsun_over_c3*kwargs['Mc'])**(5./6.) * (np.pi*Mtot_sec)**(7./6.) / (v*v*v*np.sqrt(v))
         return amplitude
     
     def tau_star(self, f, **kwargs):
         """
         Compute the time to coalescence (in seconds) as a function of frequency (in :math:`\\rm Hz`), given the events parameters.
         
-        We use the expression in `arXiv:0907.0700 <https://arxiv.org/abs/0907.0700>`_ eq. (3.8b).
+        We use the expression in `arXiv:0907.0700 <https://arxiv.org/abs/0907.0700>`_ eq. (3.8b), evaluated with the Horner scheme.
         
         :param array f: Frequency grid on which the time to coalescence will be computed, in :math:`\\rm Hz`.
         :param dict(array, array, ...) kwargs: Dictionary with arrays containing the parameters of the events to compute the time to coalescence of, as in :py:data:`events`.
@@ -883,18 +917,24 @@ class TaylorF2_RestrictedPN(WaveFormModel):
         :rtype: array
         
         """
-        Mtot_sec = kwargs['Mc']*glob.GMsun_over_c3/(kwargs['eta']**(3./5.))
-        v = (np.pi*Mtot_sec*f)**(1./3.)
+        Mtot_sec, v = self._PNv(f, **kwargs)
         eta = kwargs['eta']
         eta2 = eta*eta
         
-        OverallFac = 5./256 * Mtot_sec/(eta*(v**8.))
+        # Coefficients depending only on the events parameters
+        OverallFac = 5./256 * Mtot_sec/eta
+        t2 = 743./252. + 11./3.*eta
+        t3 = - 32./5.*np.pi
+        t4 = 3058673./508032. + 5429./504.*eta + 617./72.*eta2
+        t5 = - (7729./252. - 13./3.*eta)*np.pi
+        # The term 3424/105*log(16 v^2) is split in its constant and log(v) parts
+        t6 = - 10052469856691./23471078400. + 128./3.*np.pi*np.pi + 6848./105.*np.euler_gamma + (3147553127./3048192. - 451./12.*np.pi*np.pi)*eta - 15211./1728.*eta2 + 25565./1296.*eta2*eta + 3424./105.*np.log(16.)
+        t7 = (- 15419335./127008. - 75703./756.*eta + 14809./378.*eta2)*np.pi
         
-        t05 = 1. + (743./252. + 11./3.*eta)*(v*v) - 32./5.*np.pi*(v*v*v) + (3058673./508032. + 5429./504.*eta + 617./72.*eta2)*(v**4) - (7729./252. - 13./3.*eta)*np.pi*(v**5)
-        t6  = (- 10052469856691./23471078400. + 128./3.*np.pi*np.pi + 6848./105.*np.euler_gamma + (3147553127./3048192. - 451./12.*np.pi*np.pi)*eta - 15211./1728.*eta2 + 25565./1296.*eta2*eta + 3424./105.*np.log(16.*v*v))*(v**6)
-        t7  = (- 15419335./127008. - 75703./756.*eta + 14809./378.*eta2)*np.pi*(v**7)
+        v2 = v*v
+        v4 = v2*v2
         
-        return OverallFac*(t05 + t6 + t7)
+        return OverallFac*(1. + v2*(t2 + v*(t3 + v*(t4 + v*(t5 + v*(t6 + 6848./105.*np.log(v) + v*t7))))))/(v4*v4)
     
     def fcut(self, **kwargs):
         """
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+#    Copyright (c) 2022 Francesco Iacovelli <francesco.iacovelli@unige.ch>, Michele Mancarella <michele.mancarella@unige.ch>
+#
+#    All rights reserved. Use of this source code is governed by the
+#    license that can be found in the LICENSE file.
+
+import os
+import sys
+import time
+import copy
+
+PACKAGE_PARENT = '../gwfast'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd())))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR,PACKAGE_PARENT )))
+import numpy as onp
+import argparse
+import jax
+import jax.numpy as np
+
+import gwfast.gwfastGlobals as glob
+from gwfast.waveforms import TaylorF2_RestrictedPN, IMRPhenomD, IMRPhenomHM, IMRPhenomD_NRTidalv2, IMRPhenomNSBH
+from gwfast.signal import GWSignal
+from gwfast import gwfastUtils as utils
+from gwfast.fisherTools import CovMatr, CheckFisher
+
+#####################################################################################
+# GLOBALS
+#####################################################################################
+
+# The models are instantiated only when needed, since e.g. IMRPhenomNSBH may have to tabulate its xi_tide grid
+wf_models_dict = {'tf2':lambda: TaylorF2_RestrictedPN(is_tidal=False, use_3p5PN_SpinHO=True),
+                  'IMRPhenomD':lambda: IMRPhenomD(),
+                  'IMRPhenomHM':lambda: IMRPhenomHM(),
+                  'IMRPhenomD_NRTidalv2':lambda: IMRPhenomD_NRTidalv2(),
+                  'IMRPhenomNSBH':lambda: IMRPhenomNSBH(verbose=False),
+                  'tf2_tidal':lambda: TaylorF2_RestrictedPN(is_tidal=True, use_3p5PN_SpinHO=True),
+                  'tf2_ecc':lambda: TaylorF2_RestrictedPN(is_tidal=False, use_3p5PN_SpinHO=True, is_eccentric=True),
+                  }
+
+#####################################################################################
+# UTILITIES
+#####################################################################################
+
+def draw_events(wf_model, nevents, seed=None):
+    '''
+    Draw a batch of random events suitable for the given waveform model.
+    '''
+    rng = onp.random.default_rng(seed)
+
+    if wf_model.objType=='BBH':
+        m1, m2 = rng.uniform(20., 60., nevents), rng.uniform(10., 20., nevents)
+        Lambda1, Lambda2 = onp.zeros(nevents), onp.zeros(nevents)
+    elif wf_model.objType=='NSBH':
+        m1, m2 = rng.uniform(5., 10., nevents), rng.uniform(1.2, 1.8, nevents)
+        Lambda1, Lambda2 = onp.zeros(nevents), rng.uniform(100., 800., nevents)
+    else:
+        m1, m2 = rng.uniform(1.3, 1.8, nevents), rng.uniform(1.1, 1.3, nevents)
+        Lambda1, Lambda2 = rng.uniform(100., 800., nevents), rng.uniform(100., 800., nevents)
+
+    Mc  = (m1*m2)**(3./5.)/(m1+m2)**(1./5.)
+    eta = m1*m2/(m1+m2)**2
+    # A vanishing eccentricity would give a zero row and column in the Fisher matrix of the eccentric models
+    ecc = rng.uniform(0., 0.1, nevents) if wf_model.is_eccentric else onp.zeros(nevents)
+
+    return {'Mc':Mc, 'eta':eta, 'dL':rng.uniform(0.1, 2., nevents),
+            'theta':onp.arccos(rng.uniform(-1., 1., nevents)), 'phi':rng.uniform(0., 2.*onp.pi, nevents),
+            'iota':onp.arccos(rng.uniform(-1., 1., nevents)), 'psi':rng.uniform(0., onp.pi, nevents),
+            'tcoal':rng.uniform(0., 1., nevents), 'Phicoal':rng.uniform(0., 2.*onp.pi, nevents),
+            'chi1z':rng.uniform(-0.5, 0.5, nevents), 'chi2z':rng.uniform(-0.5, 0.5, nevents),
+            'Lambda1':Lambda1, 'Lambda2':Lambda2, 'ecc':ecc,
+           }
+
+def get_signal(wf_model, detector='ETS', psd_path=None, shape='L', **kwargs):
+    '''
+    Build a GWSignal object for one of the detectors in :py:data:`gwfast.gwfastGlobals.detectors`.
+    '''
+    if psd_path is None:
+        psd_path = os.path.join(glob.detPath, 'ET-0000A-18.txt')
+    det = glob.detectors[detector]
+    return GWSignal(wf_model, psd_path=psd_path, detector_shape=shape, det_lat=det['lat'], det_long=det['long'], det_xax=det['xax'], verbose=False, **kwargs)
+
+def time_call(func, nrep=3):
+    '''
+    Best wall-clock time, in seconds, over nrep executions of func, and the result of the last execution.
+    '''
+    best = onp.inf
+    for _ in range(nrep):
+        t0 = time.perf_counter()
+        res = func()
+        best = min(best, time.perf_counter()-t0)
+    return best, res
+
+#####################################################################################
+# BENCHMARKS
+#####################################################################################
+
+def _FisherIntegral_loop(FisherDerivs, fgrids, strainGrids):
+    # Element-by-element integration, as done before the vectorisation of GWSignal._FisherIntegral
+    nParams = FisherDerivs.shape[0]
+    FisherIntegrands = (onp.conjugate(FisherDerivs[:,:,onp.newaxis,:])*FisherDerivs.transpose(1,0,2))
+    Fisher = onp.zeros((nParams,nParams,FisherDerivs.shape[1]))
+    for alpha in range(nParams):
+        for beta in range(alpha,nParams):
+            tmpElem = FisherIntegrands[alpha,:,beta,:].T
+            Fisher[alpha,beta, :] = onp.trapz(tmpElem.real/strainGrids.real, fgrids.real, axis=0)*4.
+            Fisher[beta,alpha, :] = Fisher[alpha,beta, :]
+    return Fisher
+
+class _TaylorF2_direct(TaylorF2_RestrictedPN):
+    # TaylorF2 with the phase, amplitude and time to coalescence evaluated term by term with powers of v, as done before the precomputation of the coefficients and the Horner scheme
+    def Phi(self, f, **kwargs):
+        # From A. Buonanno, B. Iyer, E. Ochsner, Y. Pan, B.S. Sathyaprakash - arXiv:0907.0700 - eq. (3.18) plus spins as in arXiv:1107.1267 eq. (5.3) up to 2.5PN and PhysRevD.93.084054 eq. (6) for 3PN and 3.5PN
+        Mtot_sec = kwargs['Mc']*glob.GMsun_over_c3/(kwargs['eta']**(3./5.))
+        v = (np.pi*Mtot_sec*f)**(1./3.)
+        eta = kwargs['eta']
+        eta2 = eta*eta
+        # This is needed to stabilize JAX derivatives
+        Seta = np.sqrt(np.where(eta<0.25, 1.0 - 4.0*eta, 0.))
+        #Seta = np.sqrt(1.0 - 4.0*eta)
+        # These are m1/Mtot and m2/Mtot
+        m1ByM = 0.5 * (1.0 + Seta)
+        m2ByM = 0.5 * (1.0 - Seta)
+        
+        chi1, chi2 = kwargs['chi1z'], kwargs['chi2z']
+        chi12, chi22 = chi1*chi1, chi2*chi2
+        chi1dotchi2  = chi1*chi2
+        chi_s, chi_a   = 0.5*(chi1 + chi2), 0.5*(chi1 - chi2)
+        chi_s2, chi_a2 = chi_s*chi_s, chi_a*chi_a
+        chi_sdotchi_a  = chi_s*chi_a
+        # flso = 1/6^(3/2)/(pi*M) -> vlso = (pi*M*flso)^(1/3) = (1/6^(3/2))^(1/3)
+        vlso = 1./np.sqrt(6.)
+        
+        if (self.is_tidal) and (self.use_QuadMonTid):
+            Lambda1, Lambda2 = kwargs['Lambda1'], kwargs['Lambda2']
+            # A non-zero tidal deformability induces a quadrupole moment (for BBH it is 1).
+            # The relation between the two is given in arxiv:1608.02582 eq. (15) with coefficients from third row of Table I
+            # We also extend the range to 0 <= Lam < 1, as done in LALSimulation in LALSimUniversalRelations.c line 123
+            QuadMon1 = np.where(Lambda1 < 1., 1. + Lambda1*(0.427688866723244 + Lambda1*(-0.324336526985068 + Lambda1*0.1107439432180572)), np.exp(0.1940 + 0.09163 * np.log(Lambda1) + 0.04812 * np.log(Lambda1) * np.log(Lambda1) -4.283e-3 * np.log(Lambda1) * np.log(Lambda1) * np.log(Lambda1) + 1.245e-4 * np.log(Lambda1) * np.log(Lambda1) * np.log(Lambda1) * np.log(Lambda1)))
+            QuadMon2 = np.where(Lambda2 < 1., 1. + Lambda2*(0.427688866723244 + Lambda2*(-0.324336526985068 + Lambda2*0.1107439432180572)), np.exp(0.1940 + 0.09163 * np.log(Lambda2) + 0.04812 * np.log(Lambda2) * np.log(Lambda2) -4.283e-3 * np.log(Lambda2) * np.log(Lambda2) * np.log(Lambda2) + 1.245e-4 * np.log(Lambda2) * np.log(Lambda2) * np.log(Lambda2) * np.log(Lambda2)))
+        else:
+            QuadMon1, QuadMon2 = np.ones(eta.shape), np.ones(eta.shape)
+        
+        TF2coeffs = {}
+        TF2OverallAmpl = 3./(128. * eta)
+        
+        TF2coeffs['zero'] = 1.
+        TF2coeffs['one'] = 0.
+        TF2coeffs['two'] = 3715./756. + (55.*eta)/9.
+        TF2coeffs['three'] = -16.*np.pi + (113.*Seta*chi_a)/3. + (113./3. - (76.*eta)/3.)*chi_s
+        #TF2coeffs['four'] = 15293365./508032. + (27145.*eta)/504.+ (3085.*eta2)/72. + (-405./8. + 200.*eta)*chi_a2 - (405.*Seta*chi_sdotchi_a)/4. + (-405./8. + (5.*eta)/2.)*chi_s2
+        # For 2PN coeff we use chi1 and chi2 so to have the quadrupole moment explicitly appearing
+        TF2coeffs['four'] = 5.*(3058.673/7.056 + 5429./7.*eta+617.*eta2)/72. + 247./4.8*eta*chi1dotchi2 -721./4.8*eta*chi1dotchi2 + (-720./9.6*QuadMon1 + 1./9.6)*m1ByM*m1ByM*chi12 + (-720./9.6*QuadMon2 + 1./9.6)*m2ByM*m2ByM*chi22 + (240./9.6*QuadMon1 - 7./9.6)*m1ByM*m1ByM*chi12 + (240./9.6*QuadMon2 - 7./9.6)*m2ByM*m2ByM*chi22
+        # This part is common to 5 and 5log, avoid recomputing
+        TF2_5coeff_tmp = (732985./2268. - 24260.*eta/81. - 340.*eta2/9.)*chi_s + (732985./2268. + 140.*eta/9.)*Seta*chi_a
+        if self.phiref_vlso:
+            TF2coeffs['five'] = (38645.*np.pi/756. - 65.*np.pi*eta/9. - TF2_5coeff_tmp)*(1.-3.*np.log(vlso))
+            phiR = 0.
+        else:
+            TF2coeffs['five'] = (38645.*np.pi/756. - 65.*np.pi*eta/9. - TF2_5coeff_tmp)
+            # This pi factor is needed to include LAL fRef rescaling, so to end up with the exact same waveform
+            phiR = np.pi
+        TF2coeffs['five_log'] = (38645.*np.pi/756. - 65.*np.pi*eta/9. - TF2_5coeff_tmp)*3.
+        #TF2coeffs['six'] = 11583231236531./4694215680. - 640./3.*np.pi**2 - 6848./21.*np.euler_gamma + eta*(-15737765635./3048192. + 2255./12.*np.pi**2) + eta2*76055./1728. - eta2*eta*127825./1296. - (6848./21.)*np.log(4.) + np.pi*(2270.*Seta*chi_a/3. + (2270./3. - 520.*eta)*chi_s) + (75515./144. - 8225.*eta/18.)*Seta*chi_sdotchi_a + (75515./288. - 263245.*eta/252. - 480.*eta2)*chi_a2 + (75515./288. - 232415.*eta/504. + 1255.*eta2/9.)*chi_s2
+        # For 3PN coeff we use chi1 and chi2 so to have the quadrupole moment explicitly appearing
+        TF2coeffs['six'] = 11583.231236531/4.694215680 - 640./3.*np.pi*np.pi - 684.8/2.1*np.euler_gamma + eta*(-15737.765635/3.048192 + 225.5/1.2*np.pi*np.pi) + eta2*76.055/1.728 - eta2*eta*127.825/1.296 - np.log(4.)*684.8/2.1 + np.pi*chi1*m1ByM*(1490./3. + m1ByM*260.) + np.pi*chi2*m2ByM*(1490./3. + m2ByM*260.) + (326.75/1.12 + 557.5/1.8*eta)*eta*chi1dotchi2 + (4703.5/8.4+2935./6.*m1ByM-120.*m1ByM*m1ByM)*m1ByM*m1ByM*QuadMon1*chi12 + (-4108.25/6.72-108.5/1.2*m1ByM+125.5/3.6*m1ByM*m1ByM)*m1ByM*m1ByM*chi12 + (4703.5/8.4+2935./6.*m2ByM-120.*m2ByM*m2ByM)*m2ByM*m2ByM*QuadMon2*chi22 + (-4108.25/6.72-108.5/1.2*m2ByM+125.5/3.6*m2ByM*m2ByM)*m2ByM*m2ByM*chi22
+        TF2coeffs['six_log'] = -(6848./21.)
+        if self.use_3p5PN_SpinHO:
+        # This part includes SS and SSS contributions at 3.5PN, which are not included in LAL
+            TF2coeffs['seven'] = 77096675.*np.pi/254016. + 378515.*np.pi*eta/1512.- 74045.*np.pi*eta2/756. + (-25150083775./3048192. + 10566655595.*eta/762048. - 1042165.*eta2/3024. + 5345.*eta2*eta/36. + (14585./8. - 7270.*eta + 80.*eta2)*chi_a2)*chi_s + (14585./24. - 475.*eta/6. + 100.*eta2/3.)*chi_s2*chi_s + Seta*((-25150083775./3048192. + 26804935.*eta/6048. - 1985.*eta2/48.)*chi_a + (14585./24. - 2380.*eta)*chi_a2*chi_a + (14585./8. - 215.*eta/2.)*chi_a*chi_s2)
+        else:
+            TF2coeffs['seven'] = 77096675.*np.pi/254016. + 378515.*np.pi*eta/1512.- 74045.*np.pi*eta2/756. + (-25150083775./3048192. + 10566655595.*eta/762048. - 1042165.*eta2/3024. + 5345.*eta2*eta/36.)*chi_s + Seta*((-25150083775./3048192. + 26804935.*eta/6048. - 1985.*eta2/48.)*chi_a)
+
+        if self.is_eccentric:
+            # These are the eccentricity dependent coefficients up to 3 PN order, in the low-eccentricity limit, from arXiv:1605.00304
+            ecc = kwargs['ecc']
+            if self.fRef_ecc is None:
+                v0ecc = np.amin(v, axis=0)
+            else:
+                v0ecc = (np.pi*Mtot_sec*self.fRef_ecc)**(1./3.)
+                
+            TF2EccCoeffs = {}
+            
+            TF2EccOverallAmpl = -2.355/1.462*ecc*ecc*((v0ecc/v)**(19./3.))
+            
+            TF2EccCoeffs['zero']      = 1.
+            TF2EccCoeffs['one']       = 0.
+            TF2EccCoeffs['twoV']      = 29.9076223/8.1976608 + 18.766963/2.927736*eta
+            TF2EccCoeffs['twoV0']     = 2.833/1.008 - 19.7/3.6*eta
+            TF2EccCoeffs['threeV']    = -28.19123/2.82600*np.pi
+            TF2EccCoeffs['threeV0']   = 37.7/7.2*np.pi
+            TF2EccCoeffs['fourV4']    = 16.237683263/3.330429696 + 241.33060753/9.71375328*eta+156.2608261/6.9383952*eta2
+            TF2EccCoeffs['fourV2V02'] = 84.7282939759/8.2632420864-7.18901219/3.68894736*eta-36.97091711/1.05398496*eta2
+            TF2EccCoeffs['fourV04']   = -1.193251/3.048192 - 66.317/9.072*eta +18.155/1.296*eta2
+            TF2EccCoeffs['fiveV5']    = -28.31492681/1.18395270*np.pi - 115.52066831/2.70617760*np.pi*eta
+            TF2EccCoeffs['fiveV3V02'] = -79.86575459/2.84860800*np.pi + 55.5367231/1.0173600*np.pi*eta
+            TF2EccCoeffs['fiveV2V03'] = 112.751736071/5.902315776*np.pi + 70.75145051/2.10796992*np.pi*eta
+            TF2EccCoeffs['fiveV05']   = 76.4881/9.0720*np.pi - 94.9457/2.2680*np.pi*eta
+            TF2EccCoeffs['sixV6']     = -436.03153867072577087/1.32658535116800000 + 53.6803271/1.9782000*np.euler_gamma + 157.22503703/3.25555200*np.pi*np.pi +(2991.72861614477/6.89135247360 - 15.075413/1.446912*np.pi*np.pi)*eta +345.5209264991/4.1019955200*eta2 + 506.12671711/8.78999040*eta2*eta + 384.3505163/5.9346000*np.log(2.) - 112.1397129/1.7584000*np.log(3.)
+            TF2EccCoeffs['sixV4V02']  = 46.001356684079/3.357073133568 + 253.471410141755/5.874877983744*eta - 169.3852244423/2.3313007872*eta2 - 307.833827417/2.497822272*eta2*eta
+            TF2EccCoeffs['sixV3V03']  = -106.2809371/2.0347200*np.pi*np.pi
+            TF2EccCoeffs['sixV2V04']  = -3.56873002170973/2.49880440692736 - 260.399751935005/8.924301453312*eta + 15.0484695827/3.5413894656*eta2 + 340.714213265/3.794345856*eta2*eta
+            TF2EccCoeffs['sixV06']    = 265.31900578691/1.68991764480 - 33.17/1.26*np.euler_gamma + 12.2833/1.0368*np.pi*np.pi + (91.55185261/5.48674560 - 3.977/1.152*np.pi*np.pi)*eta - 5.732473/1.306368*eta2 - 30.90307/1.39968*eta2*eta + 87.419/1.890*np.log(2.) - 260.01/5.60*np.log(3.)
+            
+            phi_Ecc = TF2EccOverallAmpl*(TF2EccCoeffs['zero'] + TF2EccCoeffs['one']*v + (TF2EccCoeffs['twoV']*v*v + TF2EccCoeffs['twoV0']*v0ecc*v0ecc) + (TF2EccCoeffs['threeV']*v*v*v + TF2EccCoeffs['threeV0']*v0ecc*v0ecc*v0ecc) + (TF2EccCoeffs['fourV4']*v*v*v*v + TF2EccCoeffs['fourV2V02']*v*v*v0ecc*v0ecc + TF2EccCoeffs['fourV04']*v0ecc*v0ecc*v0ecc*v0ecc) + (TF2EccCoeffs['fiveV5']*v*v*v*v*v + TF2EccCoeffs['fiveV3V02']*v*v*v*v0ecc*v0ecc + TF2EccCoeffs['fiveV2V03']*v*v*v0ecc*v0ecc*v0ecc + TF2EccCoeffs['fiveV05']*v0ecc*v0ecc*v0ecc*v0ecc*v0ecc) + ((TF2EccCoeffs['sixV6'] + 53.6803271/3.9564000*np.log(16.*v*v))*(v**6) + TF2EccCoeffs['sixV4V02']*v*v*v*v*v0ecc*v0ecc + TF2EccCoeffs['sixV3V03']*v*v*v*v0ecc*v0ecc*v0ecc + TF2EccCoeffs['sixV2V04']*v*v*v0ecc*v0ecc*v0ecc*v0ecc + (TF2EccCoeffs['sixV06'] - 33.17/2.52*np.log(16.*v0ecc*v0ecc))*(v0ecc**6)))
+        
+        else:
+            phi_Ecc = 0.
+            
+        if self.is_tidal:
+            # Add tidal contribution if needed, as in PhysRevD.89.103012
+            Lambda1, Lambda2 = kwargs['Lambda1'], kwargs['Lambda2']
+            Lam_t, delLam    = utils.Lamt_delLam_from_Lam12(Lambda1, Lambda2, eta)
+            
+            phi_Tidal = (-0.5*39.*Lam_t)*(v**10.) + (-3115./64.*Lam_t + 6595./364.*Seta*delLam)*(v**12.)
+            
+        else:
+            phi_Tidal = 0.
+        
+        phase = TF2OverallAmpl*(TF2coeffs['zero'] + TF2coeffs['one']*v + TF2coeffs['two']*v*v + TF2coeffs['three']*v**3 + TF2coeffs['four']*v**4 + (TF2coeffs['five'] + TF2coeffs['five_log']*np.log(v))*v**5 + (TF2coeffs['six'] + TF2coeffs['six_log']*np.log(v))*v**6 + TF2coeffs['seven']*v**7 + phi_Tidal + phi_Ecc)/(v**5.)
+            
+        return phase + phiR - np.pi*0.25
+
+    def Ampl(self, f, **kwargs):
+        # In the restricted PN approach the amplitude is the same as for the Newtonian approximation, so this term is equivalent
+        amplitude = np.sqrt(5./24.) * (np.pi**(-2./3.)) * glob.clightGpc/kwargs['dL'] * (glob.GMsun_over_c3*kwargs['Mc'])**(5./6.) * (f**(-7./6.))
+        return amplitude
+    
+    def tau_star(self, f, **kwargs):
+        Mtot_sec = kwargs['Mc']*glob.GMsun_over_c3/(kwargs['eta']**(3./5.))
+        v = (np.pi*Mtot_sec*f)**(1./3.)
+        eta = kwargs['eta']
+        eta2 = eta*eta
+        
+        OverallFac = 5./256 * Mtot_sec/(eta*(v**8.))
+        
+        t05 = 1. + (743./252. + 11./3.*eta)*(v*v) - 32./5.*np.pi*(v*v*v) + (3058673./508032. + 5429./504.*eta + 617./72.*eta2)*(v**4) - (7729./252. - 13./3.*eta)*np.pi*(v**5)
+        t6  = (- 10052469856691./23471078400. + 128./3.*np.pi*np.pi + 6848./105.*np.euler_gamma + (3147553127./3048192. - 451./12.*np.pi*np.pi)*eta - 15211./1728.*eta2 + 25565./1296.*eta2*eta + 3424./105.*np.log(16.*v*v))*(v**6)
+        t7  = (- 15419335./127008. - 75703./756.*eta + 14809./378.*eta2)*np.pi*(v**7)
+        
+        return OverallFac*(t05 + t6 + t7)
+
+def bench_fisher_integral(FLAGS):
+    '''
+    Compare the element-by-element and the vectorised frequency integration of the Fisher matrix, for each waveform model.
+    '''
+    print('\n%-22s %8s %10s %12s %12s %9s %10s' %('wf_model', 'nParams', 'nevents', 't_loop [s]', 't_vec [s]', 'speedup', 'max_rdiff'))
+    for wf_name in FLAGS.wf_model:
+        wf_model = wf_models_dict[wf_name]()
+        mySignal = get_signal(wf_model)
+        evParams = draw_events(wf_model, FLAGS.nevents, seed=FLAGS.seed)
+
+        fgrid = mySignal.make_fgrid(evParams, res=FLAGS.res)
+        fgrids, strainGrids, quadWeights = onp.asarray(fgrid.fgrids), onp.asarray(fgrid.strainGrids), onp.asarray(fgrid.quadWeights)
+        # Random derivatives with the correct shape are enough to time the integration
+        rng = onp.random.default_rng(FLAGS.seed)
+        FisherDerivs = rng.normal(size=(wf_model.nParams, FLAGS.nevents, FLAGS.res)) + 1j*rng.normal(size=(wf_model.nParams, FLAGS.nevents, FLAGS.res))
+
+        t_loop, F_loop = time_call(lambda: _FisherIntegral_loop(FisherDerivs, fgrids, strainGrids), nrep=FLAGS.nrep)
+        t_vec, F_vec   = time_call(lambda: mySignal._FisherIntegral(FisherDerivs, quadWeights), nrep=FLAGS.nrep)
+
+        rdiff = onp.amax(onp.abs(F_vec-F_loop))/onp.amax(onp.abs(F_loop))
+        print('%-22s %8d %10d %12.4f %12.4f %9.1f %10.2e' %(wf_name, wf_model.nParams, FLAGS.nevents, t_loop, t_vec, t_loop/t_vec, rdiff))
+
+def bench_freq_chunk(FLAGS):
+    '''
+    Compare the Fisher matrices computed on the whole frequency grid and accumulating the integral over blocks of res/8 points, for each waveform model. The waveform models take the extremes of the grid as reference frequencies, so the two have to agree up to round-off: the check fails if the maximum relative difference on the elements of the Fisher matrix, normalised to the diagonal elements, exceeds 1e-10.
+    '''
+    print('\n%-22s %8s %10s %12s %12s %10s %8s' %('wf_model', 'res', 'freq_chunk', 't_full [s]', 't_chunk [s]', 'max_rdiff', 'check'))
+    passed = True
+    for wf_name in FLAGS.wf_model:
+        wf_model = wf_models_dict[wf_name]()
+        mySignal = get_signal(wf_model, psd_path=FLAGS.psd_path, fmin=FLAGS.fmin)
+        evParams = draw_events(wf_model, FLAGS.nevents, seed=FLAGS.seed)
+        freq_chunk = max(FLAGS.res//8, 1)
+        
+        # The first calls include the tracing and compilation
+        _ = mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res)
+        _ = mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res, freq_chunk=freq_chunk)
+        t_full, F_full = time_call(lambda: mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res), nrep=FLAGS.nrep)
+        t_chunk, F_chunk = time_call(lambda: mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res, freq_chunk=freq_chunk), nrep=FLAGS.nrep)
+        
+        diag = onp.sqrt(onp.abs(onp.einsum('iie->ie', F_full)))
+        rdiff = onp.amax(onp.abs(F_chunk-F_full)/(diag[:,onp.newaxis,:]*diag[onp.newaxis,:,:]))
+        # The comparison is False for nan, which thus fails the check
+        check = bool(rdiff<1e-10)
+        passed = passed and check
+        print('%-22s %8d %10d %12.4f %12.4f %10.2e %8s' %(wf_name, FLAGS.res, freq_chunk, t_full, t_chunk, rdiff, 'ok' if check else 'FAILED'))
+    return passed
+
+def bench_deriv_mode(FLAGS):
+    '''
+    Compare forward and reverse mode automatic differentiation in the computation of the Fisher matrix, for each waveform model.
+    '''
+    print('\n%-22s %8s %10s %12s %12s %9s %10s' %('wf_model', 'nParams', 'nevents', 't_rev [s]', 't_fwd [s]', 'speedup', 'max_rdiff'))
+    for wf_name in FLAGS.wf_model:
+        wf_model = wf_models_dict[wf_name]()
+        mySignal = get_signal(wf_model, jitCompileDerivs=bool(FLAGS.jit))
+        evParams = draw_events(wf_model, FLAGS.nevents, seed=FLAGS.seed)
+
+        res = {}
+        for mode in ['rev', 'fwd']:
+            # The first call includes the tracing and, if jit compiling, the compilation
+            _ = mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res, deriv_mode=mode)
+            res[mode] = time_call(lambda: mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res, deriv_mode=mode), nrep=FLAGS.nrep)
+
+        diag = onp.sqrt(onp.abs(onp.einsum('iie->ie', res['rev'][1])))
+        rdiff = onp.amax(onp.abs(res['fwd'][1]-res['rev'][1])/(diag[:,onp.newaxis,:]*diag[onp.newaxis,:,:]))
+        print('%-22s %8d %10d %12.4f %12.4f %9.1f %10.2e' %(wf_name, wf_model.nParams, FLAGS.nevents, res['rev'][0], res['fwd'][0], res['rev'][0]/res['fwd'][0], rdiff))
+
+def bench_jit_kernels(FLAGS):
+    '''
+    Compare the SNR and Fisher matrix computed jit compiling only the derivatives and jit compiling the whole computation, for each waveform model, on batches of different sizes. The time of the first call of the Fisher matrix for each batch size, which includes the compilation if needed, and the number of compilations of the Fisher kernel are also reported.
+    '''
+    print('\n%-22s %10s %14s %14s %14s %14s %14s %14s %10s %10s' %('wf_model', 'nevents', 't_snr_op [s]', 't_snr_jit [s]', 't_fish_der [s]', 't_fish_jit [s]', 't_first_der [s]', 't_first_jit [s]', 'max_rdiff', 'n_compiled'))
+    for wf_name in FLAGS.wf_model:
+        wf_model = wf_models_dict[wf_name]()
+        mySignals = {jitK: get_signal(wf_model, jitCompileDerivs=True, jitCompileKernels=jitK) for jitK in [False, True]}
+        # Batches of sizes between nevents/2 and nevents, as the chunks of a catalog
+        for nevents in sorted(set([max(FLAGS.nevents//2, 1), max(3*FLAGS.nevents//4, 1), FLAGS.nevents])):
+            evParams = draw_events(wf_model, nevents, seed=FLAGS.seed)
+            res = {}
+            for jitK, mySignal in mySignals.items():
+                # The first call includes the tracing and, if jit compiling, the compilation
+                _ = mySignal.SNRInteg(copy.deepcopy(evParams), res=FLAGS.res)
+                t_first, _ = time_call(lambda: mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res), nrep=1)
+                res[jitK] = (time_call(lambda: onp.asarray(mySignal.SNRInteg(copy.deepcopy(evParams), res=FLAGS.res)), nrep=FLAGS.nrep),
+                             time_call(lambda: mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res), nrep=FLAGS.nrep),
+                             t_first)
+            diag = onp.sqrt(onp.abs(onp.einsum('iie->ie', res[False][1][1])))
+            rdiff = onp.amax(onp.abs(res[True][1][1]-res[False][1][1])/(diag[:,onp.newaxis,:]*diag[onp.newaxis,:,:]))
+            print('%-22s %10d %14.4f %14.4f %14.4f %14.4f %14.4f %14.4f %10.2e %10d' %(wf_name, nevents, res[False][0][0], res[True][0][0], res[False][1][0], res[True][1][0], res[False][2], res[True][2], rdiff, mySignals[True]._FisherKernel_use._cache_size()))
+
+def bench_quadrature(FLAGS):
+    '''
+    Compare the accuracy of the SNRs and Fisher matrices computed with the different quadrature rules, as a function of the resolution of the frequency grid, for each waveform model. The reference is computed with the trapezoid rule at resolution res_ref. The errors are the maximum over the events of the relative error on the squared SNR and on the elements of the Fisher matrix, normalised to the diagonal elements.
+    '''
+    print('\n%-22s %10s %8s %12s %12s %12s %12s' %('wf_model', 'quadrature', 'res', 't_snr [s]', 't_fish [s]', 'err_snr', 'err_fish'))
+    for wf_name in FLAGS.wf_model:
+        wf_model = wf_models_dict[wf_name]()
+        mySignal = get_signal(wf_model, psd_path=FLAGS.psd_path, fmin=FLAGS.fmin)
+        evParams = draw_events(wf_model, FLAGS.nevents, seed=FLAGS.seed)
+
+        SNRsq_ref = onp.asarray(mySignal.SNRInteg(copy.deepcopy(evParams), res=FLAGS.res_ref))**2
+        # Split the reference grid in blocks to bound the memory usage
+        F_ref = mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res_ref, freq_chunk=FLAGS.res)
+        diag = onp.sqrt(onp.abs(onp.einsum('iie->ie', F_ref)))
+
+        for res in sorted(set([max(FLAGS.res//8, 3), max(FLAGS.res//4, 3), max(FLAGS.res//2, 3), FLAGS.res])):
+            for quadrature in ['trapz', 'simpson', 'gauss']:
+                # The first calls include the tracing and compilation for the given resolution
+                _ = mySignal.SNRInteg(copy.deepcopy(evParams), res=res, quadrature=quadrature)
+                _ = mySignal.FisherMatr(copy.deepcopy(evParams), res=res, quadrature=quadrature)
+                t_snr, SNRs = time_call(lambda: onp.asarray(mySignal.SNRInteg(copy.deepcopy(evParams), res=res, quadrature=quadrature)), nrep=FLAGS.nrep)
+                t_fish, F = time_call(lambda: mySignal.FisherMatr(copy.deepcopy(evParams), res=res, quadrature=quadrature), nrep=FLAGS.nrep)
+                err_snr = onp.amax(onp.abs(SNRs**2-SNRsq_ref)/SNRsq_ref)
+                err_fish = onp.amax(onp.abs(F-F_ref)/(diag[:,onp.newaxis,:]*diag[onp.newaxis,:,:]))
+                print('%-22s %10s %8d %12.4f %12.4f %12.2e %12.2e' %(wf_name, quadrature, res, t_snr, t_fish, err_snr, err_fish))
+
+def bench_psd_table(FLAGS):
+    '''
+    Compare the interpolation of the PSD on the frequency grids of a batch of events, with the linear interpolation of the file and with the lookup table evenly spaced in log-frequency, for tables of different sizes. The error of the table on the squared SNR of the inspiral, as estimated at construction, and the maximum relative difference on the SNRs of the batch are also reported.
+    '''
+    print('\n%-22s %10s %12s %12s %9s %12s %12s' %('wf_model', 'table_res', 't_interp [s]', 't_table [s]', 'speedup', 'err_table', 'max_rdiff'))
+    for wf_name in FLAGS.wf_model:
+        wf_model = wf_models_dict[wf_name]()
+        evParams = draw_events(wf_model, FLAGS.nevents, seed=FLAGS.seed)
+        mySignal = get_signal(wf_model, psd_path=FLAGS.psd_path, fmin=FLAGS.fmin)
+        fgrids = mySignal.make_fgrid(copy.deepcopy(evParams), res=FLAGS.res).fgrids
+        SNRs = onp.asarray(mySignal.SNRInteg(copy.deepcopy(evParams), res=FLAGS.res))
+        interpFun = jax.jit(mySignal._PSDInterp)
+        _ = interpFun(fgrids).block_until_ready()
+        t_interp, _ = time_call(lambda: interpFun(fgrids).block_until_ready(), nrep=FLAGS.nrep)
+        for tableRes in [2**12, 2**14, 2**16, 2**18]:
+            mySignalTable = get_signal(wf_model, psd_path=FLAGS.psd_path, fmin=FLAGS.fmin, psdTableRes=tableRes)
+            tableFun = jax.jit(mySignalTable._PSDInterp)
+            _ = tableFun(fgrids).block_until_ready()
+            t_table, _ = time_call(lambda: tableFun(fgrids).block_until_ready(), nrep=FLAGS.nrep)
+            rdiff = onp.amax(onp.abs(onp.asarray(mySignalTable.SNRInteg(copy.deepcopy(evParams), res=FLAGS.res))/SNRs - 1.))
+            print('%-22s %10d %12.4f %12.4f %9.1f %12.2e %12.2e' %(wf_name, tableRes, t_interp, t_table, t_interp/t_table, mySignalTable.psdTableError, rdiff))
+
+def bench_relative_binning(FLAGS):
+    '''
+    Compare the Fisher matrices computed on the full frequency grid of resolution res and with relative binning, for different numbers of bins, including the motion of the Earth. The errors are the maximum over the events of the relative error on the elements of the Fisher matrix, normalised to the diagonal elements, with respect to the full grid. The check fails if the error with the largest number of bins exceeds rel_bins_tol. It is not performed for the models with higher modes, for which relative binning is not accurate.
+    '''
+    print('\n%-22s %8s %8s %12s %12s %9s %12s %8s' %('wf_model', 'res', 'rel_bins', 't_full [s]', 't_bins [s]', 'speedup', 'err_fish', 'check'))
+    passed = True
+    for wf_name in FLAGS.wf_model:
+        wf_model = wf_models_dict[wf_name]()
+        mySignal = get_signal(wf_model, psd_path=FLAGS.psd_path, fmin=FLAGS.fmin, useEarthMotion=True, jitCompileKernels=True)
+        evParams = draw_events(wf_model, FLAGS.nevents, seed=FLAGS.seed)
+        
+        # The first calls include the tracing and compilation
+        _ = mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res)
+        t_full, F_full = time_call(lambda: mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res), nrep=FLAGS.nrep)
+        diag = onp.sqrt(onp.abs(onp.einsum('iie->ie', F_full)))
+        
+        allRelBins = sorted(set([max(FLAGS.res//64, 1), max(FLAGS.res//32, 1), max(FLAGS.res//16, 1), max(FLAGS.res//8, 1)]))
+        for relBins in allRelBins:
+            _ = mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res, relBins=relBins)
+            t_bins, F = time_call(lambda: mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res, relBins=relBins), nrep=FLAGS.nrep)
+            err_fish = onp.amax(onp.abs(F-F_full)/(diag[:,onp.newaxis,:]*diag[onp.newaxis,:,:]))
+            if relBins!=allRelBins[-1]:
+                check = ''
+            elif wf_model.is_HigherModes:
+                check = 'n/a'
+            else:
+                # The comparison is False for nan, which thus fails the check
+                check = 'ok' if err_fish<FLAGS.rel_bins_tol else 'FAILED'
+                passed = passed and (check=='ok')
+            print('%-22s %8d %8d %12.4f %12.4f %9.1f %12.2e %8s' %(wf_name, FLAGS.res, relBins, t_full, t_bins, t_full/t_bins, err_fish, check))
+    return passed
+
+def bench_parallel_inversion(FLAGS):
+    '''
+    Time the inversion (CovMatr) and the eigendecomposition (CheckFisher) with mpmath of the Fisher matrices of a batch of events, with the events split among different numbers of processes. The times include the start of the pool of processes. The results and the speedup are relative to the first number of processes.
+    '''
+    print('\n%-22s %10s %10s %12s %12s %9s %10s' %('wf_model', 'nevents', 'n_workers', 't_cov [s]', 't_check [s]', 'speedup', 'identical'))
+    for wf_name in FLAGS.wf_model:
+        wf_model = wf_models_dict[wf_name]()
+        mySignal = get_signal(wf_model, psd_path=FLAGS.psd_path, fmin=FLAGS.fmin)
+        evParams = draw_events(wf_model, FLAGS.nevents, seed=FLAGS.seed)
+        FisherM = onp.asarray(mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res))
+        
+        # The first of the numbers of processes is the reference
+        for i, n_workers in enumerate([n for n in FLAGS.n_workers if n<=os.cpu_count()]):
+            t_cov, (Cov, eps) = time_call(lambda: CovMatr(FisherM, n_workers=n_workers), nrep=1)
+            t_check, (evals, _, _) = time_call(lambda: CheckFisher(FisherM, n_workers=n_workers), nrep=1)
+            if i==0:
+                t_ref, Cov_ref, evals_ref = t_cov+t_check, Cov, evals
+            identical = onp.array_equal(Cov, Cov_ref, equal_nan=True) and onp.array_equal(evals, evals_ref, equal_nan=True)
+            print('%-22s %10d %10d %12.4f %12.4f %9.1f %10s' %(wf_name, FLAGS.nevents, n_workers, t_cov, t_check, t_ref/(t_cov+t_check), identical))
+
+def bench_tf2_horner(FLAGS):
+    '''
+    Compare the TaylorF2 models evaluating the PN expansions term by term and with the coefficients precomputed per event and the Horner scheme: time of the jit compiled evaluation of the phase, amplitude and time to coalescence on the frequency grids of a batch, and of the computation of the SNRs and Fisher matrices, including the motion of the Earth and jit compiling the whole computation. The maximum relative difference on the SNRs and on the elements of the Fisher matrices (normalised to the diagonal elements) is also reported. The other waveform models are skipped.
+    '''
+    print('\n%-22s %10s %12s %12s %13s %13s %13s %13s %10s' %('wf_model', 'nevents', 't_wf_dir [s]', 't_wf_hor [s]', 't_snr_dir [s]', 't_snr_hor [s]', 't_fish_dir [s]', 't_fish_hor [s]', 'max_rdiff'))
+    for wf_name in FLAGS.wf_model:
+        wf_model = wf_models_dict[wf_name]()
+        if type(wf_model) is not TaylorF2_RestrictedPN:
+            continue
+        wf_direct = _TaylorF2_direct(is_tidal=wf_model.is_tidal, use_3p5PN_SpinHO=wf_model.use_3p5PN_SpinHO, is_eccentric=wf_model.is_eccentric)
+        evParams = draw_events(wf_model, FLAGS.nevents, seed=FLAGS.seed)
+        
+        res = {}
+        for key, wf in [('direct', wf_direct), ('horner', wf_model)]:
+            mySignal = get_signal(wf, psd_path=FLAGS.psd_path, fmin=FLAGS.fmin, useEarthMotion=True, jitCompileKernels=True)
+            fgrids = mySignal.make_fgrid(copy.deepcopy(evParams), res=FLAGS.res).fgrids
+            wfFun = jax.jit(lambda f, pars: (wf.Phi(f, **pars), wf.Ampl(f, **pars), wf.tau_star(f, **pars)))
+            # The first calls include the tracing and compilation
+            _ = jax.block_until_ready(wfFun(fgrids, evParams))
+            _ = mySignal.SNRInteg(copy.deepcopy(evParams), res=FLAGS.res)
+            _ = mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res)
+            res[key] = (time_call(lambda: jax.block_until_ready(wfFun(fgrids, evParams)), nrep=FLAGS.nrep),
+                        time_call(lambda: onp.asarray(mySignal.SNRInteg(copy.deepcopy(evParams), res=FLAGS.res)), nrep=FLAGS.nrep),
+                        time_call(lambda: mySignal.FisherMatr(copy.deepcopy(evParams), res=FLAGS.res), nrep=FLAGS.nrep))
+        
+        diag = onp.sqrt(onp.abs(onp.einsum('iie->ie', res['direct'][2][1])))
+        rdiff = max(onp.amax(onp.abs(res['horner'][1][1]/res['direct'][1][1] - 1.)), onp.amax(onp.abs(res['horner'][2][1]-res['direct'][2][1])/(diag[:,onp.newaxis,:]*diag[onp.newaxis,:,:])))
+        print('%-22s %10d %12.4f %12.4f %13.4f %13.4f %13.4f %13.4f %10.2e' %(wf_name, FLAGS.nevents, res['direct'][0][0], res['horner'][0][0], res['direct'][1][0], res['horner'][1][0], res['direct'][2][0], res['horner'][2][0], rdiff))
+
+benchmarks_dict = {'fisher_integral':bench_fisher_integral,
+                   'freq_chunk':bench_freq_chunk,
+                   'deriv_mode':bench_deriv_mode,
+                   'jit_kernels':bench_jit_kernels,
+                   'quadrature':bench_quadrature,
+                   'psd_table':bench_psd_table,
+                   'relative_binning':bench_relative_binning,
+                   'parallel_inversion':bench_parallel_inversion,
+                   'tf2_horner':bench_tf2_horner,
+                  }
+
+#####################################################################################
+#####################################################################################
+
+if __name__ =='__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmarks of the main computational kernels of gwfast.')
+    parser.add_argument("--which", nargs='+', default=list(benchmarks_dict.keys()), type=str, required=False, help='Benchmarks to run, among %s.' %(', '.join(benchmarks_dict.keys())))
+    parser.add_argument("--wf_model", nargs='+', default=list(wf_models_dict.keys()), type=str, required=False, help='Waveform models to use, among %s.' %(', '.join(wf_models_dict.keys())))
+    parser.add_argument("--nevents", default=100, type=int, required=False, help='Number of events in the batch.')
+    parser.add_argument("--res", default=1000, type=int, required=False, help='Resolution of the frequency grid.')
+    parser.add_argument("--res_ref", default=32768, type=int, required=False, help='Resolution of the frequency grid used to compute the reference values, where relevant.')
+    parser.add_argument("--psd_path", default=None, type=str, required=False, help='Path to the PSD file to use. If not specified, the ET-D sensitivity curve is used.')
+    parser.add_argument("--fmin", default=2., type=float, required=False, help='Minimum frequency of the grids, in Hz, where relevant. This should not be below the lowest frequency of the PSD file, where the integrands are discontinuous.')
+    parser.add_argument("--nrep", default=3, type=int, required=False, help='Number of repetitions of each timing; the best one is reported.')
+    parser.add_argument("--jit", default=1, type=int, required=False, help='Int specifying if the derivatives have to be jit compiled (``1``) or not (``0``), where relevant.')
+    parser.add_argument("--n_workers", nargs='+', default=[1, 2, 4, 8, 16, 32], type=int, required=False, help='Numbers of processes to use, where relevant. The ones above the number of available cores are skipped, and the first one is the reference.')
+    parser.add_argument("--rel_bins_tol", default=1e-2, type=float, required=False, help='Maximum error on the elements of the Fisher matrix (normalised to the diagonal elements) with relative binning and res/8 bins, for the check of the relative_binning benchmark.')
+    parser.add_argument("--seed", default=None, type=int, required=False, help='Seed for the random draws.')
+
+    FLAGS = parser.parse_args()
+
+    # The benchmarks that also check the accuracy of the results return False if a check fails
+    failed = []
+    for which in FLAGS.which:
+        print('\n------ Benchmark: %s ------' %which)
+        if benchmarks_dict[which](FLAGS) is False:
+            failed.append(which)
+    
+    if len(failed)>0:
+        sys.exit('\nChecks failed in the benchmarks: %s' %(', '.join(failed)))
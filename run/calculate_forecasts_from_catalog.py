@@ -20,6 +20,7 @@ PACKAGE_PARENT = '../gwfast'
 SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd())))
 sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR,PACKAGE_PARENT )))
 import copy
+from concurrent.futures import ThreadPoolExecutor
 import numpy as onp
 import argparse
 import h5py
@@ -31,8 +32,8 @@ from gwfast.gwfastGlobals import detectors as base_dets
 from gwfast.waveforms import TaylorF2_RestrictedPN, IMRPhenomD, IMRPhenomHM, IMRPhenomD_NRTidalv2, IMRPhenomNSBH
 from gwfast.signal import GWSignal
 from gwfast.network import DetNet
-from gwfast.fisherTools import compute_localization_region, fixParams, CheckFisher, CovMatr, compute_inversion_error
-from gwfast.gwfastUtils import  get_events_subset, save_detectors, load_population, save_data
+from gwfast.fisherTools import compute_localization_region, fixParams, CheckFisher, CovMatr, AnalyseFisher, compute_inversion_error
+from gwfast.gwfastUtils import  get_events_subset, save_detectors, load_population, save_data, compilation_cache_stats
 
 try:
     import lal
@@ -290,6 +291,8 @@ def delete_files(idxin, idxf, out_path):
     print('Removing unnecessary files from %s to %s... ' %(idxin, idxf))
     suff = '_'+str(idxin)+'_to_'+str(idxf)
     os.remove(os.path.join(out_path, 'snrs'+suff+'.txt'))
+    if os.path.exists(os.path.join(out_path, 'snr_screened'+suff+'.txt')):
+        os.remove(os.path.join(out_path, 'snr_screened'+suff+'.txt'))
     try:
         os.remove(os.path.join(out_path, 'all_snrs'+suff+'.hdf5'))
     except Exception as e:
@@ -387,7 +390,22 @@ def compute_errs(events, net, FLAGS, i_in, i_f):
 
     print('Computing snrs...')
     tsnrinit=  time.time()
-    snrs_all_df1 = net.SNR(events, return_all=True) #FLAGS.return_all)
+    if FLAGS.snr_screen:
+        # Discard the events far below threshold with a cheap computation, the exact SNRs are computed only for the remaining ones
+        is_cand, snrs_all_df1 = net.ScreenSNR(events, FLAGS.snr_th, screen_res=FLAGS.snr_screen_res, margin=FLAGS.snr_screen_margin, return_all=True)
+    else:
+        is_cand = onp.full(nevents, True)
+    # The frequency grids, PSDs and quadrature weights are computed once per detector and reused for the FIMs
+    fgridArgs = {} if FLAGS.multiband_dt is None else {'spacing':'multiband', 'bandDt':FLAGS.multiband_dt}
+    if is_cand.all():
+        fgrids = net.make_fgrids(events, res=FLAGS.res, quadrature=FLAGS.quadrature, **fgridArgs)
+        snrs_all_df1 = net.SNR(events, return_all=True, fgrids=fgrids) #FLAGS.return_all)
+    elif is_cand.any():
+        events_cand = get_events_subset(events, is_cand)
+        fgrids = net.make_fgrids(events_cand, res=FLAGS.res, quadrature=FLAGS.quadrature, **fgridArgs)
+        snrs_cand = net.SNR(events_cand, return_all=True, fgrids=fgrids)
+        for k in snrs_all_df1.keys():
+            snrs_all_df1[k][is_cand] = snrs_cand[k]
     
     # Impose duty
     if (FLAGS.duty_factor is None) or (FLAGS.duty_factor>=1):
@@ -442,6 +460,8 @@ def compute_errs(events, net, FLAGS, i_in, i_f):
         
     print('%s events have snr>%s' %( detected.sum(), FLAGS.snr_th))
     print('%s events have snr>%s with duty factor 1' %( detected_all.sum(), FLAGS.snr_th))
+    if FLAGS.snr_screen:
+        print('%s events discarded by the SNR screening, %s by the exact computation (with duty factor 1)' %( (~is_cand).sum(), (is_cand & ~detected_all).sum()))
     idxs_detected = onp.arange(i_in, i_f)[onp.argwhere(detected)]
     
     events_det = get_events_subset(events, detected)
@@ -474,12 +494,15 @@ def compute_errs(events, net, FLAGS, i_in, i_f):
         tFinit=  time.time()
         
         Fres_df1_ = net.FisherMatr( events_det, 
-                                              res=1000, 
+                                              res=FLAGS.res, 
+                                              fgrids={d: fgrids[d].subset(detected[is_cand]) for d in fgrids.keys()}, 
                                               df=None, 
                                               spacing='geom', 
                                               use_chi1chi2=True, 
                                               computeAnalyticalDeriv=True, 
-                                              return_all=True ) #FLAGS.return_all)
+                                              return_all=True, #FLAGS.return_all)
+                                              freq_chunk=FLAGS.freq_chunk, 
+                                              relBins=FLAGS.rel_bins ) 
         
         
         if (FLAGS.duty_factor is None) or (FLAGS.duty_factor>=1):
@@ -538,8 +561,6 @@ def compute_errs(events, net, FLAGS, i_in, i_f):
         print('... which is, %s seconds/fisher' %(str( (tFend-tFinit)/nevents_det ) ))
 
         
-        _, _, cond_numbers = CheckFisher(totF, use_mpmath=True)
-        
         npar = totF.shape[0]
         
         Cov_dL = onp.full( totF.shape, onp.nan)
@@ -547,13 +568,18 @@ def compute_errs(events, net, FLAGS, i_in, i_f):
         my_sky_area_90 = onp.full( totF.shape[-1], onp.nan)
         
         try:
-            Cov_dL, eps_dL = CovMatr( totF,
+            # A single eigendecomposition per event for the condition numbers and the inversion
+            _, _, cond_numbers, Cov_dL, eps_dL, inv_stats = AnalyseFisher( totF,
                                                                invMethodIn='cho', 
                                                                condNumbMax=1e50, 
                                                                svals_thresh=1e-15, 
                                                                truncate=False, 
-                                                               verbose=False
+                                                               verbose=False,
+                                                               fastPath=FLAGS.fast_inversion,
+                                                               return_stats=True
                                                                )
+            if FLAGS.fast_inversion:
+                print('%s covariance matrices computed in double precision, %s with mpmath' %(inv_stats['fast'], inv_stats['mpmath']))
             
             #eps_dL = compute_inversion_error(totF, Cov_dL)
             print('Computing localization region...')
@@ -567,7 +593,8 @@ def compute_errs(events, net, FLAGS, i_in, i_f):
             cond_numbers = onp.full(totF.shape[-1], onp.nan)
     
 
-    return snrs_all, Fres, eps_dL, Cov_dL, my_sky_area_90, cond_numbers, idxs_detected
+    # The SNRs of the events discarded by the screening are the ones computed for the screening, and are flagged
+    return snrs_all, Fres, eps_dL, Cov_dL, my_sky_area_90, cond_numbers, idxs_detected, ~is_cand
 
 
 
@@ -631,6 +658,11 @@ def main(idx, FLAGS):
         else:
             jitCompileDerivs=False
         
+        if (FLAGS.jit_kernels) and (not wf_model.is_LAL):
+            jitCompileKernels=True
+        else:
+            jitCompileKernels=False
+        
         mySignals = {}
 
         for d in Net.keys():
@@ -646,10 +678,16 @@ def main(idx, FLAGS):
                     fmin=FLAGS.fmin, fmax=FLAGS.fmax,
                     IntTablePath=None, 
                     DutyFactor=None,
-                    jitCompileDerivs=jitCompileDerivs) #FLAGS.duty_factor) 
+                    jitCompileDerivs=jitCompileDerivs,
+                    jitCompileKernels=jitCompileKernels,
+                    shardEvents=bool(FLAGS.shard_events),
+                    compilationCacheDir=FLAGS.jax_cache_dir,
+                    psdTableRes=FLAGS.psd_table_res) #FLAGS.duty_factor) 
             
 
-        myNet = DetNet(mySignals) 
+        # The threads are released with shutdown once all the chunks have been computed
+        executor = ThreadPoolExecutor(FLAGS.n_threads) if FLAGS.n_threads>1 else None
+        myNet = DetNet(mySignals, executor=executor) 
         
         #if FLAGS.seed is not None:
         myNet._update_all_seeds(seeds=FLAGS.seeds, verbose=True)
@@ -674,8 +712,11 @@ def main(idx, FLAGS):
             print('\nIn this chunk we have %s events, from %s to %s' %(nevents_chunk, i_in,  i_f  ))
             
          
-            snrs_all, F_all, eps_dL, Cov_dL, my_sky_area_90, condition_numbers, idxs_detected = compute_errs(ev_chunk, myNet, FLAGS, i_in, i_f)                      
+            snrs_all, F_all, eps_dL, Cov_dL, my_sky_area_90, condition_numbers, idxs_detected, is_screened = compute_errs(ev_chunk, myNet, FLAGS, i_in, i_f)                      
             suffstr = '_'+str(idxin+FLAGS.idx_in)+'_to_'+str(idxf+FLAGS.idx_in)
+            if FLAGS.snr_screen:
+                print('Saving flags of the SNRs computed for the screening. Name: %s' %('snr_screened'+suffstr+'.txt',))
+                onp.savetxt(os.path.join(FLAGS.fout, 'snr_screened'+suffstr+'.txt'), onp.atleast_1d(is_screened), fmt='%d')
         
             if FLAGS.return_all:
                 
@@ -712,11 +753,17 @@ def main(idx, FLAGS):
                     snrs = onp.array([snrs,])
                 print('Saving only snrs to files. Names of snrs: %s' %('snrs'+suffstr+'.txt',))
                 onp.savetxt(os.path.join(FLAGS.fout, 'snrs'+suffstr+'.txt'), snrs)
+        
+        if executor is not None:
+            executor.shutdown()
     
         te=time.time()
         print('------')
         print('------ Time to compute events: %s sec.\n\n' %( str((te-ti_evs))))
         print('------ Total execution time: %s sec.\n\n' %( str((te-ti))))
+        if FLAGS.jax_cache_dir is not None:
+            cache_stats = compilation_cache_stats()
+            print('------ JAX compilation cache: %s hits, %s misses.\n\n' %(cache_stats['hits'], cache_stats['misses']))
         print('------ Done for %s. ' %(wf_model_name ))
         myLog.close()
         
@@ -750,6 +797,20 @@ parser.add_argument("--lalargs", nargs='+', default=[ ], type=str, required=Fals
 parser.add_argument("--return_all", default=0, type=int, required=False, help='Int specifying if, in case a network of detectors is used, the SNRs and Fishher matrices of the individual detector have to be stored (``1``) or not (``0``).')
 parser.add_argument("--seeds", nargs='+', default=[ ], type=int, required=False, help='List of seeds to set for the duty factors in individual detectors, to help reproducibility, separated by *single spacing*.') # This should be one per detector (one per arm for triangular shapes)
 parser.add_argument("--jit_Fisher", default=0, type=int, required=False, help='Int specifying if the Fisher function has to be jit compiled (``1``) or not (``0``). This works only if computing derivatives using JAX.')
+parser.add_argument("--jit_kernels", default=0, type=int, required=False, help='Int specifying if the whole computation of the SNRs and Fisher matrices has to be jit compiled (``1``) or not (``0``). The batches are padded to the next power of 2, so that the functions are compiled only a few times. This works only if computing derivatives using JAX.')
+parser.add_argument("--jax_cache_dir", default=None, type=str, required=False, help='Path to a directory in which to store the jit compiled functions, so that they can be reused by subsequent runs and by the other processes. If not specified, the functions are compiled in each process.')
+parser.add_argument("--freq_chunk", default=None, type=int, required=False, help='Number of points of the frequency grid to be processed at once when computing the FIMs. This bounds the memory usage, allowing larger values of **--batch_size**. If not specified, the whole grid is used at once.')
+parser.add_argument("--shard_events", default=0, type=int, required=False, help='Int specifying if the events of each batch have to be split among the available JAX devices (``1``) or not (``0``), so that they are computed in parallel within each process. This works only together with **--jit_kernels**. On CPU, the number of host devices is set through the ``XLA_FLAGS`` environment variable, and is 8 by default.')
+parser.add_argument("--snr_screen", default=0, type=int, required=False, help='Int specifying if the events far below **--snr_th** have to be discarded through a cheap computation of the SNR at low resolution (``1``), computing the exact SNRs only for the remaining ones, or not (``0``). The SNRs stored for the discarded events are the ones computed for the screening, and these events are flagged with ``1`` in the files ``snr_screened``.')
+parser.add_argument("--snr_screen_res", default=100, type=int, required=False, help='Resolution of the frequency grids used for the SNR screening.')
+parser.add_argument("--snr_screen_margin", default=0.1, type=float, required=False, help='Minimum relative distance from **--snr_th** for an event to be discarded by the SNR screening. This is a heuristic safety margin, not a bound on the error of the screening SNRs.')
+parser.add_argument("--res", default=1000, type=int, required=False, help='Resolution of the frequency grids used to compute the SNRs and Fisher matrices.')
+parser.add_argument("--quadrature", default='trapz', type=str, required=False, help='Quadrature rule used to compute the SNRs and Fisher matrices, among ``trapz`` (trapezoid rule), ``simpson`` (Simpson\'s rule) and ``gauss`` (Gauss-Legendre rule in log-frequency). The higher order rules reach the same accuracy with a lower **--res**.')
+parser.add_argument("--multiband_dt", default=None, type=float, required=False, help='If specified, the frequency grids are divided in bands in which the time to coalescence halves, and the points of each band are separated by at most this time, in seconds, and at most the spacing of a geometric grid with **--res** points. If not specified, geometric grids are used.')
+parser.add_argument("--rel_bins", default=None, type=int, required=False, help='If specified, number of bins of the frequency grids used to compute the Fisher matrices with relative binning: the derivatives of the signals are only computed at the edges of the bins, while the signals are still evaluated on the whole grids. This can reduce the cost of a large **--res** for long signals, by a factor that depends on the waveform model. If not specified, the derivatives are computed on the whole grids.')
+parser.add_argument("--fast_inversion", default=0, type=int, required=False, help='Int specifying if the FIMs have first to be inverted all at once in double precision, inverting with mpmath only the ill-conditioned ones and the ones with a large residual (``1``), or if all of them have to be inverted with mpmath (``0``). The number of matrices inverted in each way is printed.')
+parser.add_argument("--psd_table_res", default=None, type=int, required=False, help='If specified, number of points of the table, evenly spaced in log-frequency, on which the PSDs are resampled, so that their interpolation on the frequency grids does not require a search in the frequencies of the files. If not specified, the files are interpolated linearly.')
+parser.add_argument("--n_threads", default=1, type=int, required=False, help='Number of threads used by each process to compute the SNRs and FIMs of the detectors in the network concurrently. The results do not depend on this value.')
 
 if __name__ =='__main__':
 
@@ -936,7 +997,7 @@ if __name__ =='__main__':
                
         print('\nSaving final version to file...')
         if FLAGS.idx_f is None:
-                idxf = str(nevents_total)
+                idxf = str(FLAGS.idx_in+nevents_total)
         else: idxf = FLAGS.idx_f
             
         suffstr = '_'+str(FLAGS.idx_in)+'_to_'+str(idxf)      
@@ -946,6 +1007,7 @@ if __name__ =='__main__':
         res = []
         ndet_tot = 0
         fishers_initialised = False
+        screened = []
         for it in range(all_batch_sizes.shape[0]): # iterations
             for p in range(all_batch_sizes.shape[-1]): # pools
                 pf =  pin+all_batch_sizes[it, p]
@@ -962,6 +1024,8 @@ if __name__ =='__main__':
                     #print(len(res_))
                     # snrs, fishers, eps_dL, covs, sky_area, errors, cond_numbers
                     snrs = onp.concatenate([res[i][0] for i in range(len(res))], axis=-1)
+                    if FLAGS.snr_screen:
+                        screened.append(onp.atleast_1d(onp.loadtxt(os.path.join(FLAGS.fout, 'snr_screened'+suff_batch+'.txt'))).astype(int))
                     
                     snrs_ = res_[0]
                     ndet = (snrs_>FLAGS.snr_th).sum()
@@ -1008,6 +1072,8 @@ if __name__ =='__main__':
                     
                     pin = pf
     
+        if FLAGS.snr_screen:
+            onp.savetxt(os.path.join(FLAGS.fout, 'snr_screened'+suffstr+'.txt'), onp.concatenate(screened), fmt='%d')
         if (ndet_tot==0) or (FLAGS.compute_fisher==False):
             onp.savetxt(os.path.join(FLAGS.fout, 'snrs'+suffstr+'.txt'), snrs)    
         else:
@@ -1024,11 +1090,12 @@ if __name__ =='__main__':
             print('Saving catalog of detected events...')
             
             if FLAGS.compute_fisher==False:
-                idxs_det = onp.arange(0, idxf-FLAGS.idx_in)[ onp.argwhere(snrs>FLAGS.snr_th) ]
+                idxs_det = onp.arange(FLAGS.idx_in, FLAGS.idx_in+len(snrs))[ onp.argwhere(snrs>FLAGS.snr_th) ]
                 onp.savetxt(os.path.join(FLAGS.fout, 'idxs_det'+suffstr+'.txt'), idxs_det)    
                 
             
-            events_detected = {k: events_loaded[k][idxs_det.astype('int')] for k in events_loaded.keys()}
+            # The indices are positions in the original catalog, while the loaded events start at idx_in
+            events_detected = {k: events_loaded[k][idxs_det.astype('int')-FLAGS.idx_in] for k in events_loaded.keys()}
             save_data(os.path.join(FLAGS.fout, 'events_detected'+suffstr+'.hdf5'), events_detected, )
         
         if (FLAGS.npools>1) or (FLAGS.npools==1 and all_n_it_pools[0]>1): 
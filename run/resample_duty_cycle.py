@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+#    Copyright (c) 2022 Francesco Iacovelli <francesco.iacovelli@unige.ch>, Michele Mancarella <michele.mancarella@unige.ch>
+#
+#    All rights reserved. Use of this source code is governed by the
+#    license that can be found in the LICENSE file.
+
+import os
+import sys
+import time
+
+PACKAGE_PARENT = '../gwfast'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd())))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR,PACKAGE_PARENT )))
+import numpy as onp
+import argparse
+import h5py
+
+from gwfast.waveforms import TaylorF2_RestrictedPN, IMRPhenomD, IMRPhenomHM, IMRPhenomD_NRTidalv2, IMRPhenomNSBH
+from gwfast.fisherTools import fixParams, DutyCycleRealisations
+from gwfast.gwfastUtils import load_population
+
+#####################################################################################
+# GLOBALS
+#####################################################################################
+
+# Only the positions of the parameters are needed, so the models are instantiated only when used
+wf_models_dict = {'IMRPhenomD':lambda: IMRPhenomD(),
+                  'IMRPhenomHM':lambda: IMRPhenomHM(),
+                  'tf2':lambda: TaylorF2_RestrictedPN(is_tidal=False, use_3p5PN_SpinHO=True),
+                  'IMRPhenomD_NRTidalv2':lambda: IMRPhenomD_NRTidalv2(),
+                  'tf2_tidal':lambda: TaylorF2_RestrictedPN(is_tidal=True, use_3p5PN_SpinHO=True),
+                  'IMRPhenomNSBH':lambda: IMRPhenomNSBH(verbose=False),
+                  'tf2_ecc':lambda: TaylorF2_RestrictedPN(is_tidal=False, use_3p5PN_SpinHO=True, is_eccentric=True),
+                  }
+
+#####################################################################################
+# input/output logic
+#####################################################################################
+
+def load_idxs_det(out_path, suff=''):
+    '''
+    Load the indices of the detected events, as stored by calculate_forecasts_from_catalog.py.
+    '''
+    return onp.atleast_1d(onp.loadtxt(os.path.join(out_path, 'idxs_det'+suff+'.txt'))).astype('int')
+
+
+def load_all(out_path, suff=''):
+    '''
+    Load the SNRs and FIMs of the individual detectors, the indices of the detected events and their parameters, as stored by calculate_forecasts_from_catalog.py with --return_all 1.
+    '''
+    with h5py.File(os.path.join(out_path, 'all_snrs'+suff+'.hdf5'), 'r') as f:
+        allsnrs = {det: onp.atleast_1d(onp.array(f['snr'][det])) for det in f['snr'].keys()}
+    with h5py.File(os.path.join(out_path, 'all_fishers'+suff+'.hdf5'), 'r') as f:
+        allfishers = {det: onp.array(f['fisher'][det]) for det in f['fisher'].keys()}
+    idxs_det = load_idxs_det(out_path, suff=suff)
+    events_det = load_population(os.path.join(out_path, 'events_detected'+suff+'.hdf5'))
+    return allsnrs, allfishers, idxs_det, events_det
+
+
+def summary(x):
+    '''
+    Mean, standard deviation, 5th, 50th and 95th percentiles of a quantity among the realisations.
+    '''
+    return onp.array([onp.mean(x), onp.std(x)]+list(onp.percentile(x, [5, 50, 95])))
+
+
+def to_file(res, sum_stats, out_path, suff=''):
+    fname_out = os.path.join(out_path, 'duty_cycle_realisations'+suff+'.hdf5')
+    print('Saving realisations to file %s' %fname_out)
+    with h5py.File(fname_out, 'w') as f:
+        for k in res.keys():
+            f.create_dataset(k, data=res[k], compression='gzip', shuffle=False, )
+        pg = f.create_group('summary')
+        for k in sum_stats.keys():
+            pg.create_dataset(k, data=sum_stats[k])
+
+
+parser = argparse.ArgumentParser(prog = 'resample_duty_cycle.py', description='Executable to compute the distribution of the results of calculate_forecasts_from_catalog.py among realisations of the duty cycle of the detectors, from the SNRs and Fisher matrices of the individual detectors, without computing the waveforms again.')
+parser.add_argument("--fout", default='test_gwfast', type=str, required=True, help='Path to the output folder of calculate_forecasts_from_catalog.py, which has to be run with **--return_all** ``1`` and duty factor 1. The results are stored in the same folder.')
+parser.add_argument("--idx_in", default=0, type=int, required=False, help='Index of the first event in the catalog used by calculate_forecasts_from_catalog.py.')
+parser.add_argument("--idx_f", default=None, type=int, required=True, help='Index of the last event in the catalog used by calculate_forecasts_from_catalog.py (i.e. the number of events in the catalog if **--idx_f** was not specified).')
+parser.add_argument("--wf_model",  default='tf2', type=str, required=False, help='Name of the waveform model used by calculate_forecasts_from_catalog.py.')
+parser.add_argument("--params_fix", nargs='+', default=[ ], type=str, required=False, help='List of parameters fixed by calculate_forecasts_from_catalog.py, separated by *single spacing*.')
+parser.add_argument("--duty_factor", default=0.85, type=float, required=False, help='Duty factor of the detectors (the same is used for all detectors in a network).')
+parser.add_argument("--n_realisations", default=100, type=int, required=False, help='Number of realisations of the duty cycle.')
+parser.add_argument("--snr_th", default=12., type=float, required=False, help='Threshold value for the SNR to consider the event detectable. This cannot be lower than the one used by calculate_forecasts_from_catalog.py.')
+parser.add_argument("--seed", default=None, type=int, required=False, help='Seed for the realisations of the duty cycle, to help reproducibility.')
+parser.add_argument("--fast_inversion", default=1, type=int, required=False, help='Int specifying if the FIMs have first to be inverted all at once in double precision, inverting with mpmath only the ill-conditioned ones and the ones with a large residual (``1``), or if all of them have to be inverted with mpmath (``0``).')
+
+if __name__ =='__main__':
+
+    FLAGS = parser.parse_args()
+    print('Input arguments: %s' %str(FLAGS))
+
+    ti = time.time()
+    suffstr = '_'+str(FLAGS.idx_in)+'_to_'+str(FLAGS.idx_f)
+
+    if len(load_idxs_det(FLAGS.fout, suff=suffstr))==0:
+        # The events are detected with all the detectors on, so none can be detected in a realisation of the duty cycle
+        print('No events were detected by calculate_forecasts_from_catalog.py, thus none can be detected in any realisation of the duty cycle. Nothing to resample, exiting.')
+        sys.exit(0)
+
+    allsnrs, allfishers, idxs_det, events_det = load_all(FLAGS.fout, suff=suffstr)
+    # The indices of the detected events are stored as positions in the original catalog, while the SNRs start at idx_in
+    idxs_det = idxs_det - FLAGS.idx_in
+    if (idxs_det.min()<0) or (idxs_det.max()>=len(allsnrs['net'])):
+        raise ValueError('The indices of the detected events are not in the range of the stored SNRs. Check that --idx_in and --idx_f are the ones used for calculate_forecasts_from_catalog.py.')
+    print('Loaded the SNRs of %s events and the FIMs of %s events for the detectors %s' %(len(allsnrs['net']), len(idxs_det), str([k for k in allfishers.keys() if k!='net'])))
+
+    parNums = wf_models_dict[FLAGS.wf_model]().ParNums
+    if len(FLAGS.params_fix)>0:
+        _, parNums = fixParams(onp.zeros((len(parNums), len(parNums))), parNums, FLAGS.params_fix)
+
+    res = DutyCycleRealisations(allfishers, allsnrs, FLAGS.duty_factor, FLAGS.n_realisations, snr_th=FLAGS.snr_th,
+                                idxs_det=idxs_det, ParNums=parNums, theta=events_det['theta'], seed=FLAGS.seed,
+                                fastPath=FLAGS.fast_inversion)
+
+    print('\nSummary among %s realisations with duty factor %s:' %(FLAGS.n_realisations, FLAGS.duty_factor))
+    sum_stats = {'n_det': summary(res['n_det']),
+                 'median_sky_area': summary(onp.nanmedian(res['sky_area'], axis=-1)),
+                 'n_sky_area_10': summary((res['sky_area']<10.).sum(axis=-1)),
+                 'n_sky_area_100': summary((res['sky_area']<100.).sum(axis=-1)),
+                }
+    for p in parNums.keys():
+        sum_stats['median_error_'+p] = summary(onp.nanmedian(res['errors'][parNums[p]], axis=-1))
+
+    print('%-26s %12s %12s %12s %12s %12s' %('', 'mean', 'std', '5%', '50%', '95%'))
+    for k in sum_stats.keys():
+        print('%-26s %12.4g %12.4g %12.4g %12.4g %12.4g' %((k,)+tuple(sum_stats[k])))
+
+    to_file(res, sum_stats, FLAGS.fout, suff=suffstr)
+
+    te = time.time()
+    print('------ Done. Total execution time: %s sec.\n\n' %(str((te-ti))))